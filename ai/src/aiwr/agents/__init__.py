@@ -1,38 +1,117 @@
 """Agent registry for AI coding assistants."""
 
-from .base import BaseAgent
-from .claude import ClaudeAgent
-from .codex import CodexAgent
-from .gemini import GeminiAgent
-from .opencode import OpenCodeAgent
-
-AGENTS: dict[str, BaseAgent] = {
-    "claude": ClaudeAgent(),
-    "gemini": GeminiAgent(),
-    "codex": CodexAgent(),
-    "opencode": OpenCodeAgent(),
+import importlib
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from .base import BaseAgent, ContextItem
+
+ENTRY_POINT_GROUP = "aiwr.agents"  # Third-party agents: name = "module:AgentClass"
+
+# Built-in agents: name -> (module, class), imported on first use
+BUILTIN_AGENTS: dict[str, tuple[str, str]] = {
+    "claude": ("claude", "ClaudeAgent"),
+    "gemini": ("gemini", "GeminiAgent"),
+    "codex": ("codex", "CodexAgent"),
+    "opencode": ("opencode", "OpenCodeAgent"),
+    "replay": ("replay", "ReplayAgent"),
 }
 
 
+class AgentRegistry(Mapping[str, BaseAgent]):
+    """Agents by name, each imported and instantiated on first lookup.
+
+    Built-in agents come first. Third-party agents are found through the
+    `aiwr.agents` entry point group; installed package metadata is only
+    scanned for a name that isn't built in, or to list every agent, and
+    a plugin is imported only when it is used.
+    """
+
+    def __init__(self, builtins: dict[str, tuple[str, str]]):
+        self._builtins = builtins
+        self._plugins: dict[str, Any] | None = None  # name -> EntryPoint
+        self._agents: dict[str, BaseAgent] = {}
+
+    def __getitem__(self, name: str) -> BaseAgent:
+        agent = self._agents.get(name)
+        if agent is None:
+            agent = self._agents[name] = self._load(name)
+        return agent
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._builtins or name in self._agents or name in self._entry_points()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._builtins
+        yield from (name for name in self._entry_points() if name not in self._builtins)
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def _load(self, name: str) -> BaseAgent:
+        """Import and instantiate an agent.
+
+        Raises:
+            KeyError: If there is no such agent
+            ValueError: If a plugin can't be loaded or isn't a BaseAgent
+        """
+        if name in self._builtins:
+            module_name, class_name = self._builtins[name]
+            module = importlib.import_module(f".{module_name}", __name__)
+            return getattr(module, class_name)()
+
+        entry_point = self._entry_points().get(name)
+        if entry_point is None:
+            raise KeyError(name)
+        try:
+            agent = entry_point.load()()
+        except Exception as e:
+            raise ValueError(f"Can't load agent plugin {name} ({entry_point.value}): {e}") from e
+        if not isinstance(agent, BaseAgent):
+            raise ValueError(f"Agent plugin {name} ({entry_point.value}) is not a BaseAgent")
+        return agent
+
+    def _entry_points(self) -> dict[str, Any]:
+        if self._plugins is None:
+            from importlib.metadata import entry_points
+
+            self._plugins = {ep.name: ep for ep in entry_points(group=ENTRY_POINT_GROUP)}
+        return self._plugins
+
+
+AGENTS = AgentRegistry(BUILTIN_AGENTS)
+
+
 def get_agent(name: str) -> BaseAgent:
     """Get agent by name."""
-    if name not in AGENTS:
-        available = ", ".join(AGENTS.keys())
-        raise ValueError(f"Unknown agent: {name}. Available: {available}")
-    return AGENTS[name]
+    try:
+        return AGENTS[name]
+    except KeyError:
+        available = ", ".join(AGENTS)
+        raise ValueError(f"Unknown agent: {name}. Available: {available}") from None
 
 
 def list_agents() -> list[str]:
-    """Return list of available agent names."""
-    return list(AGENTS.keys())
+    """Return list of available agent names, plugins included."""
+    return list(AGENTS)
+
+
+def __getattr__(name: str) -> Any:
+    # Agent classes are importable from the package without importing every agent
+    for module_name, class_name in BUILTIN_AGENTS.values():
+        if class_name == name:
+            return getattr(importlib.import_module(f".{module_name}", __name__), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "BaseAgent",
+    "ContextItem",
     "ClaudeAgent",
     "GeminiAgent",
     "CodexAgent",
     "OpenCodeAgent",
+    "ReplayAgent",
     "get_agent",
     "list_agents",
 ]
@@ -1,18 +1,112 @@
 """Base agent class for AI coding assistants."""
 
 import json
-from abc import ABC, abstractmethod
-from typing import Any
+from abc import ABC
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from ..event import LogEvent, parse_log_bytes
+
+
+class ContextItem(NamedTuple):
+    """One piece of a session worth keeping in a resume prompt."""
+
+    role: str  # user, assistant, tool, tool_result, result
+    text: str
+    name: str | None = None  # Tool name for tool/tool_result
+    delta: bool = False  # Continues the previous item of the same role (streamed text)
+
+
+# What an event can mean to the runner
+EVENT_ROLES = frozenset({"session_id", "prompt", "result", "reset", "final", "status"})
+
+# The per-role methods, kept as views over the rule table
+_ROLE_VIEWS = {
+    "session_id": "extract_session_id",
+    "prompt": "extract_prompt",
+    "result": "extract_result",
+    "reset": "should_reset_result",
+    "final": "is_final",
+    "status": "extract_status",
+}
+
+
+class EventRule(NamedTuple):
+    """Declares one role of an event type.
+
+    The rule applies to events whose "type" is `type` (None: every event)
+    and whose fields match `when`. Its value is the field at `path`, or the
+    constant `value` when there is no path, translated through `map`.
+    Several rules for the same role are tried in order and combine like
+    `or`: the first non-empty value wins, otherwise the last rule's value.
+    """
+
+    role: str
+    type: str | None = None
+    path: str | None = None
+    when: dict[str, Any] | None = None
+    value: Any = True
+    map: dict[str, Any] | None = None
+
+
+class EventRoles(NamedTuple):
+    """Everything the rule table says about one event."""
+
+    session_id: str | None = None
+    prompt: str | None = None
+    result: str | None = None
+    reset: bool = False
+    final: bool = False
+    status: str | None = None
 
 
 class BaseAgent(ABC):
-    """Abstract base class for AI coding assistant agents."""
+    """Abstract base class for AI coding assistant agents.
+
+    Event handling is declarative: `rules` maps event types to roles and is
+    compiled once per class into a dispatch dict, so classify() does one
+    lookup per event. The extract_* methods are views over the table; a
+    subclass that still overrides one of them is honored for that role.
+    """
 
     name: str
     command: str
     prompt_flag: str
     session_id_path: str
     resume_flag: str | None = None
+    new_session_flag: str | None = None  # Starts a new session under a given ID
+    rules: tuple[EventRule, ...] = ()
+
+    _dispatch: dict[str | None, tuple[EventRule, ...]] = {}
+    _untyped: tuple[EventRule, ...] = ()
+    _overridden: frozenset[str] = frozenset()
+    _reset_rules: bool = False
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        rules = list(cls.rules)
+        session_id_path = getattr(cls, "session_id_path", None)
+        if session_id_path and not any(rule.role == "session_id" for rule in rules):
+            rules.insert(0, EventRule("session_id", path=session_id_path))
+
+        for rule in rules:
+            if rule.role not in EVENT_ROLES:
+                raise ValueError(f"{cls.__name__}: unknown event role {rule.role!r}")
+
+        # Every typed entry carries the untyped rules too - one lookup per event
+        untyped = tuple(rule for rule in rules if rule.type is None)
+        dispatch: dict[str | None, list[EventRule]] = {}
+        for rule in rules:
+            if rule.type is not None:
+                dispatch.setdefault(rule.type, list(untyped)).append(rule)
+
+        cls._dispatch = {event_type: tuple(typed) for event_type, typed in dispatch.items()}
+        cls._untyped = untyped
+        cls._reset_rules = any(rule.role == "reset" for rule in rules)
+        cls._overridden = frozenset(
+            role for role, method in _ROLE_VIEWS.items()
+            if getattr(cls, method) is not getattr(BaseAgent, method)
+        )
 
     def build_command(
         self,
@@ -26,8 +120,11 @@ class BaseAgent(ABC):
             cmd.extend(extra_args)
         return cmd
 
-    def get_model(self, extra_args: list[str] | None = None) -> str | None:
-        """Get model from extra_args."""
+    def get_model(self, extra_args: list[str] | None = None, prompt: str | None = None) -> str | None:
+        """Get model from extra_args.
+
+        `prompt` is there for agents whose model follows from the input.
+        """
         if extra_args and "--model" in extra_args:
             try:
                 idx = extra_args.index("--model")
@@ -36,6 +133,14 @@ class BaseAgent(ABC):
                 pass
         return None
 
+    def event_agent(self, model: str | None) -> "BaseAgent":
+        """Return the agent whose rules read the output of a run with `model`.
+
+        Every agent reads its own format; the replay agent reads the
+        format of the agent it plays back.
+        """
+        return self
+
     def parse_log_entry(self, line: str) -> dict[str, Any] | None:
         """Parse a line and return JSON dict if it's a valid log entry.
 
@@ -50,43 +155,113 @@ class BaseAgent(ABC):
         except json.JSONDecodeError:
             return None
 
+    def parse_log_bytes(self, line: bytes) -> LogEvent | None:
+        """Wrap a raw stdout line as a lazily decoded LogEvent.
+
+        The hot path: the line is logged verbatim and decoded only as far
+        as the extractors need. Returns None for non-JSON lines.
+        Override in subclasses for agent-specific filtering.
+        """
+        return parse_log_bytes(line)
+
+    def classify(
+        self,
+        json_data: Mapping[str, Any],
+        want: frozenset[str] = EVENT_ROLES,
+    ) -> EventRoles:
+        """Work out every role of an event in one pass.
+
+        `want` limits the roles evaluated - the runner stops asking for
+        the session ID once it has one, so later events aren't decoded
+        for it.
+        """
+        found = self._apply_rules(json_data, want)
+
+        for role in self._overridden & want:
+            found[role] = getattr(self, _ROLE_VIEWS[role])(json_data)
+
+        if "reset" in want and "reset" not in found and not self._reset_rules:
+            # Default: no accumulation, every new result replaces the last
+            result = found["result"] if "result" in found else self.extract_result(json_data)
+            found["reset"] = result is not None
+
+        return EventRoles(**found)
+
+    def _apply_rules(self, json_data: Mapping[str, Any], want: frozenset[str]) -> dict[str, Any]:
+        found: dict[str, Any] = {}
+        empty: dict[str, Any] = {}  # Last empty value per role, kept unless a later rule has one
+        for rule in self._dispatch.get(json_data.get("type"), self._untyped):
+            if rule.role in found or rule.role not in want or rule.role in self._overridden:
+                continue
+            if rule.when and any(json_data.get(k) != v for k, v in rule.when.items()):
+                continue
+
+            value = rule.value if rule.path is None else self._extract_by_path(json_data, rule.path)
+            if rule.map and isinstance(value, str):
+                value = rule.map.get(value, value)
+            if value:
+                found[rule.role] = value
+            else:
+                empty[rule.role] = value
+
+        for role, value in empty.items():
+            if role not in found and value is not None:
+                found[role] = value
+        return found
+
+    def _role(self, json_data: Mapping[str, Any], role: str) -> Any:
+        return self._apply_rules(json_data, frozenset((role,))).get(role)
+
     def extract_session_id(self, json_data: dict[str, Any]) -> str | None:
-        """Extract session ID from JSON output using the configured path."""
-        return self._extract_by_path(json_data, self.session_id_path)
+        """Extract session ID from JSON output (session_id rules or `session_id_path`)."""
+        return self._role(json_data, "session_id")
 
-    @abstractmethod
     def extract_result(self, json_data: dict[str, Any]) -> str | None:
         """Extract final result from JSON data.
 
-        Called for each JSON object. Should return the result text
-        when appropriate (e.g., from assistant message or completion).
+        Called for each JSON object. Returns the result text when
+        appropriate (e.g., from assistant message or completion).
         """
-        pass
+        return self._role(json_data, "result")
 
-    @abstractmethod
     def is_final(self, json_data: dict[str, Any]) -> bool:
         """Check if this JSON object marks the end of the session."""
-        pass
+        return bool(self._role(json_data, "final"))
 
-    @abstractmethod
     def extract_prompt(self, json_data: dict[str, Any]) -> str | None:
         """Extract user prompt from JSON data."""
-        pass
+        return self._role(json_data, "prompt")
 
-    @abstractmethod
     def extract_status(self, json_data: dict[str, Any]) -> str | None:
         """Extract session status from final JSON."""
-        pass
+        return self._role(json_data, "status")
+
+    def context_items(self, json_data: dict[str, Any]) -> list[ContextItem]:
+        """Extract what a resumed session needs from one JSON event.
+
+        Override in subclasses to keep tool calls and results. Default:
+        the prompt and result this agent already knows how to find.
+        """
+        items = []
+        prompt = self.extract_prompt(json_data)
+        if isinstance(prompt, str):
+            items.append(ContextItem("user", prompt))
+        result = self.extract_result(json_data)
+        if result:
+            items.append(ContextItem("result", result))
+        return items
 
     def should_reset_result(self, json_data: dict[str, Any]) -> bool:
         """Check if accumulated result should be reset.
 
-        Override in subclasses for agents that accumulate multiple messages.
+        Agents that accumulate multiple messages declare reset rules.
         Default: reset on any new result (no accumulation).
         """
+        if self._reset_rules:
+            return bool(self._role(json_data, "reset"))
         return self.extract_result(json_data) is not None
 
-    def _extract_by_path(self, data: dict[str, Any], path: str) -> Any:
+    def _extract_by_path(self, data: Mapping[str, Any], path: str) -> Any:
         """Extract value from dict using JSONPath-like notation ($.field.subfield)."""
         if not path.startswith("$."):
             return None
@@ -95,7 +270,7 @@ class BaseAgent(ABC):
         current = data
 
         for key in keys:
-            if isinstance(current, dict) and key in current:
+            if isinstance(current, Mapping) and key in current:
                 current = current[key]
             else:
                 return None
@@ -1,8 +1,9 @@
 """Claude Code agent implementation."""
 
+import json
 from typing import Any
 
-from .base import BaseAgent
+from .base import BaseAgent, ContextItem, EventRule
 
 
 class ClaudeAgent(BaseAgent):
@@ -13,6 +14,17 @@ class ClaudeAgent(BaseAgent):
     prompt_flag = "--print"
     session_id_path = "$.session_id"
     resume_flag = "--resume"
+    new_session_flag = "--session-id"
+
+    rules = (
+        EventRule("prompt", "user", "$.content"),
+        EventRule("prompt", "user", "$.message"),
+        EventRule("prompt", "message", "$.content", when={"role": "user"}),
+        EventRule("prompt", "message", "$.message", when={"role": "user"}),
+        EventRule("result", "result", "$.result"),
+        EventRule("final", "result"),
+        EventRule("status", "result", value="completed"),
+    )
 
     def build_command(
         self,
@@ -38,30 +50,46 @@ class ClaudeAgent(BaseAgent):
         cmd.extend(["--print", prompt])
         return cmd
 
-    def extract_result(self, json_data: dict[str, Any]) -> str | None:
-        """Extract result from completion JSON.
+    def context_items(self, json_data: dict[str, Any]) -> list[ContextItem]:
+        """Keep message text, tool calls and tool results.
 
-        Claude result is in type=result with field 'result'.
+        Init, thinking blocks and usage are left out.
         """
-        if json_data.get("type") == "result":
-            return json_data.get("result")
-        return None
-
-    def is_final(self, json_data: dict[str, Any]) -> bool:
-        """Claude session ends with type=result."""
-        return json_data.get("type") == "result"
-
-    def extract_prompt(self, json_data: dict[str, Any]) -> str | None:
-        """Extract prompt from user message."""
-        if json_data.get("type") == "user" or (
-            json_data.get("type") == "message" and json_data.get("role") == "user"
-        ):
-            return json_data.get("content") or json_data.get("message")
-        return None
-
-    def extract_status(self, json_data: dict[str, Any]) -> str | None:
-        """Extract status from result JSON."""
-        if json_data.get("type") == "result":
-            # Claude uses "result" type for success
-            return "completed"
-        return None
+        msg_type = json_data.get("type")
+        if msg_type == "result":
+            result = json_data.get("result")
+            return [ContextItem("result", result)] if result else []
+
+        message = json_data.get("message")
+        if msg_type not in ("user", "assistant") or not isinstance(message, dict):
+            return super().context_items(json_data)
+
+        content = message.get("content")
+        if isinstance(content, str):
+            return [ContextItem(msg_type, content)]
+
+        items = []
+        for block in content or []:
+            if not isinstance(block, dict):
+                continue
+            block_type = block.get("type")
+            if block_type == "text" and block.get("text"):
+                items.append(ContextItem(msg_type, block["text"]))
+            elif block_type == "tool_use":
+                args = json.dumps(block.get("input"), ensure_ascii=False)
+                items.append(ContextItem("tool", args, block.get("name")))
+            elif block_type == "tool_result":
+                items.append(ContextItem("tool_result", _block_text(block.get("content"))))
+        return items
+
+
+def _block_text(content: Any) -> str:
+    """Text of a tool_result content: a string or a list of text blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block.get("text", "") for block in content
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+    return ""
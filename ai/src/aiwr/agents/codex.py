@@ -1,8 +1,9 @@
 """Codex CLI agent implementation."""
 
+import json
 from typing import Any
 
-from .base import BaseAgent
+from .base import BaseAgent, ContextItem, EventRule
 
 
 class CodexAgent(BaseAgent):
@@ -14,6 +15,13 @@ class CodexAgent(BaseAgent):
     session_id_path = "$.thread_id"  # from type=thread.started JSON
     resume_flag = "resume"  # positional, not --resume
 
+    rules = (
+        EventRule("prompt", "user.input", "$.text"),
+        EventRule("result", "item.completed", "$.item.text"),
+        EventRule("final", "turn.completed"),
+        EventRule("status", "turn.completed", value="completed"),
+    )
+
     def build_command(
         self,
         prompt: str,
@@ -39,29 +47,45 @@ class CodexAgent(BaseAgent):
 
         return cmd
 
-    def extract_result(self, json_data: dict[str, Any]) -> str | None:
-        """Extract result from item.completed message.
+    def context_items(self, json_data: dict[str, Any]) -> list[ContextItem]:
+        """Keep agent messages, commands, file changes and tool calls.
 
-        Codex result is in type=item.completed with item.text.
+        Reasoning items are left out.
         """
-        if json_data.get("type") == "item.completed":
-            item = json_data.get("item", {})
-            if isinstance(item, dict):
-                return item.get("text")
-        return None
-
-    def is_final(self, json_data: dict[str, Any]) -> bool:
-        """Codex session ends with type=turn.completed."""
-        return json_data.get("type") == "turn.completed"
-
-    def extract_prompt(self, json_data: dict[str, Any]) -> str | None:
-        """Extract prompt from user input."""
         if json_data.get("type") == "user.input":
-            return json_data.get("text")
-        return None
-
-    def extract_status(self, json_data: dict[str, Any]) -> str | None:
-        """Extract status from completion JSON."""
-        if json_data.get("type") == "turn.completed":
-            return "completed"
-        return None
+            return super().context_items(json_data)
+        if json_data.get("type") != "item.completed":
+            return []
+
+        item = json_data.get("item")
+        if not isinstance(item, dict):
+            return []
+        item_type = item.get("type")
+
+        if item_type == "reasoning":
+            return []
+
+        if item_type == "command_execution":
+            output = item.get("aggregated_output") or ""
+            if item.get("exit_code"):
+                output = f"[exit {item['exit_code']}] {output}"
+            return [
+                ContextItem("tool", item.get("command") or "", "shell"),
+                ContextItem("tool_result", output),
+            ]
+
+        if item_type == "file_change":
+            changes = json.dumps(item.get("changes"), ensure_ascii=False)
+            return [ContextItem("tool", changes, "apply_patch")]
+
+        if item_type == "mcp_tool_call":
+            name = f"{item.get('server')}.{item.get('tool')}"
+            args = json.dumps(item.get("arguments"), ensure_ascii=False)
+            items = [ContextItem("tool", args, name)]
+            if item.get("result") is not None:
+                items.append(ContextItem("tool_result", json.dumps(item["result"], ensure_ascii=False)))
+            return items
+
+        if item.get("text"):
+            return [ContextItem("assistant", item["text"])]
+        return []
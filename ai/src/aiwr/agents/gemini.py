@@ -1,8 +1,9 @@
 """Gemini CLI agent implementation."""
 
+import json
 from typing import Any
 
-from .base import BaseAgent
+from .base import BaseAgent, ContextItem, EventRule
 
 
 class GeminiAgent(BaseAgent):
@@ -14,6 +15,18 @@ class GeminiAgent(BaseAgent):
     session_id_path = "$.session_id"  # from type=init JSON
     resume_flag = "--resume"
 
+    # Consecutive assistant messages are concatenated; tool calls interrupt
+    # the message flow and reset the accumulated result
+    rules = (
+        EventRule("prompt", "message", "$.content", when={"role": "user"}),
+        EventRule("result", "message", "$.content", when={"role": "assistant"}),
+        # Reset only on tool calls - they interrupt message flow
+        EventRule("reset", "tool_use"),
+        EventRule("reset", "tool_result"),
+        EventRule("final", "result"),
+        EventRule("status", "result", "$.status"),  # "success" or "error"
+    )
+
     def build_command(
         self,
         prompt: str,
@@ -37,42 +50,30 @@ class GeminiAgent(BaseAgent):
         cmd.append(prompt)
         return cmd
 
-    def extract_result(self, json_data: dict[str, Any]) -> str | None:
-        """Extract result from assistant message.
+    def context_items(self, json_data: dict[str, Any]) -> list[ContextItem]:
+        """Keep messages, tool calls and tool output.
 
-        Gemini result is in type=message with role=assistant.
-        """
-        if json_data.get("type") == "message" and json_data.get("role") == "assistant":
-            return json_data.get("content")
-        return None
-
-    def is_final(self, json_data: dict[str, Any]) -> bool:
-        """Gemini session ends with type=result."""
-        return json_data.get("type") == "result"
-
-    def extract_prompt(self, json_data: dict[str, Any]) -> str | None:
-        """Extract prompt from user message."""
-        if json_data.get("type") == "message" and json_data.get("role") == "user":
-            return json_data.get("content")
-        return None
-
-    def extract_status(self, json_data: dict[str, Any]) -> str | None:
-        """Extract status from result JSON."""
-        if json_data.get("type") == "result":
-            return json_data.get("status")  # "success" or "error"
-        return None
-
-    def should_reset_result(self, json_data: dict[str, Any]) -> bool:
-        """Reset result when interrupted by tool calls.
-
-        Gemini sends multiple consecutive assistant messages that should be
-        concatenated. Reset only on tool_use/tool_result.
+        Assistant messages arrive as deltas and are joined by the builder.
         """
         msg_type = json_data.get("type")
 
-        # Reset on tool calls - they interrupt the message flow
-        if msg_type in ("tool_use", "tool_result"):
-            return True
-
-        # Don't reset on messages or result
-        return False
+        if msg_type == "message" and json_data.get("role") in ("user", "assistant"):
+            content = json_data.get("content")
+            if not content:
+                return []
+            return [ContextItem(json_data["role"], content, delta=bool(json_data.get("delta")))]
+
+        if msg_type == "tool_use":
+            args = json.dumps(json_data.get("parameters"), ensure_ascii=False)
+            return [ContextItem("tool", args, json_data.get("tool_name"))]
+
+        if msg_type == "tool_result":
+            output = json_data.get("output")
+            if not isinstance(output, str):
+                output = json.dumps(output or json_data.get("error"), ensure_ascii=False)
+            status = json_data.get("status")
+            if status and status != "success":
+                output = f"[{status}] {output}"
+            return [ContextItem("tool_result", output)]
+
+        return []
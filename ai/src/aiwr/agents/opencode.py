@@ -1,8 +1,9 @@
 """OpenCode CLI agent implementation."""
 
+import json
 from typing import Any
 
-from .base import BaseAgent
+from .base import BaseAgent, ContextItem, EventRule
 
 
 class OpenCodeAgent(BaseAgent):
@@ -14,6 +15,13 @@ class OpenCodeAgent(BaseAgent):
     session_id_path = "$.sessionID"  # from any JSON event
     resume_flag = "--session"
 
+    # The user prompt isn't part of OpenCode's JSON output
+    rules = (
+        EventRule("result", "text", "$.part.text"),
+        EventRule("final", "step_finish"),
+        EventRule("status", "step_finish", "$.part.reason", map={"stop": "completed"}),
+    )
+
     def build_command(
         self,
         prompt: str,
@@ -37,35 +45,25 @@ class OpenCodeAgent(BaseAgent):
         cmd.append(prompt)
         return cmd
 
-    def extract_result(self, json_data: dict[str, Any]) -> str | None:
-        """Extract result from text event.
-
-        OpenCode result is in type=text with part.text.
-        """
-        if json_data.get("type") == "text":
-            part = json_data.get("part", {})
-            return part.get("text")
-        return None
-
-    def is_final(self, json_data: dict[str, Any]) -> bool:
-        """OpenCode session ends with type=step_finish."""
-        return json_data.get("type") == "step_finish"
+    def context_items(self, json_data: dict[str, Any]) -> list[ContextItem]:
+        """Keep text parts and tool calls with their output."""
+        msg_type = json_data.get("type")
+        part = json_data.get("part")
+        if not isinstance(part, dict):
+            return []
 
-    def extract_prompt(self, json_data: dict[str, Any]) -> str | None:
-        """Extract prompt from step_start event.
+        if msg_type == "text" and part.get("text"):
+            return [ContextItem("assistant", part["text"])]
 
-        Note: OpenCode doesn't include user prompt in JSON output.
-        Prompt is passed as command argument.
-        """
-        return None
+        if msg_type == "tool_use":
+            state = part.get("state") or {}
+            args = json.dumps(state.get("input"), ensure_ascii=False)
+            items = [ContextItem("tool", args, part.get("tool"))]
+            output = state.get("output")
+            if output is not None:
+                if not isinstance(output, str):
+                    output = json.dumps(output, ensure_ascii=False)
+                items.append(ContextItem("tool_result", output, part.get("tool")))
+            return items
 
-    def extract_status(self, json_data: dict[str, Any]) -> str | None:
-        """Extract status from step_finish JSON."""
-        if json_data.get("type") == "step_finish":
-            part = json_data.get("part", {})
-            reason = part.get("reason")
-            # "stop" means completed successfully
-            if reason == "stop":
-                return "completed"
-            return reason
-        return None
+        return []
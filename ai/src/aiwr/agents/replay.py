@@ -0,0 +1,67 @@
+"""Replay agent - plays a recorded session back through the runner."""
+
+import sys
+
+from .base import BaseAgent
+
+AUTO_MODEL = "auto"  # Replay as whatever agent recorded the log
+
+
+class ReplayAgent(BaseAgent):
+    """Agent that re-emits an existing session log.
+
+    The prompt is the log to play back - a path or a session ID. A local
+    emitter (python -m aiwr.replay) writes the log's agent events to
+    stdout in the recorded agent's format, so the runner does exactly the
+    work it does for the real agent, without the binary or the network.
+
+    The model of a replay run is the recorded agent; its rules read the
+    events.
+    """
+
+    name = "replay"
+    command = sys.executable
+    prompt_flag = ""  # positional argument
+    session_id_path = ""  # Read by the recorded agent's rules
+    resume_flag = "--session-id"
+
+    def build_command(
+        self,
+        prompt: str,
+        extra_args: list[str] | None = None,
+        session_id: str | None = None,
+    ) -> list[str]:
+        """Build the emitter command: log, then timing options."""
+        cmd = [self.command, "-m", "aiwr.replay", prompt]
+
+        # Continue under the given session ID instead of a fresh one
+        if session_id:
+            cmd.extend([self.resume_flag, session_id])
+
+        if extra_args:
+            cmd.extend(extra_args)
+        return cmd
+
+    def get_model(self, extra_args: list[str] | None = None, prompt: str | None = None) -> str | None:
+        """Get the recorded agent: --model, or detected from the log."""
+        model = super().get_model(extra_args)
+        if model and model != AUTO_MODEL:
+            return model
+        if prompt is None:
+            return None
+
+        from ..replay import resolve_log, source_agent
+
+        try:
+            return source_agent(resolve_log(prompt))
+        except (OSError, ValueError):
+            return None
+
+    def event_agent(self, model: str | None) -> BaseAgent:
+        """Read events with the rules of the recorded agent."""
+        from . import AGENTS
+
+        source = AGENTS.get(model) if model else None
+        if source is None or isinstance(source, ReplayAgent):
+            return self
+        return source
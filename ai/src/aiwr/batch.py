@@ -0,0 +1,219 @@
+"""Batch execution - run prompts from a JSONL file through a worker pool."""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .agents import get_agent
+from .models import build_model_args
+from .nesting import Nesting
+from .runner import INTERRUPT_SIGNALS, Runner, discard_json, print_json
+
+PROGRESS_SUFFIX = ".progress"
+
+
+class BatchItem(NamedTuple):
+    """One prompt of a batch file."""
+
+    index: int
+    key: str  # Hash of the input line - ties progress records to their input
+    agent: str
+    prompt: str
+    extra_args: list[str]
+    item_id: Any  # Optional caller-supplied "id", echoed in the output
+
+
+def parse_agent_jobs(spec: str | None) -> dict[str, int]:
+    """Parse per-agent concurrency caps: 'claude=2,codex=4'.
+
+    Raises:
+        ValueError: If the spec is malformed or names an unknown agent
+    """
+    caps: dict[str, int] = {}
+    if not spec:
+        return caps
+
+    for item in spec.split(","):
+        agent_name, sep, limit = item.strip().partition("=")
+        if not sep or not limit.isdigit() or int(limit) < 1:
+            raise ValueError(f"Invalid agent job limit: {item!r} (expected AGENT=N)")
+        get_agent(agent_name)
+        caps[agent_name] = int(limit)
+    return caps
+
+
+def load_batch(path: Path, default_agent: str, cli_extra_args: list[str]) -> list[BatchItem | dict[str, Any]]:
+    """Read a batch file.
+
+    Each line is {"prompt": ..., "agent"?: ..., "model"?: ..., "args"?: [...], "id"?: ...}.
+    Invalid lines become error records so the output still has one line per input.
+    """
+    items: list[BatchItem | dict[str, Any]] = []
+
+    with open(path, encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            key = hashlib.sha1(line.encode("utf-8")).hexdigest()[:16]
+
+            try:
+                spec = json.loads(line)
+                if not isinstance(spec, dict) or not isinstance(spec.get("prompt"), str):
+                    raise ValueError('each line needs a "prompt" string')
+                agent_name = spec.get("agent") or default_agent
+                get_agent(agent_name)
+                line_args = [str(arg) for arg in spec.get("args") or []]
+                extra_args = build_model_args(agent_name, spec.get("model"), line_args + cli_extra_args)
+            except (json.JSONDecodeError, ValueError) as e:
+                items.append({"index": index, "error": str(e), "exit_code": 1})
+                continue
+
+            items.append(BatchItem(index, key, agent_name, spec["prompt"], extra_args, spec.get("id")))
+
+    return items
+
+
+def load_progress(path: Path) -> dict[int, dict[str, Any]]:
+    """Read finished records from a progress file, keyed by input index."""
+    done: dict[int, dict[str, Any]] = {}
+    if not path.exists():
+        return done
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line of an interrupted batch
+            done[record["index"]] = record
+    return done
+
+
+def run_batch(
+    batch_path: Path,
+    default_agent: str,
+    cli_extra_args: list[str],
+    jobs: int = 4,
+    agent_jobs: dict[str, int] | None = None,
+    unordered: bool = False,
+    progress_path: Path | None = None,
+    nesting: Nesting | None = None,
+    debug: bool = False,
+) -> int:
+    """Run every prompt of a batch file with bounded concurrency.
+
+    Prints one JSON result line per input line - in input order, or in
+    completion order with `unordered`. Successful runs are appended to the
+    progress file; rerunning the same batch skips them.
+    """
+    items = load_batch(batch_path, default_agent, cli_extra_args)
+    progress_path = progress_path or batch_path.with_name(batch_path.name + PROGRESS_SUFFIX)
+    done = load_progress(progress_path)
+
+    return asyncio.run(_run_batch(
+        items, done, progress_path, jobs, agent_jobs or {}, unordered, nesting or Nesting(), debug,
+    ))
+
+
+async def _run_batch(
+    items: list[BatchItem | dict[str, Any]],
+    done: dict[int, dict[str, Any]],
+    progress_path: Path,
+    jobs: int,
+    agent_jobs: dict[str, int],
+    unordered: bool,
+    nesting: Nesting,
+    debug: bool,
+) -> int:
+    slots = asyncio.Semaphore(jobs)
+    agent_slots = {name: asyncio.Semaphore(limit) for name, limit in agent_jobs.items()}
+    running: set[Runner] = set()
+    interrupted: list[int] = []
+
+    # Ordered output: results wait in `pending` until every earlier index is out
+    order = [item.index if isinstance(item, BatchItem) else item["index"] for item in items]
+    pending: dict[int, dict[str, Any]] = {}
+    next_out = 0
+    failed = False
+
+    def emit(record: dict[str, Any]) -> None:
+        nonlocal next_out, failed
+        failed = failed or record["exit_code"] != 0
+        if unordered:
+            print_json(record)
+            return
+        pending[record["index"]] = record
+        while next_out < len(order) and order[next_out] in pending:
+            print_json(pending.pop(order[next_out]))
+            next_out += 1
+
+    progress = open(progress_path, "a", encoding="utf-8")
+
+    async def run_item(item: BatchItem) -> None:
+        # The agent's slot first: items waiting on a capped agent hold no --jobs slot
+        agent_slot = agent_slots.get(item.agent) or contextlib.nullcontext()
+        runner = None
+        async with agent_slot, slots:
+            try:
+                if interrupted:
+                    return
+                runner = Runner(
+                    agent=get_agent(item.agent),
+                    prompt=item.prompt,
+                    extra_args=item.extra_args,
+                    nesting=nesting,
+                    debug=debug,
+                    emit=discard_json,
+                )
+                running.add(runner)
+                await runner.run_async()
+            except Exception as e:
+                # The agent failed to spawn: this item fails, the others run on
+                emit({"index": item.index, "id": item.item_id, "error": str(e), "exit_code": 1})
+                return
+            finally:
+                running.discard(runner)
+
+        record = {"index": item.index, "id": item.item_id, **runner.result.to_dict()}
+        if record["exit_code"] == 0:
+            progress.write(json.dumps({**record, "key": item.key}, ensure_ascii=False) + "\n")
+            progress.flush()
+        emit(record)
+
+    def interrupt_all(signum: int) -> None:
+        interrupted.append(signum)
+        for runner in list(running):
+            runner.interrupt(signum)
+
+    loop = asyncio.get_running_loop()
+    for sig in INTERRUPT_SIGNALS:
+        loop.add_signal_handler(sig, interrupt_all, sig)
+
+    tasks = []
+    try:
+        for item in items:
+            if not isinstance(item, BatchItem):
+                emit(item)
+                continue
+
+            previous = done.get(item.index)
+            if previous and previous.get("key") == item.key:
+                previous = {k: v for k, v in previous.items() if k != "key"}
+                emit({**previous, "skipped": True})
+                continue
+
+            tasks.append(asyncio.create_task(run_item(item)))
+
+        await asyncio.gather(*tasks)
+    finally:
+        progress.close()
+        for sig in INTERRUPT_SIGNALS:
+            loop.remove_signal_handler(sig)
+
+    if interrupted:
+        return 128 + interrupted[0]
+    return 1 if failed else 0
@@ -0,0 +1 @@
+"""Benchmarks - synthetic log trees and timing suites (python -m aiwr.bench)."""
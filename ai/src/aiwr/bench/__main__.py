@@ -0,0 +1,306 @@
+"""Benchmark entry point: python -m aiwr.bench {generate,run,replay,startup,stress}."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .generate import LAYOUTS, TreeSpec, generate_tree
+from .replay import DEFAULT_EVENTS, DEFAULT_RUNS, run_replay_bench
+from .startup import DEFAULT_SESSIONS
+from .startup import DEFAULT_RUNS as DEFAULT_STARTUP_RUNS
+from .startup import run_startup_bench
+from .stress import DEFAULT_CHILDREN, DEFAULT_PARENTS, run_stress_bench
+from .suite import (
+    DEFAULT_REPEAT,
+    DEFAULT_SAMPLES,
+    DEFAULT_SIZES,
+    OPERATIONS,
+    compare_reports,
+    print_report,
+    run_suite,
+)
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m aiwr.bench",
+        description="Generate synthetic session logs and benchmark aiwr storage",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write a synthetic .aiwr/logs tree")
+    generate.add_argument("logs_dir", type=Path, help="Logs directory to create")
+    _add_spec_arguments(generate)
+    generate.add_argument("--sessions-per-day", type=int, default=1000, help="Sessions per day (default: 1000)")
+
+    run = commands.add_parser("run", help="Time storage operations at several tree sizes")
+    _add_spec_arguments(run)
+    run.add_argument(
+        "--sizes",
+        type=str,
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help=f"Comma-separated session counts (default: {','.join(map(str, DEFAULT_SIZES))})",
+    )
+    run.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".aiwr-bench"),
+        help="Where generated trees are kept and reused (default: .aiwr-bench)",
+    )
+    run.add_argument(
+        "--ops",
+        type=str,
+        default=",".join(OPERATIONS),
+        help=f"Comma-separated operations (default: all - {','.join(OPERATIONS)})",
+    )
+    run.add_argument(
+        "--samples",
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"Sessions sampled per single-session operation (default: {DEFAULT_SAMPLES})",
+    )
+    run.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f"Calls per whole-tree operation (default: {DEFAULT_REPEAT})",
+    )
+    run.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    run.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+
+    replay = commands.add_parser("replay", help="Time the runner on a long replayed session")
+    replay.add_argument("--agent", default="claude", help="Recorded agent format (default: claude)")
+    replay.add_argument(
+        "--events",
+        type=int,
+        default=DEFAULT_EVENTS,
+        help=f"Events in the replayed session (default: {DEFAULT_EVENTS})",
+    )
+    replay.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"Runs per stage (default: {DEFAULT_RUNS})")
+    replay.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".aiwr-bench"),
+        help="Where the session is written (default: .aiwr-bench)",
+    )
+    replay.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    replay.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+
+    startup = commands.add_parser("startup", help="Time aiwr --version and --list in fresh interpreters")
+    startup.add_argument(
+        "--runs",
+        type=int,
+        default=DEFAULT_STARTUP_RUNS,
+        help=f"Runs per command (default: {DEFAULT_STARTUP_RUNS})",
+    )
+    startup.add_argument(
+        "--sessions",
+        type=int,
+        default=DEFAULT_SESSIONS,
+        help=f"Sessions in the tree --list reads (default: {DEFAULT_SESSIONS})",
+    )
+    startup.add_argument("--max-ms", type=float, help="Fail if a command's median exceeds this")
+    startup.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".aiwr-bench"),
+        help="Where the --list tree is kept and reused (default: .aiwr-bench)",
+    )
+    startup.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    startup.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+
+    stress = commands.add_parser("stress", help="Race concurrent child sessions on the log layout")
+    stress.add_argument(
+        "--children",
+        type=int,
+        default=DEFAULT_CHILDREN,
+        help=f"Concurrent child processes (default: {DEFAULT_CHILDREN})",
+    )
+    stress.add_argument(
+        "--parents",
+        type=int,
+        default=DEFAULT_PARENTS,
+        help=f"Parent sessions they are spread over (default: {DEFAULT_PARENTS})",
+    )
+    stress.add_argument("--compression", default="none", help="Log compression (default: none)")
+    stress.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".aiwr-bench"),
+        help="Where the logs tree is written (default: .aiwr-bench)",
+    )
+    stress.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "generate":
+            return handle_generate(args)
+        if args.command == "replay":
+            return handle_replay(args)
+        if args.command == "startup":
+            return handle_startup(args)
+        if args.command == "stress":
+            return handle_stress(args)
+        return handle_run(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def _add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = TreeSpec()
+    parser.add_argument("--days", type=int, default=defaults.days, help=f"Date directories (default: {defaults.days})")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help=f"Max nesting depth (default: {defaults.depth})")
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help=f"Max children per session (default: {defaults.fanout})")
+    parser.add_argument("--events", type=int, default=defaults.events, help=f"Agent events per session (default: {defaults.events})")
+    parser.add_argument("--layout", choices=LAYOUTS, default=defaults.layout, help=f"Session layout (default: {defaults.layout})")
+    parser.add_argument(
+        "--agents",
+        type=str,
+        default=",".join(defaults.agents),
+        help=f"Comma-separated agents to draw from (default: {','.join(defaults.agents)})",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed, help=f"RNG seed (default: {defaults.seed})")
+
+
+def _spec(args: argparse.Namespace, sessions_per_day: int) -> TreeSpec:
+    return TreeSpec(
+        days=args.days,
+        sessions_per_day=sessions_per_day,
+        depth=args.depth,
+        fanout=args.fanout,
+        events=args.events,
+        layout=args.layout,
+        agents=tuple(name.strip() for name in args.agents.split(",") if name.strip()),
+        seed=args.seed,
+    )
+
+
+def _int_list(value: str, name: str) -> tuple[int, ...]:
+    try:
+        numbers = tuple(int(item) for item in value.split(",") if item.strip())
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+    if not numbers or any(number < 1 for number in numbers):
+        raise ValueError(f"Invalid {name}: {value}")
+    return numbers
+
+
+def handle_generate(args: argparse.Namespace) -> int:
+    """Handle the generate command."""
+    tree = generate_tree(args.logs_dir, _spec(args, args.sessions_per_day))
+    print(json.dumps({
+        "logs_dir": str(tree.logs_dir),
+        "sessions": len(tree.paths),
+        "roots": len(tree.roots),
+        "bytes": tree.bytes,
+    }))
+    return 0
+
+
+def handle_run(args: argparse.Namespace) -> int:
+    """Handle the run command."""
+    sizes = _int_list(args.sizes, "sizes")
+    operations = tuple(op.strip() for op in args.ops.split(",") if op.strip())
+    unknown = [op for op in operations if op not in OPERATIONS]
+    if unknown:
+        raise ValueError(f"Unknown operation: {', '.join(unknown)}. Available: {', '.join(OPERATIONS)}")
+
+    baseline = _load_baseline(args.baseline)
+    report = run_suite(
+        args.workdir,
+        sizes=sizes,
+        spec=_spec(args, 1),
+        samples=args.samples,
+        repeat=args.repeat,
+        operations=operations,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    if baseline is not None:
+        compare_reports(report, baseline)
+    print_report(report, args.output)
+    return 0
+
+
+def handle_replay(args: argparse.Namespace) -> int:
+    """Handle the replay command."""
+    if args.events < 3 or args.runs < 1:
+        raise ValueError("--events must be at least 3 and --runs at least 1")
+
+    baseline = _load_baseline(args.baseline)
+    report = run_replay_bench(
+        args.workdir,
+        agent_name=args.agent,
+        events=args.events,
+        runs=args.runs,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    if baseline is not None:
+        compare_reports(report, baseline)
+    print_report(report, args.output)
+    return 0
+
+
+def handle_startup(args: argparse.Namespace) -> int:
+    """Handle the startup command.
+
+    Fails when a command imports a forbidden module or, with --max-ms,
+    when its median wall time is over budget.
+    """
+    if args.runs < 1 or args.sessions < 1:
+        raise ValueError("--runs and --sessions must be at least 1")
+
+    baseline = _load_baseline(args.baseline)
+    report = run_startup_bench(
+        args.workdir,
+        runs=args.runs,
+        sessions=args.sessions,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    if baseline is not None:
+        compare_reports(report, baseline)
+    print_report(report, args.output)
+
+    failed = False
+    for record in report["results"]:
+        if record.get("violations"):
+            print(f"{record['op']}: imports {', '.join(record['violations'])}", file=sys.stderr)
+            failed = True
+        if args.max_ms is not None and "violations" in record and record["median"] * 1000 > args.max_ms:
+            print(f"{record['op']}: median {record['median'] * 1000:.1f}ms > {args.max_ms:g}ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+def handle_stress(args: argparse.Namespace) -> int:
+    """Handle the stress command. Fails when the tree isn't intact."""
+    if args.children < 1 or args.parents < 1:
+        raise ValueError("--children and --parents must be at least 1")
+
+    report = run_stress_bench(
+        args.workdir,
+        children=args.children,
+        parents=args.parents,
+        compression=args.compression,
+        log=lambda message: print(message, file=sys.stderr),
+    )
+    print_report(report, args.output)
+
+    errors = report["results"][0]["errors"]
+    for error in errors:
+        print(error, file=sys.stderr)
+    return 1 if errors else 0
+
+
+def _load_baseline(path: Path | None) -> dict | None:
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
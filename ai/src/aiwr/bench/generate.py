@@ -0,0 +1,298 @@
+"""Synthetic session logs - realistic .aiwr/logs trees for benchmarks."""
+
+import json
+import math
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from ..models import get_default_model
+
+LAYOUTS = ("nested", "flat", "dir")
+
+# Mean sizes (characters) of the variable parts of agent events
+EVENT_SIZES = {"prompt": 200, "text": 300, "tool_input": 120, "tool_result": 1500}
+MAX_EVENT_SIZE = 64 * 1024
+
+_WORDS = (
+    "the session agent file test build error result config module function class "
+    "import return value list path update check read write index cache parse line "
+    "output input data json log tree child parent resume prompt tool call done"
+).split()
+_TOOLS = ("Bash", "Read", "Edit", "Grep", "Write", "Glob")
+
+
+@dataclass
+class TreeSpec:
+    """Shape of a generated logs tree.
+
+    Every root session gets up to `fanout` children per level, `depth`
+    levels deep; `sessions_per_day` counts children too. Layouts:
+
+    - nested: what aiwr writes - a session with children is a directory
+    - flat: every session is a file in its date directory
+    - dir: every session is a directory, even without children
+    """
+
+    days: int = 1
+    sessions_per_day: int = 1000
+    depth: int = 2
+    fanout: int = 3
+    events: int = 8  # Agent events per session, besides aiwr_* entries
+    layout: str = "nested"
+    agents: tuple[str, ...] = ("claude", "gemini", "codex", "opencode")
+    seed: int = 0
+    end_date: str | None = None  # Newest date directory (default: today)
+
+
+@dataclass
+class GeneratedTree:
+    """What was written - lets benchmarks pick sessions without scanning."""
+
+    logs_dir: Path
+    spec: TreeSpec
+    paths: dict[str, Path] = field(default_factory=dict)
+    parents: dict[str, str] = field(default_factory=dict)  # child -> parent
+    roots: list[str] = field(default_factory=list)
+    bytes: int = 0
+
+    @property
+    def children(self) -> dict[str, list[str]]:
+        children: dict[str, list[str]] = {}
+        for child_id, parent_id in self.parents.items():
+            children.setdefault(parent_id, []).append(child_id)
+        return children
+
+    def to_manifest(self) -> dict[str, Any]:
+        spec = asdict(self.spec)
+        spec["agents"] = list(self.spec.agents)
+        return {
+            "spec": spec,
+            "paths": {sid: path.relative_to(self.logs_dir).as_posix() for sid, path in self.paths.items()},
+            "parents": self.parents,
+            "roots": self.roots,
+            "bytes": self.bytes,
+        }
+
+    @classmethod
+    def from_manifest(cls, logs_dir: Path, manifest: dict[str, Any]) -> "GeneratedTree":
+        spec = dict(manifest["spec"])
+        spec["agents"] = tuple(spec["agents"])
+        return cls(
+            logs_dir=logs_dir,
+            spec=TreeSpec(**spec),
+            paths={sid: logs_dir / rel for sid, rel in manifest["paths"].items()},
+            parents=manifest["parents"],
+            roots=manifest["roots"],
+            bytes=manifest["bytes"],
+        )
+
+
+def generate_tree(logs_dir: Path, spec: TreeSpec) -> GeneratedTree:
+    """Write a synthetic logs tree into `logs_dir`.
+
+    Output is deterministic for a given spec (session IDs and content come
+    from a seeded RNG), so runs on different commits read the same data.
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    if spec.layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {spec.layout}. Available: {', '.join(LAYOUTS)}")
+    unknown = [name for name in spec.agents if name not in _EVENT_BUILDERS]
+    if unknown or not spec.agents:
+        raise ValueError(f"Unknown agents: {', '.join(unknown) or '(none)'}")
+    if spec.days < 1 or spec.sessions_per_day < 1 or spec.depth < 0 or spec.fanout < 0:
+        raise ValueError("days and sessions_per_day must be positive, depth and fanout not negative")
+
+    rng = random.Random(spec.seed)
+    tree = GeneratedTree(logs_dir=logs_dir, spec=spec)
+    end = date.fromisoformat(spec.end_date) if spec.end_date else date.today()
+
+    for day in range(spec.days):
+        date_dir = logs_dir / (end - timedelta(days=day)).isoformat()
+        remaining = spec.sessions_per_day
+        while remaining > 0:
+            remaining -= _write_tree(tree, rng, date_dir, None, 0, remaining)
+
+    return tree
+
+
+def generate_session(logs_dir: Path, agent: str, events: int, seed: int = 0) -> Path:
+    """Write a single root session log with `events` agent events, dated today.
+
+    Raises:
+        ValueError: If the agent has no event format
+    """
+    if agent not in _EVENT_BUILDERS:
+        raise ValueError(f"Unknown agent: {agent}. Available: {', '.join(_EVENT_BUILDERS)}")
+
+    rng = random.Random(seed)
+    session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    path = logs_dir / date.today().isoformat() / f"{session_id}.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in _session_entries(rng, agent, session_id, None, events):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return path
+
+
+def _write_tree(
+    tree: GeneratedTree,
+    rng: random.Random,
+    directory: Path,
+    parent_id: str | None,
+    level: int,
+    budget: int,
+) -> int:
+    """Write one session and its subtree. Returns the number of sessions written."""
+    spec = tree.spec
+    session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    n_children = rng.randint(0, spec.fanout) if level < spec.depth else 0
+    n_children = min(n_children, budget - 1)
+
+    as_dir = spec.layout == "dir" or (spec.layout == "nested" and n_children > 0)
+    session_dir = directory / session_id if as_dir else directory
+    child_dir = session_dir if spec.layout != "flat" else directory
+    path = session_dir / f"{session_id}.jsonl"
+
+    entries = _session_entries(rng, rng.choice(spec.agents), session_id, parent_id, spec.events)
+    data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+    tree.paths[session_id] = path
+    tree.bytes += len(data)
+    if parent_id is None:
+        tree.roots.append(session_id)
+    else:
+        tree.parents[session_id] = parent_id
+
+    written = 1
+    for _ in range(n_children):
+        if written >= budget:
+            break
+        written += _write_tree(tree, rng, child_dir, session_id, level + 1, budget - written)
+    return written
+
+
+def _session_entries(
+    rng: random.Random,
+    agent: str,
+    session_id: str,
+    parent_id: str | None,
+    n_events: int,
+) -> list[dict[str, Any]]:
+    """The entries of one log, in the order the runner writes them."""
+    model = get_default_model(agent).model_id
+    prompt = _text(rng, EVENT_SIZES["prompt"])
+    result = _text(rng, EVENT_SIZES["text"])
+    entries: list[dict[str, Any]] = [
+        {"type": "aiwr_start", "prompt": prompt, "agent": agent, "model": model},
+    ]
+    if parent_id is not None:
+        entries.append({"type": "aiwr_meta", "parent_id": parent_id})
+
+    events = _EVENT_BUILDERS[agent](rng, session_id, prompt, result, n_events)
+    entries.extend(events)
+
+    size = sum(len(json.dumps(event, ensure_ascii=False)) + 1 for event in events)
+    entries.append({
+        "type": "aiwr_summary",
+        "agent": agent,
+        "model": model,
+        "prompt": prompt,
+        "status": "completed",
+        "result": result,
+        "entries": len(entries),
+        "bytes": size,
+        "duration": round(rng.uniform(5, 600), 3),
+        "exit_code": 0,
+    })
+    return entries
+
+
+def _text(rng: random.Random, mean: int) -> str:
+    """Word soup of a log-normally distributed length around `mean` characters."""
+    length = min(int(rng.lognormvariate(math.log(mean), 0.8)), MAX_EVENT_SIZE)
+    return " ".join(rng.choices(_WORDS, k=max(length // 6, 1)))
+
+
+def _tool_call(rng: random.Random) -> tuple[str, str, str]:
+    return rng.choice(_TOOLS), _text(rng, EVENT_SIZES["tool_input"]), _text(rng, EVENT_SIZES["tool_result"])
+
+
+def _claude_events(rng: random.Random, session_id: str, prompt: str, result: str, n: int) -> list[dict]:
+    events: list[dict] = [
+        {"type": "system", "subtype": "init", "session_id": session_id, "tools": list(_TOOLS)},
+        {"type": "user", "message": {"role": "user", "content": prompt}, "session_id": session_id},
+    ]
+    while len(events) < n - 1:
+        name, tool_input, output = _tool_call(rng)
+        events.append({
+            "type": "assistant",
+            "message": {"content": [
+                {"type": "text", "text": _text(rng, EVENT_SIZES["text"])},
+                {"type": "tool_use", "name": name, "input": {"command": tool_input}},
+            ]},
+            "session_id": session_id,
+        })
+        events.append({
+            "type": "user",
+            "message": {"content": [{"type": "tool_result", "content": output}]},
+            "session_id": session_id,
+        })
+    events.append({"type": "result", "subtype": "success", "result": result, "session_id": session_id})
+    return events
+
+
+def _gemini_events(rng: random.Random, session_id: str, prompt: str, result: str, n: int) -> list[dict]:
+    events: list[dict] = [
+        {"type": "init", "session_id": session_id, "model": "gemini"},
+        {"type": "message", "role": "user", "content": prompt},
+    ]
+    while len(events) < n - 2:
+        name, tool_input, output = _tool_call(rng)
+        events.append({"type": "tool_use", "tool_name": name, "parameters": {"command": tool_input}})
+        events.append({"type": "tool_result", "output": output})
+    events.append({"type": "message", "role": "assistant", "content": result, "delta": True})
+    events.append({"type": "result", "status": "success"})
+    return events
+
+
+def _codex_events(rng: random.Random, session_id: str, prompt: str, result: str, n: int) -> list[dict]:
+    events: list[dict] = [{"type": "thread.started", "thread_id": session_id}]
+    while len(events) < n - 2:
+        _, tool_input, output = _tool_call(rng)
+        events.append({
+            "type": "item.completed",
+            "item": {"type": "command_execution", "command": tool_input, "aggregated_output": output},
+        })
+    events.append({"type": "item.completed", "item": {"type": "agent_message", "text": result}})
+    events.append({"type": "turn.completed", "usage": {}})
+    return events
+
+
+def _opencode_events(rng: random.Random, session_id: str, prompt: str, result: str, n: int) -> list[dict]:
+    events: list[dict] = [{"type": "step_start", "sessionID": session_id}]
+    while len(events) < n - 2:
+        name, tool_input, output = _tool_call(rng)
+        events.append({
+            "type": "tool_use",
+            "sessionID": session_id,
+            "part": {"tool": name, "state": {"input": {"command": tool_input}, "output": output}},
+        })
+    events.append({"type": "text", "sessionID": session_id, "part": {"text": result}})
+    events.append({"type": "step_finish", "sessionID": session_id, "part": {"reason": "stop"}})
+    return events
+
+
+_EVENT_BUILDERS: dict[str, Callable[[random.Random, str, str, str, int], list[dict]]] = {
+    "claude": _claude_events,
+    "gemini": _gemini_events,
+    "codex": _codex_events,
+    "opencode": _opencode_events,
+}
@@ -0,0 +1,90 @@
+"""Runner throughput - a long session replayed through the real run loop."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+from ..agents import AGENTS, get_agent
+from ..agents.base import EVENT_ROLES
+from ..event import parse_log_bytes
+from ..logger import Logger
+from ..replay import load_recording
+from ..runner import Runner
+from .generate import generate_session
+from .suite import run_metadata, time_calls
+
+DEFAULT_EVENTS = 10000
+DEFAULT_RUNS = 3
+
+REPLAY_STAGES = ("emitter", "parse", "log_write", "runner")
+
+
+def run_replay_bench(
+    workdir: Path,
+    agent_name: str = "claude",
+    events: int = DEFAULT_EVENTS,
+    runs: int = DEFAULT_RUNS,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Time a replayed session stage by stage.
+
+    - emitter: the replay emitter alone, output discarded (the floor)
+    - parse: framing and classification of every event, in process
+    - log_write: writing every event to a log, in process
+    - runner: a full replay run - subprocess, parsing, logging, catalog
+
+    Each stage runs `runs` times; records carry events per second of the
+    median run. The runner's own cost per event is runner minus emitter.
+    """
+    log = log or (lambda message: None)
+    logs_dir = workdir / "replay" / agent_name / ".aiwr" / "logs"
+    path = generate_session(logs_dir, agent_name, events)
+    recording = load_recording(path)
+    size = sum(len(raw) + 1 for raw in recording.events)
+    log(f"replay: {len(recording.events)} {agent_name} events, {size} bytes")
+
+    agent = AGENTS[agent_name]
+    out_path = workdir / "replay" / "log_write.jsonl"
+
+    def emitter() -> None:
+        subprocess.run(
+            [sys.executable, "-m", "aiwr.replay", str(path)],
+            stdout=subprocess.DEVNULL,
+            check=True,
+            env={**os.environ, "AIWR_LOG_DIR": str(logs_dir)},
+        )
+
+    def parse() -> None:
+        for raw in recording.events:
+            agent.classify(parse_log_bytes(raw), EVENT_ROLES)
+
+    def log_write() -> None:
+        logger = Logger(out_path, streaming=True)
+        for raw in recording.events:
+            logger.append(parse_log_bytes(raw))
+        logger.save()
+        out_path.unlink()
+
+    def runner() -> None:
+        Runner(get_agent("replay"), str(path), emit=lambda data: None).run()
+
+    stages = {"emitter": emitter, "parse": parse, "log_write": log_write, "runner": runner}
+    results = []
+    previous = os.environ.get("AIWR_LOG_DIR")
+    os.environ["AIWR_LOG_DIR"] = str(logs_dir)
+    try:
+        for stage in REPLAY_STAGES:
+            record = {"events": len(recording.events), "op": f"replay_{stage}", **time_calls([stages[stage]] * runs)}
+            record["events_per_sec"] = round(len(recording.events) / record["median"]) if record["median"] else None
+            results.append(record)
+            log(f"replay: {stage} median {record['median'] * 1000:.1f}ms ({record['events_per_sec']} events/s)")
+    finally:
+        if previous is None:
+            os.environ.pop("AIWR_LOG_DIR", None)
+        else:
+            os.environ["AIWR_LOG_DIR"] = previous
+
+    meta = run_metadata({"agent": agent_name, "events": events, "bytes": size, "runs": runs})
+    return {"meta": meta, "results": results}
@@ -0,0 +1,99 @@
+"""CLI startup - wall time and imports of short aiwr commands.
+
+Every nested session starts `aiwr` again, so the commands that don't
+run an agent must stay cheap: they must not import the run loop, the
+agents or the plugin metadata scan.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+from .generate import TreeSpec
+from .suite import prepare_tree, run_metadata, time_calls
+
+DEFAULT_RUNS = 20
+DEFAULT_SESSIONS = 100  # Sessions in the tree --list reads
+
+STARTUP_COMMANDS: dict[str, tuple[str, ...]] = {
+    "version": ("--version",),
+    "list": ("--list",),
+}
+
+# Modules the startup commands must not import
+STARTUP_FORBIDDEN = (
+    "asyncio",
+    "importlib.metadata",
+    "aiwr.runner",
+    "aiwr.batch",
+    "aiwr.fanout",
+    "aiwr.search",
+    "aiwr.agents.claude",
+    "aiwr.agents.gemini",
+    "aiwr.agents.codex",
+    "aiwr.agents.opencode",
+    "aiwr.agents.replay",
+)
+
+_MAIN = "import sys; from aiwr.cli import main; sys.exit(main())"
+
+
+def run_startup_bench(
+    workdir: Path,
+    runs: int = DEFAULT_RUNS,
+    sessions: int = DEFAULT_SESSIONS,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Time each startup command in fresh interpreters.
+
+    The bare interpreter is timed too (`interpreter`) - aiwr's share is
+    the difference. Each record also lists the modules the command
+    imported, from one extra run under `-X importtime`, and the
+    forbidden ones among them (`violations`).
+    """
+    log = log or (lambda message: None)
+    tree = prepare_tree(workdir / "startup", TreeSpec(sessions_per_day=sessions))
+    env = {**os.environ, "AIWR_LOG_DIR": str(tree.logs_dir)}
+
+    results = [{"op": "interpreter", **time_calls([lambda: _run(["-c", "pass"], env)] * runs)}]
+    for name, args in STARTUP_COMMANDS.items():
+        record = {
+            "sessions": len(tree.paths),
+            "op": f"startup_{name}",
+            **time_calls([lambda args=args: _run(["-c", _MAIN, *args], env)] * runs),
+        }
+        modules = imported_modules(args, env)
+        record["modules"] = len(modules)
+        record["import_us"] = modules.get("aiwr.cli")
+        record["violations"] = [module for module in STARTUP_FORBIDDEN if module in modules]
+        results.append(record)
+        log(f"startup {name}: median {record['median'] * 1000:.1f}ms, {len(modules)} modules")
+
+    meta = run_metadata({"runs": runs, "sessions": sessions, "forbidden": list(STARTUP_FORBIDDEN)})
+    return {"meta": meta, "results": results}
+
+
+def imported_modules(args: tuple[str, ...], env: dict[str, str]) -> dict[str, int]:
+    """Modules an aiwr command imports, with their cumulative import time (us)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _MAIN, *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # Column header
+        modules[fields[2].strip()] = int(fields[1])
+    return modules
+
+
+def _run(args: list[str], env: dict[str, str]) -> None:
+    subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL, check=True, env=env)
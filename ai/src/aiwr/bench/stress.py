@@ -0,0 +1,198 @@
+"""Layout stress - hundreds of concurrent children of a few parent sessions.
+
+Children are separate processes released together, so they race on
+turning each parent's log into a directory. Half of them find the parent
+through the catalog (`--parent`), half through its directory
+(AIWR_SESSION_DIR). The parents keep streaming their own logs and close
+them halfway through. Afterwards every log must be in place exactly
+once, with no entry lost.
+"""
+
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+from ..logger import Logger
+from ..session import get_log_path, get_today_dir, record_session, session_dir_of
+from ..storage import COMPRESSIONS
+from .suite import run_metadata
+
+DEFAULT_CHILDREN = 200
+DEFAULT_PARENTS = 4
+CHILD_EVENTS = 20  # Events each child logs after its path is resolved
+BARRIER_TIMEOUT = 120  # Seconds children wait for each other to start
+
+
+def run_stress_bench(
+    workdir: Path,
+    children: int = DEFAULT_CHILDREN,
+    parents: int = DEFAULT_PARENTS,
+    compression: str = "none",
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Run the scenario in a fresh logs tree; the record lists what went wrong."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}. Available: {', '.join(COMPRESSIONS)}")
+
+    log = log or (lambda message: None)
+    logs_dir = (workdir / "stress" / "logs").resolve()
+    shutil.rmtree(logs_dir.parent, ignore_errors=True)
+
+    previous = os.environ.get("AIWR_LOG_DIR")
+    os.environ["AIWR_LOG_DIR"] = str(logs_dir)  # Inherited by the children
+    try:
+        record = _run(logs_dir, children, parents, compression, log)
+    finally:
+        if previous is None:
+            os.environ.pop("AIWR_LOG_DIR", None)
+        else:
+            os.environ["AIWR_LOG_DIR"] = previous
+
+    meta = run_metadata({"children": children, "parents": parents, "compression": compression})
+    return {"meta": meta, "results": [record]}
+
+
+def _run(
+    logs_dir: Path,
+    children: int,
+    parents: int,
+    compression: str,
+    log: Callable[[str], None],
+) -> dict[str, Any]:
+    # Parents: running sessions, log open, catalogued - as Runner leaves them
+    loggers = {}
+    for _ in range(parents):
+        parent_id = str(uuid.uuid4())
+        logger = Logger(streaming=True, compression=compression)
+        logger.append({"type": "aiwr_start", "prompt": "stress parent", "agent": "stress"})
+        path = get_log_path(parent_id)
+        logger.set_log_path(path)
+        record_session(parent_id, path, agent="stress", status="running")
+        loggers[parent_id] = logger
+
+    # Children start from a preloaded fork server where there is one
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+    else:
+        context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(children)
+    plan = []
+    for index in range(children):
+        parent_id = list(loggers)[index % parents]
+        parent_dir = session_dir_of(get_today_dir() / f"{parent_id}.jsonl") if index % 2 else None
+        plan.append((str(uuid.uuid4()), parent_id, parent_dir))
+
+    processes = [
+        context.Process(target=_child, args=(child_id, parent_id, parent_dir, compression, barrier))
+        for child_id, parent_id, parent_dir in plan
+    ]
+    log(f"stress: starting {children} children of {parents} parents")
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    # Parents write while children run and close when half of them are done
+    parent_entries = dict.fromkeys(loggers, 1)
+    closed: set[str] = set()
+    while any(process.is_alive() for process in processes):
+        halfway = sum(not process.is_alive() for process in processes) * 2 >= children
+        for parent_id, logger in loggers.items():
+            if parent_id in closed:
+                continue
+            if halfway:
+                logger.save()
+                closed.add(parent_id)
+            else:
+                logger.append({"type": "stress_event", "n": parent_entries[parent_id]})
+                parent_entries[parent_id] += 1
+        time.sleep(0.001)
+
+    for process in processes:
+        process.join()
+    for parent_id, logger in loggers.items():
+        if parent_id not in closed:
+            logger.save()
+    seconds = time.perf_counter() - started
+
+    errors = [
+        f"{child_id}: child exit code {process.exitcode}"
+        for (child_id, _, _), process in zip(plan, processes)
+        if process.exitcode != 0
+    ]
+    errors.extend(_check_tree(logs_dir, parent_entries, plan))
+    log(f"stress: {seconds:.2f}s, {len(errors)} errors")
+    return {
+        "op": "stress_layout",
+        "children": children,
+        "parents": parents,
+        "seconds": round(seconds, 3),
+        "errors": errors,
+    }
+
+
+def _child(
+    child_id: str,
+    parent_id: str,
+    parent_dir: Path | None,
+    compression: str,
+    barrier: Any,
+) -> None:
+    """One nested session: resolve the path under the parent, stream a log, close it."""
+    logger = Logger(streaming=True, compression=compression)
+    logger.append({"type": "aiwr_start", "prompt": "stress child", "agent": "stress"})
+    logger.append({"type": "aiwr_meta", "parent_id": parent_id})
+    barrier.wait(BARRIER_TIMEOUT)
+
+    path = get_log_path(child_id, parent_id, parent_dir)
+    logger.set_log_path(path)
+    record_session(child_id, path, parent_id=parent_id, agent="stress", status="running")
+    for n in range(CHILD_EVENTS):
+        logger.append({"type": "stress_event", "n": n})
+    saved = logger.save()
+    record_session(child_id, saved, parent_id=parent_id, status="completed")
+
+
+def _check_tree(
+    logs_dir: Path,
+    parent_entries: dict[str, int],
+    plan: list[tuple[str, str, Path | None]],
+) -> list[str]:
+    """Every log exactly once, children in their parent's directory, no entry lost."""
+    from ..catalog import Catalog
+
+    errors = []
+    found: dict[str, list[Path]] = {}
+    for path in logs_dir.rglob("*"):
+        if path.name.endswith(".jsonl") and path.is_file():
+            found.setdefault(path.stem, []).append(path)
+        elif path.name.endswith(".jsonl"):
+            errors.append(f"directory named like a log: {path}")
+        elif path.suffix == ".tmp":
+            errors.append(f"leftover temp file: {path}")
+
+    catalog = Catalog(logs_dir)
+    expected = [(parent_id, None, entries) for parent_id, entries in parent_entries.items()]
+    expected += [(child_id, parent_id, CHILD_EVENTS + 2) for child_id, parent_id, _ in plan]
+    for session_id, parent_id, entries in expected:
+        paths = found.get(session_id, [])
+        if len(paths) != 1:
+            errors.append(f"{session_id}: {len(paths)} log files")
+            continue
+
+        path = paths[0]
+        owner = parent_id or session_id
+        if path.parent.name != owner:
+            errors.append(f"{session_id}: not in {owner}/ - {path.relative_to(logs_dir)}")
+        count = len(Logger.load(path))
+        if count != entries:
+            errors.append(f"{session_id}: {count} entries, expected {entries}")
+        if catalog.find_path(session_id) != path:
+            errors.append(f"{session_id}: catalog points at {catalog.find_path(session_id)}")
+
+    catalog.close()
+    return errors
@@ -0,0 +1,212 @@
+"""Storage benchmarks - time session lookups and reads on generated trees."""
+
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from .. import __version__
+from ..catalog import rebuild_catalog
+from ..logger import Logger
+from ..resume import build_resume_tree_prompt
+from ..session import find_children, find_session_path
+from ..stats import collect_stats
+from ..tree import list_all_sessions
+from .generate import GeneratedTree, TreeSpec, generate_tree
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_SAMPLES = 20  # Calls per single-session operation
+DEFAULT_REPEAT = 3  # Calls per whole-tree operation
+MANIFEST_FILE = "manifest.json"
+
+OPERATIONS = (
+    "catalog_rebuild",
+    "find_session_path",
+    "find_children",
+    "list_all_sessions",
+    "build_resume_tree_prompt",
+    "logger_load",
+    "collect_stats",
+)
+
+
+def prepare_tree(workdir: Path, spec: TreeSpec) -> GeneratedTree:
+    """Return the tree of `spec` under `workdir`, generating it if needed.
+
+    A tree generated earlier with the same spec is reused, so comparing
+    commits doesn't pay for generation twice. Derived files (catalog,
+    context cache) are dropped either way - every run starts cold.
+    """
+    logs_dir = workdir / ".aiwr" / "logs"
+    manifest_path = workdir / MANIFEST_FILE
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            tree = GeneratedTree.from_manifest(logs_dir, json.load(f))
+        if tree.spec == spec:
+            for derived in logs_dir.glob("*.sqlite3*"):
+                derived.unlink()
+            return tree
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if workdir.exists():
+        shutil.rmtree(workdir)
+    tree = generate_tree(logs_dir, spec)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(tree.to_manifest(), f)
+    return tree
+
+
+def run_suite(
+    workdir: Path,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    spec: TreeSpec | None = None,
+    samples: int = DEFAULT_SAMPLES,
+    repeat: int = DEFAULT_REPEAT,
+    operations: tuple[str, ...] = OPERATIONS,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """Benchmark every operation at every tree size.
+
+    `spec` sets the tree shape; its sessions_per_day is replaced so that
+    each tree has `size` sessions spread over `spec.days` days. Returns
+    the report: run metadata plus one result record per (size, operation).
+    """
+    spec = spec or TreeSpec()
+    log = log or (lambda message: None)
+    results = []
+
+    for size in sizes:
+        size_spec = replace(spec, sessions_per_day=max(size // spec.days, 1))
+        log(f"{size} sessions: preparing tree")
+        started = time.perf_counter()
+        tree = prepare_tree(workdir / str(size), size_spec)
+        log(f"{size} sessions: {len(tree.paths)} logs, {tree.bytes} bytes ({time.perf_counter() - started:.1f}s)")
+
+        previous = os.environ.get("AIWR_LOG_DIR")
+        os.environ["AIWR_LOG_DIR"] = str(tree.logs_dir)
+        try:
+            for operation in operations:
+                calls = _calls(operation, tree, random.Random(size), samples, repeat)
+                if not calls:
+                    continue
+                record = {"sessions": len(tree.paths), "op": operation, **time_calls(calls)}
+                results.append(record)
+                log(f"{size} sessions: {operation} median {record['median'] * 1000:.2f}ms")
+        finally:
+            if previous is None:
+                os.environ.pop("AIWR_LOG_DIR", None)
+            else:
+                os.environ["AIWR_LOG_DIR"] = previous
+
+    spec_data = asdict(spec)
+    spec_data.pop("sessions_per_day")
+    meta = run_metadata({"spec": spec_data, "samples": samples, "repeat": repeat})
+    return {"meta": meta, "results": results}
+
+
+def compare_reports(report: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Annotate results with the baseline's median and the change ratio."""
+    medians = {(r.get("sessions"), r.get("events"), r["op"]): r["median"] for r in baseline.get("results", [])}
+    for record in report["results"]:
+        base = medians.get((record.get("sessions"), record.get("events"), record["op"]))
+        if base:
+            record["baseline_median"] = base
+            record["ratio"] = round(record["median"] / base, 3)
+
+
+def _calls(
+    operation: str,
+    tree: GeneratedTree,
+    rng: random.Random,
+    samples: int,
+    repeat: int,
+) -> list[Callable[[], Any]]:
+    """The calls that make up one operation's measurement."""
+    session_ids = list(tree.paths)
+    parents = list(tree.children)
+    tree_roots = [sid for sid in tree.roots if sid in tree.children] or tree.roots
+
+    def sample(ids: list[str]) -> list[str]:
+        return rng.sample(ids, min(samples, len(ids))) if ids else []
+
+    if operation == "catalog_rebuild":
+        return [lambda: rebuild_catalog(tree.logs_dir)]
+    if operation == "find_session_path":
+        return [lambda sid=sid: find_session_path(sid) for sid in sample(session_ids)]
+    if operation == "find_children":
+        return [lambda sid=sid: find_children(sid) for sid in sample(parents)]
+    if operation == "list_all_sessions":
+        return [list_all_sessions] * repeat
+    if operation == "build_resume_tree_prompt":
+        return [lambda sid=sid: build_resume_tree_prompt(sid, "go") for sid in sample(tree_roots)]
+    if operation == "logger_load":
+        return [lambda sid=sid: Logger.load(tree.paths[sid]) for sid in sample(session_ids)]
+    if operation == "collect_stats":
+        # First call fills the per-day cache, the rest read it
+        return [lambda: collect_stats(("agent", "depth"))] * repeat
+    raise ValueError(f"Unknown operation: {operation}. Available: {', '.join(OPERATIONS)}")
+
+
+def time_calls(calls: list[Callable[[], Any]]) -> dict[str, Any]:
+    """Run the calls in order; the first one is reported apart as the cold call."""
+    times = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - started)
+
+    warm = times[1:] or times
+    return {
+        "calls": len(times),
+        "first": round(times[0], 6),
+        "min": round(min(warm), 6),
+        "median": round(statistics.median(warm), 6),
+        "mean": round(statistics.fmean(warm), 6),
+        "max": round(max(warm), 6),
+    }
+
+
+def run_metadata(params: dict[str, Any]) -> dict[str, Any]:
+    """Report metadata: what was measured, on which commit and machine."""
+    return {
+        "aiwr_version": __version__,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **params,
+    }
+
+
+def _git_commit() -> str | None:
+    """Commit of the aiwr checkout being measured, if it is a git tree."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def print_report(report: dict[str, Any], output: Path | None) -> None:
+    """Write the report as JSON to a file, or to stdout."""
+    data = json.dumps(report, indent=2)
+    if output is None:
+        sys.stdout.write(data + "\n")
+    else:
+        output.write_text(data + "\n", encoding="utf-8")
@@ -0,0 +1,438 @@
+"""Session catalog - SQLite index over the JSONL logs tree."""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .logger import Logger
+from .storage import (
+    ACTIVE_WINDOW,
+    archive_date,
+    day_signature,
+    day_sources,
+    follow_conversion,
+    log_exists,
+    log_mtime,
+    read_archive_index,
+)
+
+CATALOG_FILE = "catalog.sqlite3"
+SCHEMA_VERSION = "2"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    date TEXT NOT NULL,
+    parent_id TEXT,
+    agent TEXT,
+    model TEXT,
+    status TEXT,
+    started_at REAL,
+    ended_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_parent ON sessions(parent_id);
+CREATE INDEX IF NOT EXISTS sessions_date ON sessions(date);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    signature TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class CatalogEntry:
+    """A single catalog row."""
+
+    session_id: str
+    path: Path
+    date: str
+    parent_id: str | None
+    agent: str | None
+    model: str | None
+    status: str | None
+    started_at: float | None
+    ended_at: float | None
+
+
+class Catalog:
+    """Indexed view of all sessions under a logs directory.
+
+    Paths are stored relative to the logs directory, so the whole tree
+    can be moved without invalidating the catalog. A row still marked
+    running whose log has no aiwr_summary trailer and hasn't been written
+    to for ACTIVE_WINDOW seconds was killed (SIGKILL, OOM): it is read,
+    and rescanned, as interrupted.
+
+    Each date directory or day archive has the mtime and signature
+    (`day_signature()`) it had when it was last scanned; update() rescans
+    only the days whose signature changed, and signs only those whose own
+    mtime changed. Writes re-sign their day, so a process's own changes
+    don't make the others rescan it.
+    """
+
+    def __init__(self, logs_dir: Path):
+        self.logs_dir = logs_dir
+        self.db_path = logs_dir / CATALOG_FILE
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._conn.close()
+
+    def upsert(
+        self,
+        session_id: str,
+        path: Path,
+        parent_id: str | None = None,
+        agent: str | None = None,
+        model: str | None = None,
+        status: str | None = None,
+        started_at: float | None = None,
+        ended_at: float | None = None,
+    ) -> None:
+        """Insert or update a session row.
+
+        None values never overwrite known ones, so a resumed session keeps
+        its original parent, agent and start time. A provisional parent ID
+        is stored as the session it names.
+        """
+        rel_path = self._relative(path)
+        if parent_id:
+            parent_id = self.resolve(parent_id)
+        self._conn.execute(
+            """
+            INSERT INTO sessions
+                (session_id, path, date, parent_id, agent, model, status, started_at, ended_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                path = excluded.path,
+                date = excluded.date,
+                parent_id = COALESCE(sessions.parent_id, excluded.parent_id),
+                agent = COALESCE(sessions.agent, excluded.agent),
+                model = COALESCE(excluded.model, sessions.model),
+                status = COALESCE(excluded.status, sessions.status),
+                started_at = COALESCE(sessions.started_at, excluded.started_at),
+                ended_at = COALESCE(excluded.ended_at, sessions.ended_at)
+            """,
+            (
+                session_id, rel_path, _date_of(rel_path), parent_id,
+                agent, model, status, started_at, ended_at,
+            ),
+        )
+        self._sign_day(rel_path)
+
+    def move(self, session_id: str, new_path: Path) -> None:
+        """Point an existing session at its new file location."""
+        rel_path = self._relative(new_path)
+        self._conn.execute(
+            "UPDATE sessions SET path = ?, date = ? WHERE session_id = ?",
+            (rel_path, _date_of(rel_path), session_id),
+        )
+        self._sign_day(rel_path)
+
+    def remove(self, session_id: str) -> None:
+        """Drop a session from the catalog."""
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def add_alias(self, alias: str, session_id: str) -> None:
+        """Record that a provisional ID (exported to children) names a session.
+
+        Children catalogued under the alias before it was known are
+        repointed. Aliases aren't in the logs, so rebuild() keeps them.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aliases VALUES (?, ?)", (alias, session_id)
+            )
+            self._conn.execute(
+                "UPDATE sessions SET parent_id = ? WHERE parent_id = ?", (session_id, alias)
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def resolve(self, session_id: str) -> str:
+        """Return the session an alias names, or the ID itself."""
+        row = self._conn.execute(
+            "SELECT session_id FROM aliases WHERE alias = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else session_id
+
+    def get(self, session_id: str) -> CatalogEntry | None:
+        """Look up a single session by ID."""
+        row = self._conn.execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return self._to_entry(row) if row else None
+
+    def find_path(self, session_id: str) -> Path | None:
+        """Return the absolute path of a session log, if catalogued."""
+        row = self._conn.execute(
+            "SELECT path FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return self.logs_dir / row[0] if row else None
+
+    def children(self, parent_id: str) -> list[str]:
+        """Return IDs of direct children of a session."""
+        rows = self._conn.execute(
+            "SELECT session_id FROM sessions WHERE parent_id = ? ORDER BY path",
+            (parent_id,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def entries(self) -> list[CatalogEntry]:
+        """Return all sessions, newest date first."""
+        rows = self._conn.execute(
+            "SELECT * FROM sessions ORDER BY date DESC, path"
+        ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def is_outdated(self) -> bool:
+        """Check whether the catalog was written by another schema version."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        return row is None or row[0] != SCHEMA_VERSION
+
+    def update(self) -> int:
+        """Catch up with the logs tree; returns the number of sessions rescanned.
+
+        A day whose own mtime is unchanged isn't walked; one whose
+        signature is unchanged isn't rescanned. The rows of removed days
+        are dropped.
+        """
+        known = {day: (mtime, signature) for day, mtime, signature in self._conn.execute("SELECT * FROM days")}
+
+        scanned = 0
+        for source in day_sources(self.logs_dir):
+            try:
+                mtime = source.stat().st_mtime_ns
+                last = known.pop(source.name, None)
+                if last is not None and last[0] == mtime:
+                    continue
+                # Signed before scanning - a change during the scan is picked up next time
+                signature = day_signature(source)
+            except FileNotFoundError:
+                continue  # Removed since listed - its rows are dropped below
+            if last is None or last[1] != signature:
+                scanned += self._store(_scan_paths(source), day=source.name)
+            self._conn.execute("INSERT OR REPLACE INTO days VALUES (?, ?, ?)", (source.name, mtime, signature))
+
+        for day in known:
+            self._store([], day=day)
+            self._conn.execute("DELETE FROM days WHERE day = ?", (day,))
+        return scanned
+
+    def rebuild(self) -> int:
+        """Regenerate the catalog from the JSONL files on disk.
+
+        Sessions catalogued by other processes while the tree was being
+        scanned are kept if their logs exist (the scan may have missed
+        them), and so is the new location of a log moved meanwhile.
+
+        Returns the number of sessions indexed.
+        """
+        signatures = []
+        paths = []
+        for source in day_sources(self.logs_dir):
+            try:
+                signatures.append((source.name, source.stat().st_mtime_ns, day_signature(source)))
+                paths.extend(_scan_paths(source))
+            except FileNotFoundError:
+                continue  # Removed since listed
+
+        count = self._store(paths)
+        self._conn.execute("DELETE FROM days")
+        self._conn.executemany("INSERT INTO days VALUES (?, ?, ?)", signatures)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (SCHEMA_VERSION,)
+        )
+        return count
+
+    def _store(self, paths: list[Path], day: str | None = None) -> int:
+        """Replace the rows of one day (or of the whole tree) with the sessions of `paths`.
+
+        Returns the number of sessions stored.
+        """
+        from .resume import extract_session_info
+
+        rows = []
+        for jsonl_path in paths:
+            try:
+                rows.append(_scan_session(jsonl_path, extract_session_info))
+            except (OSError, ValueError):
+                continue  # Unreadable or corrupt log - leave it out
+
+        if day is None:
+            where, params = "", ()
+        else:
+            # The date column doesn't tell a date directory from its archive
+            where, params = "WHERE date = ? AND substr(path, 1, ?) = ?", (
+                archive_date(day), len(day) + 1, day + "/",
+            )
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {row[0]: row for row in self._conn.execute(f"SELECT * FROM sessions {where}", params)}
+            self._conn.execute(f"DELETE FROM sessions {where}", params)
+            for session_id, path, parent_id, agent, model, status, ended_at in rows:
+                rel_path = self._relative(path)
+                if parent_id:
+                    parent_id = self.resolve(parent_id)  # Logged under a provisional ID
+                row = known.pop(session_id, None)
+                if row is not None and row[1] != rel_path and not log_exists(path):
+                    rel_path = row[1]
+                if row is not None and row[6] == "running":
+                    status = _running_status(path)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        session_id, rel_path, _date_of(rel_path), parent_id,
+                        agent, model, status, row[7] if row else None, ended_at,
+                    ),
+                )
+            kept = 0
+            for session_id, rel_path, *fields in known.values():
+                path = follow_conversion(self.logs_dir / rel_path)
+                if log_exists(path):
+                    rel_path = self._relative(path)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (session_id, rel_path, _date_of(rel_path), *fields[1:]),
+                    )
+                    kept += 1
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        return len(rows) + kept
+
+    def _sign_day(self, rel_path: str) -> None:
+        """Record the current signature of a day this process just wrote to - if it was scanned."""
+        day = rel_path.split("/", 1)[0]
+        try:
+            mtime = (self.logs_dir / day).stat().st_mtime_ns
+            signature = day_signature(self.logs_dir / day)
+        except OSError:
+            return
+        self._conn.execute("UPDATE days SET mtime = ?, signature = ? WHERE day = ?", (mtime, signature, day))
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.logs_dir).as_posix()
+
+    def _to_entry(self, row: tuple) -> CatalogEntry:
+        session_id, path, date, parent_id, agent, model, status, started_at, ended_at = row
+        if status == "running":
+            status = _running_status(self.logs_dir / path)
+        return CatalogEntry(
+            session_id=session_id,
+            path=self.logs_dir / path,
+            date=date,
+            parent_id=parent_id,
+            agent=agent,
+            model=model,
+            status=status,
+            started_at=started_at,
+            ended_at=ended_at,
+        )
+
+
+def _scan_paths(source: Path) -> list[Path]:
+    """Session logs of a date directory or day archive."""
+    if source.is_dir():
+        return sorted(source.rglob("*.jsonl"))
+    return [source / member for member in sorted(read_archive_index(source))]
+
+
+def _scan_session(jsonl_path: Path, extract_session_info) -> tuple:
+    """Read catalog fields for one session from its JSONL header and trailer."""
+    info = extract_session_info(jsonl_path)
+    parent_id = None
+    model = None
+
+    for entry in Logger.read_header(jsonl_path):
+        entry_type = entry.get("type")
+        if entry_type == "aiwr_start":
+            model = entry.get("model")
+        elif entry_type == "aiwr_meta" and parent_id is None:
+            parent_id = entry.get("parent_id")
+
+    ended_at = log_mtime(jsonl_path)
+    return info.session_id, jsonl_path, parent_id, info.agent, model, info.status, ended_at
+
+
+def _running_status(path: Path) -> str:
+    """Status of a session catalogued as running, from its log.
+
+    The trailer's status once it has one; "interrupted" when the log has
+    none and hasn't been written to for ACTIVE_WINDOW seconds.
+    """
+    try:
+        summary = Logger.read_summary(path)
+        if summary is not None:
+            return summary.get("status") or "unknown"
+        if time.time() - log_mtime(path) > ACTIVE_WINDOW:
+            return "interrupted"
+    except (OSError, KeyError, ValueError):
+        pass  # Moved or removed meanwhile - leave it to the next scan
+    return "running"
+
+
+def _date_of(rel_path: str) -> str:
+    """Date of a session from its relative path - the date dir or day archive."""
+    return archive_date(rel_path.split("/", 1)[0])
+
+
+_catalogs: dict[Path, Catalog] = {}
+
+
+def open_catalog(logs_dir: Path) -> Catalog | None:
+    """Open (and if needed update) the catalog for a logs directory.
+
+    The catalog is opened once per process. It is rebuilt when it is
+    missing or from another schema version; otherwise the days changed
+    behind its back are rescanned. Returns None if the catalog can't be
+    used (e.g. a read-only logs dir); callers then fall back to scanning
+    the tree.
+    """
+    if logs_dir in _catalogs:
+        return _catalogs[logs_dir]
+
+    if not logs_dir.is_dir():
+        return None
+
+    try:
+        existed = (logs_dir / CATALOG_FILE).exists()
+        catalog = Catalog(logs_dir)
+        if not existed or catalog.is_outdated():
+            catalog.rebuild()
+        else:
+            catalog.update()
+    except (OSError, sqlite3.Error):
+        return None
+
+    _catalogs[logs_dir] = catalog
+    return catalog
+
+
+def rebuild_catalog(logs_dir: Path) -> int:
+    """Force a full rebuild of the catalog. Returns number of sessions."""
+    catalog = _catalogs.pop(logs_dir, None)
+    if catalog is None:
+        catalog = Catalog(logs_dir)
+    count = catalog.rebuild()
+    _catalogs[logs_dir] = catalog
+    return count
@@ -1,20 +1,28 @@
-"""CLI entry point for AIWR."""
+"""CLI entry point for AIWR.
+
+Command modules are imported by their handlers: nested sessions start
+`aiwr` once per child, so `--version` or `--list` must not pay for the
+runner (asyncio) or for agents they never use.
+"""
 
 import argparse
 import json
 import os
 import sys
+from pathlib import Path
 
 from . import __version__
-from .agents import get_agent, list_agents
-from .models import MODELS, get_default_model, merge_extra_args, resolve_model
-from .resume import build_resume_prompt, build_resume_tree_prompt, get_session_agent
-from .runner import Runner
-from .tree import format_session_list, list_all_sessions
+from .agents import BUILTIN_AGENTS
+from .paths import get_daemon_mode
+
 
+def main(argv: list[str] | None = None, forward: bool = True) -> int:
+    """Main entry point.
 
-def main() -> int:
-    """Main entry point."""
+    With `forward`, the command runs in the daemon serving the logs
+    directory when one is running (see daemon.py); the daemon's workers
+    call main() with forward=False.
+    """
     parser = argparse.ArgumentParser(
         prog="aiwr",
         description="Universal CLI wrapper for AI coding assistants with session logging",
@@ -36,14 +44,61 @@ def main() -> int:
     parser.add_argument(
         "--agent",
         type=str,
-        default=os.environ.get("AIWR_DEFAULT_AGENT", "claude"),
-        help=f"AI agent to use (default: claude). Available: {', '.join(list_agents())}",
+        help=f"AI agent to use (default: claude). Available: {', '.join(BUILTIN_AGENTS)}, plugins. "
+        "With --list: show only sessions of this agent",
     )
 
     parser.add_argument(
         "--parent",
         type=str,
-        help="Parent session ID for nested calls",
+        help="Parent session ID for nested calls (default: the session of the agent aiwr runs in)",
+    )
+
+    parser.add_argument(
+        "--fanout",
+        type=str,
+        metavar="AGENT[:MODEL],...",
+        help="Run the prompt against several agents/models concurrently",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each fan-out result as soon as it finishes",
+    )
+
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="FILE",
+        help="Run prompts from a JSONL file (one {\"prompt\", \"agent\"?, \"model\"?, \"args\"?} per line)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="With --batch: number of concurrent runs (default: 4)",
+    )
+
+    parser.add_argument(
+        "--agent-jobs",
+        type=str,
+        metavar="AGENT=N,...",
+        help="With --batch: per-agent concurrency caps, e.g. claude=2,codex=4",
+    )
+
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="With --batch: print results in completion order",
+    )
+
+    parser.add_argument(
+        "--progress",
+        type=Path,
+        metavar="FILE",
+        help="With --batch: progress file (default: FILE.progress)",
     )
 
     parser.add_argument(
@@ -60,6 +115,13 @@ def main() -> int:
         help="Resume a session tree by root ID",
     )
 
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        metavar="TOKENS",
+        help="With --resume/--resume-tree: size of the session context (default: 20000, 0: no limit)",
+    )
+
     parser.add_argument(
         "--session",
         type=str,
@@ -73,6 +135,102 @@ def main() -> int:
         help="List all sessions",
     )
 
+    parser.add_argument(
+        "--since",
+        type=str,
+        metavar="DATE",
+        help="With --list: only days from DATE on (YYYY-MM-DD, or Nd - N days ago)",
+    )
+
+    parser.add_argument(
+        "--until",
+        type=str,
+        metavar="DATE",
+        help="With --list: only days up to DATE (YYYY-MM-DD, or Nd - N days ago)",
+    )
+
+    parser.add_argument(
+        "--status",
+        type=str,
+        help="With --list: only sessions with this status (completed, interrupted, unknown, ...)",
+    )
+
+    parser.add_argument(
+        "--limit",
+        type=int,
+        metavar="N",
+        help="With --list: at most N root sessions; with --search: at most N results (default: 20)",
+    )
+
+    parser.add_argument(
+        "--roots-only",
+        action="store_true",
+        help="With --list: show root sessions without their children",
+    )
+
+    parser.add_argument(
+        "--search",
+        type=str,
+        metavar="QUERY",
+        help="Find sessions by words in their prompts, assistant messages and results",
+    )
+
+    parser.add_argument(
+        "--follow",
+        type=str,
+        metavar="SESSION_ID",
+        help="Stream new events of a session and its descendants until they finish",
+    )
+
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the session catalog from the JSONL logs",
+    )
+
+    parser.add_argument(
+        "--compact",
+        type=int,
+        metavar="DAYS",
+        help="Fold date directories older than DAYS days into per-day archives",
+    )
+
+    parser.add_argument(
+        "--gc",
+        nargs="?",
+        const="",
+        metavar="POLICY",
+        help="Delete old session trees by retention policy, e.g. 30d,2G,codex=7d (default: AIWR_RETENTION)",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --gc: show what would be deleted",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const="start",
+        choices=("start", "stop", "status"),
+        help="Serve aiwr commands for this logs directory from a warm process (default: start)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Show run counts, duration percentiles and failure rates across all sessions",
+    )
+
+    parser.add_argument(
+        "--by",
+        type=str,
+        default="agent",
+        metavar="KEY,...",
+        help="With --stats: group by agent, model, day and/or depth (default: agent)",
+    )
+
     parser.add_argument(
         "--model",
         nargs="?",
@@ -90,19 +248,58 @@ def main() -> int:
     parser.add_argument(
         "--json",
         action="store_true",
-        help="Output in JSON format (use with --model)",
+        help="Output in JSON format (use with --model, --stats, --search, --follow; --list: NDJSON)",
     )
 
     # Parse known args to handle -- separator
-    args, extra_args = parser.parse_known_args()
+    args, extra_args = parser.parse_known_args(argv)
 
     # Remove leading -- if present
     if extra_args and extra_args[0] == "--":
         extra_args = extra_args[1:]
 
+    # --agent filters --list only when given
+    list_agent = args.agent
+    if args.agent is None:
+        args.agent = os.environ.get("AIWR_DEFAULT_AGENT", "claude")
+
+    # Handle --daemon
+    if args.daemon is not None:
+        return handle_daemon(args.daemon)
+
+    # Run in the daemon when one is serving this logs directory
+    if forward:
+        code = forward_to_daemon(args, sys.argv[1:] if argv is None else argv)
+        if code is not None:
+            return code
+
     # Handle --list
     if args.list:
-        return handle_list()
+        return handle_list(args, list_agent)
+
+    # Handle --search
+    if args.search is not None:
+        return handle_search(args.search, args.limit, args.json)
+
+    # Handle --follow
+    if args.follow:
+        return handle_follow(args.follow, args.json)
+
+    # Handle --reindex
+    if args.reindex:
+        return handle_reindex()
+
+    # Handle --compact
+    if args.compact is not None:
+        return handle_compact(args.compact)
+
+    # Handle --gc
+    if args.gc is not None:
+        return handle_gc(args.gc or None, args.dry_run)
+
+    # Handle --stats
+    if args.stats:
+        return handle_stats(args.by, args.json)
 
     # Handle --model without value (show table or JSON)
     if args.model is True:
@@ -110,11 +307,25 @@ def main() -> int:
 
     # Handle --resume
     if args.resume:
-        return handle_resume(args.resume, args.prompt, extra_args, args.debug)
+        return handle_resume(
+            args.resume, args.prompt, args.agent, args.context_budget, extra_args, args.debug,
+        )
 
     # Handle --resume-tree
     if args.resume_tree:
-        return handle_resume_tree(args.resume_tree, args.prompt, extra_args, args.debug)
+        return handle_resume_tree(
+            args.resume_tree, args.prompt, args.agent, args.context_budget, extra_args, args.debug,
+        )
+
+    # Handle --fanout
+    if args.fanout:
+        if not args.prompt:
+            parser.error("--fanout requires a prompt")
+        return handle_fanout(args.fanout, args.prompt, args.parent, extra_args, args.stream, args.debug)
+
+    # Handle --batch
+    if args.batch:
+        return handle_batch(args, extra_args)
 
     # Handle regular prompt execution
     if args.prompt:
@@ -125,16 +336,214 @@ def main() -> int:
     return 1
 
 
-def handle_list() -> int:
-    """Handle --list command."""
-    sessions = list_all_sessions()
+def handle_daemon(action: str) -> int:
+    """Handle --daemon command."""
+    from .daemon import control, serve
+
+    try:
+        return serve() if action == "start" else control(action)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def forward_to_daemon(args: argparse.Namespace, argv: list[str]) -> int | None:
+    """Run the command line in the daemon; None when it must run here."""
+    if get_daemon_mode() == "off":
+        return None  # Before the import: the client stays as light as without a daemon
+
+    if args.list:
+        op = "list"
+    elif args.resume_tree:
+        op = "resume_tree"
+    elif args.resume:
+        op = "resume"
+    elif args.prompt or args.fanout or args.batch:
+        op = "run"
+    else:
+        return None  # Cheap or local commands (--stats has its own cache)
+
+    from .daemon import forward_command
+
+    try:
+        return forward_command(argv, op)
+    except OSError:
+        return None
+
+
+def handle_list(args: argparse.Namespace, agent: str | None = None) -> int:
+    """Handle --list command.
+
+    Each day is printed as soon as it is read, so the newest sessions
+    show up before older days are visited.
+    """
+    from .tree import (
+        ListFilter,
+        format_session_day,
+        format_session_records,
+        iter_session_days,
+        parse_list_date,
+    )
+
+    try:
+        if args.limit is not None and args.limit < 0:
+            raise ValueError("--limit can't be negative")
+        filters = ListFilter(
+            since=parse_list_date(args.since) if args.since else None,
+            until=parse_list_date(args.until) if args.until else None,
+            agent=agent,
+            status=args.status,
+            limit=args.limit,
+            roots_only=args.roots_only,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    found = False
+    try:
+        for date_str, sessions in iter_session_days(filters):
+            found = True
+            if args.json:
+                print(format_session_records(date_str, sessions), flush=True)
+            else:
+                print(format_session_day(date_str, sessions), flush=True)
+    except BrokenPipeError:
+        _drop_stdout()
+        return 0
 
-    if not sessions:
+    if not found and not args.json:
         print("No sessions found.")
+    return 0
+
+
+def handle_search(query: str, limit: int | None = None, as_json: bool = False) -> int:
+    """Handle --search command."""
+    from .search import DEFAULT_SEARCH_LIMIT, search_sessions
+
+    try:
+        if limit is not None and limit < 1:
+            raise ValueError("--limit must be at least 1")
+        hits = search_sessions(query, limit or DEFAULT_SEARCH_LIMIT)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if as_json:
+        lines = [json.dumps([hit.to_dict() for hit in hits], indent=2, ensure_ascii=False)]
+    elif not hits:
+        lines = ["No sessions found."]
+    else:
+        lines = [f"{hit.session_id}  {hit.date}  {hit.agent or '-'}\n    {hit.snippet}" for hit in hits]
+
+    try:
+        for line in lines:
+            print(line, flush=True)
+    except BrokenPipeError:
+        _drop_stdout()
+    return 0
+
+
+def handle_follow(session_id: str, as_json: bool = False) -> int:
+    """Handle --follow command."""
+    from .follow import follow_session
+
+    try:
+        return follow_session(session_id, lambda line: print(line, flush=True), as_json)
+    except BrokenPipeError:
+        _drop_stdout()
         return 0
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
 
-    output = format_session_list(sessions)
-    print(output)
+
+def _drop_stdout() -> None:
+    """Send further output to /dev/null once the reader has gone (`| head`),
+    so the exit-time flush doesn't fail again."""
+    try:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, ValueError, AttributeError):
+        pass
+
+
+def handle_reindex() -> int:
+    """Handle --reindex command."""
+    from .catalog import rebuild_catalog
+    from .session import get_logs_dir
+
+    logs_dir = get_logs_dir()
+    if not logs_dir.is_dir():
+        print("No sessions found.")
+        return 0
+
+    count = rebuild_catalog(logs_dir)
+    print(f"Indexed {count} sessions.")
+    return 0
+
+
+def handle_compact(days: int) -> int:
+    """Handle --compact command."""
+    from .compact import compact_logs
+
+    try:
+        archives = compact_logs(days)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for archive_path in archives:
+        print(archive_path)
+    print(f"Compacted {len(archives)} days.")
+    return 0
+
+
+def handle_gc(spec: str | None, dry_run: bool = False) -> int:
+    """Handle --gc command."""
+    from .gc import collect_garbage, get_retention
+
+    try:
+        policy = get_retention(spec)
+        if policy.is_empty:
+            raise ValueError("No retention policy: set AIWR_RETENTION or pass one, e.g. --gc 30d,2G")
+        result = collect_garbage(policy, dry_run)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for tree in result.deleted:
+        print(f"{tree.root_id}  {tree.date}  [{tree.agent or 'unknown'}]  {len(tree.logs)} logs  {tree.size / 1024:.1f} KB")
+    verb = "Would delete" if dry_run else "Deleted"
+    print(f"{verb} {len(result.deleted)} session trees ({result.freed / 1024 / 1024:.1f} MB).")
+    return 0
+
+
+def handle_stats(by: str, as_json: bool = False) -> int:
+    """Handle --stats command."""
+    from .stats import collect_stats, format_stats
+
+    keys = tuple(key.strip() for key in by.split(",") if key.strip())
+    try:
+        stats = collect_stats(keys)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if not stats:
+        print("No sessions found.")
+        return 0
+
+    try:
+        if as_json:
+            print(json.dumps([
+                {**dict(zip(keys, key)), **group.summary()} for key, group in stats.items()
+            ], indent=2), flush=True)
+        else:
+            print(format_stats(stats, keys), flush=True)
+    except BrokenPipeError:
+        _drop_stdout()
     return 0
 
 
@@ -150,6 +559,8 @@ def handle_models(as_json: bool = False) -> int:
 
 def format_models_table() -> str:
     """Format models table for all agents."""
+    from .models import MODELS
+
     lines = []
 
     for agent_name, models in MODELS.items():
@@ -171,14 +582,25 @@ def format_models_table() -> str:
 
 def format_models_json() -> str:
     """Format models as JSON."""
+    from .models import MODELS
+
     return json.dumps(MODELS, indent=2)
 
 
-def handle_resume(session_id: str, additional_prompt: str | None, extra_args: list[str], debug: bool) -> int:
+def handle_resume(
+    session_id: str,
+    additional_prompt: str | None,
+    default_agent: str,
+    context_budget: int | None,
+    extra_args: list[str],
+    debug: bool,
+) -> int:
     """Handle --resume command."""
+    from .resume import build_resume_prompt
+
     try:
-        agent_name = get_session_agent(session_id)
-        prompt = build_resume_prompt(session_id, additional_prompt)
+        agent_name = _resume_agent(session_id, default_agent)
+        prompt = build_resume_prompt(session_id, additional_prompt, context_budget)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -186,11 +608,20 @@ def handle_resume(session_id: str, additional_prompt: str | None, extra_args: li
     return _run_agent(agent_name, prompt, None, None, extra_args, debug)
 
 
-def handle_resume_tree(session_id: str, additional_prompt: str | None, extra_args: list[str], debug: bool) -> int:
+def handle_resume_tree(
+    session_id: str,
+    additional_prompt: str | None,
+    default_agent: str,
+    context_budget: int | None,
+    extra_args: list[str],
+    debug: bool,
+) -> int:
     """Handle --resume-tree command."""
+    from .resume import build_resume_tree_prompt
+
     try:
-        agent_name = get_session_agent(session_id)
-        prompt = build_resume_tree_prompt(session_id, additional_prompt)
+        agent_name = _resume_agent(session_id, default_agent)
+        prompt = build_resume_tree_prompt(session_id, additional_prompt, context_budget)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -198,6 +629,75 @@ def handle_resume_tree(session_id: str, additional_prompt: str | None, extra_arg
     return _run_agent(agent_name, prompt, None, None, extra_args, debug)
 
 
+def _resume_agent(session_id: str, default_agent: str) -> str:
+    """Agent to continue a session with.
+
+    Sessions not run by a single agent (e.g. a fan-out root) continue
+    with --agent.
+    """
+    from .agents import AGENTS
+    from .resume import get_session_agent
+
+    agent_name = get_session_agent(session_id)
+    if agent_name not in AGENTS:
+        return default_agent
+    return agent_name
+
+
+def handle_fanout(
+    spec: str,
+    prompt: str,
+    parent_id: str | None,
+    cli_extra_args: list[str],
+    stream: bool,
+    debug: bool,
+) -> int:
+    """Handle --fanout command."""
+    from .fanout import parse_targets, run_fanout
+    from .nesting import resolve_nesting
+
+    try:
+        targets = parse_targets(spec)
+        nesting = resolve_nesting(parent_id)
+        code = run_fanout(targets, prompt, cli_extra_args, nesting, stream, debug)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    _collect_after_run(nesting.parent_id)
+    return code
+
+
+def handle_batch(args: argparse.Namespace, cli_extra_args: list[str]) -> int:
+    """Handle --batch command."""
+    from .batch import parse_agent_jobs, run_batch
+    from .nesting import resolve_nesting
+
+    if args.jobs < 1:
+        print("Error: --jobs must be at least 1", file=sys.stderr)
+        return 1
+
+    try:
+        nesting = resolve_nesting(args.parent)
+        code = run_batch(
+            args.batch,
+            args.agent,
+            cli_extra_args,
+            jobs=args.jobs,
+            agent_jobs=parse_agent_jobs(args.agent_jobs),
+            unordered=args.unordered,
+            progress_path=args.progress,
+            nesting=nesting,
+            debug=args.debug,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    _collect_after_run(nesting.parent_id)
+    return code
+
+
 def handle_prompt(
     agent_name: str,
     prompt: str,
@@ -208,19 +708,10 @@ def handle_prompt(
     debug: bool,
 ) -> int:
     """Handle regular prompt execution."""
-    try:
-        # Resolve model
-        if model_alias:
-            model_info = resolve_model(agent_name, model_alias)
-        else:
-            model_info = get_default_model(agent_name)
-
-        # Merge extra args: model args + CLI args (CLI overrides)
-        merged_args = merge_extra_args(model_info.extra_args, cli_extra_args)
-
-        # Add --model to extra_args
-        final_args = ["--model", model_info.model_id] + merged_args
+    from .models import build_model_args
 
+    try:
+        final_args = build_model_args(agent_name, model_alias, cli_extra_args)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -236,9 +727,18 @@ def _run_agent(
     extra_args: list[str],
     debug: bool,
 ) -> int:
-    """Run an agent with the given parameters."""
+    """Run an agent with the given parameters.
+
+    Without --parent a run started by an agent is nested under the
+    agent's session; a continued session (--session) keeps its place.
+    """
+    from .agents import get_agent
+    from .nesting import resolve_nesting
+    from .runner import Runner
+
     try:
         agent = get_agent(agent_name)
+        nesting = resolve_nesting(parent_id, inherit=session_id is None)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -247,12 +747,22 @@ def _run_agent(
         agent=agent,
         prompt=prompt,
         extra_args=extra_args,
-        parent_id=parent_id,
+        nesting=nesting,
         session_id=session_id,
         debug=debug,
     )
 
-    return runner.run()
+    code = runner.run()
+    _collect_after_run(nesting.parent_id)
+    return code
+
+
+def _collect_after_run(parent_id: str | None) -> None:
+    """Prune old sessions after a top-level run when a retention policy is set (gc.py)."""
+    if parent_id is None and os.environ.get("AIWR_RETENTION"):
+        from .gc import collect_after_run
+
+        collect_after_run()
 
 
 if __name__ == "__main__":
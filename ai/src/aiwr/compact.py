@@ -0,0 +1,146 @@
+"""Compaction - fold closed date directories into per-day archives."""
+
+import os
+import shutil
+import sqlite3
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from .catalog import open_catalog
+from .session import get_logs_dir, get_parent_id
+from .storage import (
+    ACTIVE_WINDOW,
+    ARCHIVE_INDEX_SUFFIX,
+    ARCHIVE_SUFFIX,
+    COPY_CHUNK,
+    log_mtime,
+    open_log,
+    read_archive_index,
+    write_archive_index,
+)
+
+
+def compact_logs(days: int) -> list[Path]:
+    """Archive every date directory older than `days` days.
+
+    Each directory becomes `DATE.zip` plus a `DATE.idx.json` member index,
+    and its sessions are repointed in the catalog. Today is never compacted,
+    nor is a day with a log written in the last hour (a long-running tree).
+
+    Returns the archives written.
+
+    Raises:
+        ValueError: If `days` is negative
+    """
+    if days < 0:
+        raise ValueError("--compact needs a non-negative number of days")
+
+    logs_dir = get_logs_dir()
+    if not logs_dir.is_dir():
+        return []
+
+    today = datetime.now(timezone.utc).date()
+    cutoff = min(today - timedelta(days=days), today - timedelta(days=1)).isoformat()
+
+    archives = []
+    for date_dir in sorted(logs_dir.iterdir()):
+        if not date_dir.is_dir() or date_dir.name > cutoff or not _is_date(date_dir.name):
+            continue
+        if _is_active(date_dir):
+            continue
+        archives.append(compact_day(date_dir))
+    return archives
+
+
+def compact_day(date_dir: Path) -> Path:
+    """Fold one date directory into its day archive.
+
+    An existing archive for the same day is extended. Members already in
+    the archive are kept, so rerunning after a crash between writing the
+    archive and removing the directory is safe.
+    """
+    archive_path = date_dir.with_name(date_dir.name + ARCHIVE_SUFFIX)
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+
+    if archive_path.exists():
+        members = read_archive_index(archive_path)
+        shutil.copyfile(archive_path, tmp_path)
+        mode = "a"
+    else:
+        members = {}
+        mode = "w"
+
+    moved: list[tuple[str, str]] = []
+    with zipfile.ZipFile(tmp_path, mode, compression=zipfile.ZIP_DEFLATED) as zf:
+        existing = set(zf.namelist())
+        for jsonl_path in sorted(date_dir.rglob("*.jsonl")):
+            member = jsonl_path.relative_to(date_dir).as_posix()
+            session_id = jsonl_path.stem
+            moved.append((session_id, member))
+            if member in existing:
+                continue
+
+            info = zipfile.ZipInfo(member, time.localtime(log_mtime(jsonl_path))[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            # Stored decompressed - the archive compresses the whole day
+            with open_log(jsonl_path) as src, zf.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+            members[member] = {"session_id": session_id, "parent_id": get_parent_id(jsonl_path)}
+
+    os.replace(tmp_path, archive_path)
+    write_archive_index(archive_path, members)
+
+    catalog = open_catalog(date_dir.parent)
+    if catalog is not None:
+        try:
+            for session_id, member in moved:
+                catalog.move(session_id, archive_path / member)
+        except (sqlite3.Error, ValueError):
+            pass  # The next stale check rebuilds it
+
+    shutil.rmtree(date_dir)
+    return archive_path
+
+
+def prune_archive(archive_path: Path, names: set[str]) -> None:
+    """Remove the sessions under top-level `names` (abc.jsonl, abc) from a day archive.
+
+    The archive is rewritten without them and swapped in atomically; an
+    archive left empty is deleted along with its index.
+    """
+    members = read_archive_index(archive_path)
+    kept = {member: info for member, info in members.items() if member.split("/", 1)[0] not in names}
+    if not kept:
+        archive_path.unlink(missing_ok=True)
+        archive_path.with_suffix(ARCHIVE_INDEX_SUFFIX).unlink(missing_ok=True)
+        return
+
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+    with zipfile.ZipFile(archive_path) as src, zipfile.ZipFile(tmp_path, "w") as dst:
+        for old in src.infolist():
+            if old.filename.split("/", 1)[0] in names:
+                continue
+            info = zipfile.ZipInfo(old.filename, old.date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with src.open(old) as f, dst.open(info, "w") as out:
+                shutil.copyfileobj(f, out, COPY_CHUNK)
+
+    os.replace(tmp_path, archive_path)
+    write_archive_index(archive_path, kept)
+
+
+def _is_date(name: str) -> bool:
+    try:
+        datetime.strptime(name, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def _is_active(date_dir: Path) -> bool:
+    """Check whether any log under a date directory was written recently."""
+    threshold = time.time() - ACTIVE_WINDOW
+    return any(p.stat().st_mtime > threshold for p in date_dir.rglob("*.jsonl"))
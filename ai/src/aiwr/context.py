@@ -0,0 +1,135 @@
+"""Resume context - a size-budgeted digest of a session log."""
+
+import os
+
+from .agents import AGENTS, ContextItem
+from .reader import LogReader
+
+CHARS_PER_TOKEN = 4  # Rough estimate, good enough for budgeting
+DEFAULT_CONTEXT_BUDGET = 20000  # Tokens per resume prompt
+MIN_SESSION_BUDGET = 500  # Tokens per session when a tree shares the budget
+STDERR_CONTEXT_LINES = 20
+
+# Per-item caps (characters) - tool traffic is useful as a trail, not verbatim
+ITEM_LIMITS = {"tool": 200, "tool_result": 400}
+
+_LABELS = {
+    "user": "User",
+    "assistant": "Assistant",
+    "tool": "Tool call",
+    "tool_result": "Tool result",
+    "result": "Result",
+    "stderr": "Stderr",
+}
+
+
+def get_context_budget(budget: int | None = None) -> int:
+    """Resolve the resume context budget in tokens (AIWR_CONTEXT_BUDGET).
+
+    0 means no limit.
+
+    Raises:
+        ValueError: If the budget is negative or not a number
+    """
+    if budget is None:
+        value = os.environ.get("AIWR_CONTEXT_BUDGET")
+        try:
+            budget = int(value) if value else DEFAULT_CONTEXT_BUDGET
+        except ValueError:
+            raise ValueError(f"Invalid AIWR_CONTEXT_BUDGET: {value}") from None
+    if budget < 0:
+        raise ValueError("Context budget can't be negative")
+    return budget
+
+
+def build_context(reader: LogReader, agent_name: str, budget: int, model: str | None = None) -> str:
+    """Render the parts of a session that matter for continuing it.
+
+    The agent's extraction rules keep prompts, assistant text, tool calls
+    and results; everything else is dropped. Entries are read newest first
+    and reading stops once `budget` tokens are spent, so a long session
+    costs only its tail. Budget 0 keeps everything. `model` picks the
+    rules for agents that read another agent's format (replay).
+    """
+    agent = AGENTS.get(agent_name)
+    if agent is not None:
+        agent = agent.event_agent(model)
+    limit = budget * CHARS_PER_TOKEN
+    total = len(reader)
+
+    lines: list[str] = []  # Newest first
+    used = 0
+    block: ContextItem | None = None  # Item being merged with older deltas
+    visited = 0
+
+    def add(item: ContextItem) -> bool:
+        nonlocal used
+        line = _render(item)
+        if limit and used + len(line) > limit:
+            if lines:
+                return False
+            line = _truncate(line, limit)  # Always keep the newest item
+        lines.append(line)
+        used += len(line) + 1
+        return True
+
+    for entry in reversed(reader):
+        items = _aiwr_items(entry) if _is_aiwr(entry) else (
+            agent.context_items(entry) if agent else []
+        )
+
+        full = False
+        for item in reversed(items):
+            if block is not None and block.delta and block.role == item.role:
+                block = block._replace(text=item.text + block.text, delta=item.delta)
+                continue
+            if block is not None and not add(block):
+                full = True
+                break
+            block = item
+
+        if full:
+            block = None
+            break
+        visited += 1
+
+    if block is not None and not add(block):
+        visited -= 1
+
+    lines.reverse()
+    omitted = total - visited
+    if omitted > 0:
+        lines.insert(0, f"[{omitted} earlier events omitted]")
+    return "\n".join(lines)
+
+
+def _is_aiwr(entry: dict) -> bool:
+    entry_type = entry.get("type")
+    return isinstance(entry_type, str) and entry_type.startswith("aiwr_")
+
+
+def _aiwr_items(entry: dict) -> list[ContextItem]:
+    """Context of aiwr's own records: fan-out child results and stderr of failed runs."""
+    entry_type = entry.get("type")
+    if entry_type == "aiwr_child_result" and entry.get("result"):
+        return [ContextItem("result", entry["result"], entry.get("agent"))]
+    if entry_type == "aiwr_stderr":
+        tail = entry.get("lines", [])[-STDERR_CONTEXT_LINES:]
+        return [ContextItem("stderr", "\n".join(tail))]
+    return []
+
+
+def _render(item: ContextItem) -> str:
+    text = _truncate(item.text.strip(), ITEM_LIMITS.get(item.role))
+    label = _LABELS.get(item.role, item.role)
+    if item.role == "tool":
+        return f"{label}: {item.name or 'unknown'}({text})"
+    if item.name:
+        return f"{label} ({item.name}): {text}"
+    return f"{label}: {text}"
+
+
+def _truncate(text: str, limit: int | None) -> str:
+    if limit is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
@@ -0,0 +1,123 @@
+"""Context cache - formatted resume blocks keyed by log file identity."""
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from .storage import log_identity
+
+CACHE_FILE = "context_cache.sqlite3"
+CACHE_VERSION = "1"  # Bump when the block format changes
+DEFAULT_CACHE_MB = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    path TEXT NOT NULL,
+    budget INTEGER NOT NULL,
+    identity TEXT NOT NULL,
+    block TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (path, budget)
+);
+"""
+
+
+class ContextCache:
+    """Per-session resume blocks, reused while the log is unchanged.
+
+    A block is stored under the log's path and the context budget, with
+    the file identity (inode, size, mtime) alongside; a changed file is a
+    miss and its block is replaced. Least recently used blocks are evicted
+    once the cache grows past its size cap.
+    """
+
+    def __init__(self, logs_dir: Path, max_bytes: int):
+        self.logs_dir = logs_dir
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(logs_dir / CACHE_FILE, timeout=30, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._conn.close()
+
+    def get(self, path: Path, budget: int) -> dict[str, Any] | None:
+        """Return the cached block of a session log, if still valid."""
+        identity = _identity(path)
+        row = self._conn.execute(
+            "SELECT identity, block FROM blocks WHERE path = ? AND budget = ?",
+            (self._key(path), budget),
+        ).fetchone()
+        if row is None or row[0] != identity:
+            return None
+
+        self._conn.execute(
+            "UPDATE blocks SET used_at = ? WHERE path = ? AND budget = ?",
+            (time.time(), self._key(path), budget),
+        )
+        return json.loads(row[1])
+
+    def put(self, path: Path, budget: int, block: dict[str, Any]) -> None:
+        """Store the block of a session log."""
+        data = json.dumps(block, ensure_ascii=False)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?)",
+            (self._key(path), budget, _identity(path), data, len(data), time.time()),
+        )
+
+    def remove(self, paths: list[Path]) -> None:
+        """Drop the blocks of deleted session logs."""
+        self._conn.executemany("DELETE FROM blocks WHERE path = ?", [(self._key(path),) for path in paths])
+
+    def trim(self) -> None:
+        """Evict least recently used blocks beyond the size cap."""
+        self._conn.execute(
+            """
+            DELETE FROM blocks WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(size) OVER (ORDER BY used_at DESC, rowid DESC) AS total
+                    FROM blocks
+                ) WHERE total > ?
+            )
+            """,
+            (self.max_bytes,),
+        )
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.logs_dir).as_posix()
+
+
+def _identity(path: Path) -> str:
+    return f"{CACHE_VERSION}:{log_identity(path)}"
+
+
+_caches: dict[Path, ContextCache] = {}
+
+
+def open_context_cache(logs_dir: Path) -> ContextCache | None:
+    """Open the context cache of a logs directory (AIWR_CONTEXT_CACHE_MB).
+
+    Returns None when the cache is disabled (size 0) or can't be used;
+    callers then format every session.
+    """
+    if logs_dir in _caches:
+        return _caches[logs_dir]
+
+    try:
+        max_mb = int(os.environ.get("AIWR_CONTEXT_CACHE_MB", DEFAULT_CACHE_MB))
+    except ValueError:
+        max_mb = DEFAULT_CACHE_MB
+    if max_mb <= 0 or not logs_dir.is_dir():
+        return None
+
+    try:
+        cache = ContextCache(logs_dir, max_mb * 1024 * 1024)
+    except sqlite3.Error:
+        return None
+
+    _caches[logs_dir] = cache
+    return cache
@@ -0,0 +1,429 @@
+"""Daemon - a warm aiwr process serving commands over a Unix socket.
+
+`aiwr --daemon` imports everything once, keeps the session index warm
+and listens on a socket per logs directory. The `aiwr` command forwards
+its command line there when the daemon is running and runs in-process
+when it is not, so nested calls made by agents skip interpreter startup,
+imports and the logs scan.
+
+Each request runs in a forked worker: it takes on the client's working
+directory and environment and runs the same `cli.main()`, so a command
+behaves exactly as it would in-process. The daemon supervises workers
+and the agents they run: a client that goes away or is interrupted has
+its run interrupted, and stopping the daemon interrupts every run.
+
+Protocol: newline-delimited JSON. The client sends one request
+({"op", "argv", "cwd", "env"} - or {"op": "status"|"stop"}), then
+{"signal": N} lines for signals it receives. The daemon answers with
+{"stdout": text} / {"stderr": text} lines and a final {"exit": code};
+empty {} lines check that a client which half-closed its end is still
+reading, and are ignored.
+"""
+
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from .paths import get_logs_dir
+
+DAEMON_ACTIONS = ("start", "stop", "status")
+INDEX_OPS = frozenset({"list"})  # Requests that read the session index
+REQUEST_TIMEOUT = 5  # Seconds a client has to send its request
+ACCEPT_TIMEOUT = 1  # Seconds between reaps of finished workers
+KILL_TIMEOUT = 5  # Seconds between SIGTERM and SIGKILL of workers on stop
+PROBE_INTERVAL = 1  # Seconds between checks that a half-closed client is still there
+MAX_REQUEST = 16 * 1024 * 1024
+
+
+def socket_path(logs_dir: Path) -> Path:
+    """Socket of the daemon serving a logs directory.
+
+    Lives in $XDG_RUNTIME_DIR/aiwr/, or /tmp/aiwr-UID/ - a directory
+    only the user can enter, checked before every use since anyone can
+    create it first in /tmp.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    base = Path(runtime_dir) / "aiwr" if runtime_dir else Path(f"/tmp/aiwr-{os.getuid()}")
+    return base / f"{zlib.crc32(str(logs_dir.resolve()).encode()):08x}.sock"
+
+
+def connect(logs_dir: Path) -> socket.socket | None:
+    """Connect to the daemon of a logs directory; None if it isn't running."""
+    path = socket_path(logs_dir)
+    try:
+        _check_private_dir(path.parent)
+    except OSError:
+        return None  # Never hand our environment to a socket someone else controls
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _make_private_dir(path: Path) -> None:
+    """Create the socket directory, or check an existing one.
+
+    Raises:
+        OSError: If it can't be created, or isn't private to the user
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        path.mkdir(mode=0o700)
+        os.chmod(path, 0o700)  # Whatever the umask
+    except FileExistsError:
+        pass
+    _check_private_dir(path)
+
+
+def _check_private_dir(path: Path) -> None:
+    """Check that a directory is a real directory of ours with mode 0700.
+
+    Raises:
+        OSError: If it's missing, a symlink, someone else's or open to others
+    """
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) != 0o700:
+        raise PermissionError(f"{path} is not a directory owned by this user with mode 0700")
+
+
+# Client
+
+
+def forward_command(argv: list[str], op: str) -> int | None:
+    """Run a command line in the daemon, relaying its output and our signals.
+
+    Returns the command's exit code, or None when no daemon is running -
+    the caller then runs the command itself.
+    """
+    sock = connect(get_logs_dir())
+    if sock is None:
+        return None
+
+    request = {"op": op, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    with sock:
+        _send(sock, request)
+        return _relay(sock)
+
+
+def control(action: str) -> int:
+    """Handle --daemon stop/status against the running daemon."""
+    sock = connect(get_logs_dir())
+    if sock is None:
+        print("Daemon not running.")
+        return 0 if action == "stop" else 1
+
+    with sock:
+        _send(sock, {"op": action})
+        return _relay(sock)
+
+
+def _relay(sock: socket.socket) -> int:
+    """Print daemon output until the exit message; forward signals meanwhile."""
+
+    def forward_signal(signum: int, frame: Any) -> None:
+        try:
+            _send(sock, {"signal": signum})
+        except OSError:
+            pass
+
+    previous = {sig: signal.signal(sig, forward_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for line in sock.makefile("rb"):
+            message = json.loads(line)
+            if "stdout" in message:
+                sys.stdout.write(message["stdout"])
+                sys.stdout.flush()
+            elif "stderr" in message:
+                sys.stderr.write(message["stderr"])
+                sys.stderr.flush()
+            elif "exit" in message:
+                return message["exit"]
+    except BrokenPipeError:
+        # Our reader went away (`| head`): closing the socket stops the command
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError):
+        pass
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    print("Error: lost connection to the aiwr daemon", file=sys.stderr)
+    return 1
+
+
+def _send(sock: socket.socket, message: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+# Server
+
+
+class _Stop(Exception):
+    """Raised by the signal handlers to leave the accept loop."""
+
+
+def serve() -> int:
+    """Run the daemon for the current logs directory until stopped."""
+    from . import batch, cli, compact, fanout, resume, runner, stats, tree  # noqa: F401 - warm imports
+    from .agents import AGENTS, BUILTIN_AGENTS
+    from .session import enable_index_cache, scan_sessions
+
+    logs_dir = get_logs_dir()
+    path = socket_path(logs_dir)
+    try:
+        _make_private_dir(path.parent)
+    except OSError as e:
+        print(f"Error: unsafe socket directory: {e}", file=sys.stderr)
+        return 1
+
+    probe = connect(logs_dir)
+    if probe is not None:
+        probe.close()
+        print(f"Error: daemon already running on {path}", file=sys.stderr)
+        return 1
+    path.unlink(missing_ok=True)
+
+    for name in BUILTIN_AGENTS:
+        AGENTS[name]
+    enable_index_cache()
+    scan_sessions()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    os.chmod(path, 0o600)
+    listener.listen(64)
+    listener.settimeout(ACCEPT_TIMEOUT)
+
+    def stop(signum: int, frame: Any) -> None:
+        raise _Stop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, stop)
+
+    state = {"started_at": time.time(), "logs_dir": str(logs_dir), "socket": str(path), "pid": os.getpid()}
+    workers: dict[int, dict[str, Any]] = {}
+    print(f"aiwr daemon {os.getpid()} serving {logs_dir} on {path}", file=sys.stderr, flush=True)
+
+    try:
+        while True:
+            _reap(workers)
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                if _accept(conn, listener, state, workers):
+                    break
+    except _Stop:
+        pass
+    finally:
+        listener.close()
+        path.unlink(missing_ok=True)
+        _stop_workers(workers)
+        print("aiwr daemon stopped", file=sys.stderr, flush=True)
+    return 0
+
+
+def _accept(
+    conn: socket.socket,
+    listener: socket.socket,
+    state: dict[str, Any],
+    workers: dict[int, dict[str, Any]],
+) -> bool:
+    """Serve one connection; returns True when asked to stop."""
+    from .session import scan_sessions
+
+    conn.settimeout(REQUEST_TIMEOUT)
+    reader = conn.makefile("rb")
+    try:
+        request = json.loads(reader.readline(MAX_REQUEST))
+    except (OSError, ValueError):
+        return False
+    conn.settimeout(None)
+
+    op = request.get("op")
+    if op in ("status", "stop"):
+        _reap(workers)
+        status = {**state, "workers": [{"pid": pid, **info} for pid, info in workers.items()]}
+        try:
+            _send(conn, {"stdout": json.dumps(status, indent=2) + "\n"})
+            _send(conn, {"exit": 0})
+        except OSError:
+            pass
+        return op == "stop"
+
+    if op in INDEX_OPS:
+        scan_sessions()  # Refresh the warm index before the worker inherits it
+
+    try:
+        pid = os.fork()
+    except OSError as e:
+        _send(conn, {"stderr": f"Error: daemon can't start a worker: {e}\n"})
+        _send(conn, {"exit": 1})
+        return False
+
+    if pid == 0:
+        listener.close()
+        os._exit(_work(conn, reader, request))
+
+    reader.close()
+    workers[pid] = {"op": op, "argv": request.get("argv", []), "started_at": time.time()}
+    return False
+
+
+def _work(conn: socket.socket, reader: BinaryIO, request: dict[str, Any]) -> int:
+    """Worker: run one command as the client would have, output to the socket."""
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    import threading
+    import traceback
+
+    channel = _Channel(conn)
+    sys.stdout = _ChannelStream(channel, "stdout")
+    sys.stderr = _ChannelStream(channel, "stderr")
+    done = threading.Event()  # Set once the command returned
+
+    code = 1
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)  # Agents never read the daemon's stdin
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        threading.Thread(target=_watch_client, args=(reader, channel, done), daemon=True).start()
+
+        from .cli import main
+
+        code = main(request["argv"], forward=False)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+    except KeyboardInterrupt:
+        code = 130
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    # Too late to interrupt: a client that closed its end only gets the exit code
+    done.set()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_IGN)
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        channel.send({"exit": code})
+    except OSError:
+        pass
+    return code
+
+
+def _watch_client(reader: BinaryIO, channel: "_Channel", done: "threading.Event") -> None:
+    """Deliver the client's signals to this worker; a client gone away is SIGTERM.
+
+    Only while the command runs. End of input may just be a client that
+    half-closed its socket and still reads the output, so the client is
+    probed until a write fails or the command returns.
+    """
+    try:
+        for line in reader:
+            signum = json.loads(line).get("signal")
+            if signum in (signal.SIGINT, signal.SIGTERM) and not done.is_set():
+                os.kill(os.getpid(), signum)
+    except (OSError, ValueError):
+        pass
+    else:
+        while not done.wait(PROBE_INTERVAL):
+            try:
+                channel.send({})
+            except OSError:
+                break
+    if not done.is_set():
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+def _reap(workers: dict[int, dict[str, Any]]) -> None:
+    while workers:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            workers.clear()
+            return
+        if pid == 0:
+            return
+        workers.pop(pid, None)
+
+
+def _stop_workers(workers: dict[int, dict[str, Any]]) -> None:
+    """Interrupt running workers (their agents are stopped and logs closed), then kill stragglers."""
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + KILL_TIMEOUT
+    while workers and time.monotonic() < deadline:
+        _reap(workers)
+        time.sleep(0.05)
+
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    while workers:
+        _reap(workers)
+
+
+class _Channel:
+    """Messages to the client; shared by the worker's stdout and stderr."""
+
+    def __init__(self, conn: socket.socket):
+        import threading
+
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message: dict[str, Any]) -> None:
+        with self._lock:
+            _send(self._conn, message)
+
+
+class _ChannelStream:
+    """Text stream that sends whole lines to the client as {name: text} messages."""
+
+    def __init__(self, channel: _Channel, name: str):
+        self._channel = channel
+        self._name = name
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        end = self._buffer.rfind("\n")
+        if end >= 0:
+            lines, self._buffer = self._buffer[:end + 1], self._buffer[end + 1:]
+            self._channel.send({self._name: lines})
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            text, self._buffer = self._buffer, ""
+            self._channel.send({self._name: text})
+
+    def isatty(self) -> bool:
+        return False
@@ -0,0 +1,78 @@
+"""Log events - agent output kept as the bytes it arrived in."""
+
+import json
+import re
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+FRAME_PEEK = 64  # Bytes inspected at each end of a line for the {...} framing
+
+_TYPE_PREFIX = re.compile(rb'\s*\{\s*"type"\s*:\s*"([^"\\]*)"')
+
+
+class LogEvent(Mapping[str, Any]):
+    """One JSON object from agent output, decoded only when needed.
+
+    `raw` is the line exactly as received; the logger writes it verbatim,
+    so there is no parse/encode round trip. A leading "type" key is read
+    straight from the bytes - most extractors only look at the type. Any
+    other access decodes the whole object once.
+
+    A line that turns out not to be valid JSON decodes as an empty object.
+    """
+
+    __slots__ = ("raw", "_type", "_data")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._type: str | None = None
+        self._data: dict[str, Any] | None = None
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """The fully decoded object."""
+        if self._data is None:
+            try:
+                data = json.loads(self.raw)
+            except ValueError:
+                data = None
+            self._data = data if isinstance(data, dict) else {}
+        return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == "type" and self._data is None:
+            if self._type is None:
+                match = _TYPE_PREFIX.match(self.raw)
+                if match is None:
+                    return self.data.get(key, default)
+                self._type = match.group(1).decode("utf-8", errors="replace")
+            return self._type
+        return self.data.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"LogEvent({self.raw[:FRAME_PEEK]!r}...)"
+
+
+def parse_log_bytes(line: bytes) -> LogEvent | None:
+    """Wrap a line of agent output if it is framed as a JSON object.
+
+    Only the first and last bytes are inspected - the line is neither
+    copied nor decoded. Returns None for anything else (garbage output).
+    """
+    if not line[:FRAME_PEEK].lstrip().startswith(b"{"):
+        return None
+    if not line[-FRAME_PEEK:].rstrip().endswith(b"}"):
+        return None
+    return LogEvent(line)
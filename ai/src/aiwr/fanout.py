@@ -0,0 +1,181 @@
+"""Fan-out - run one prompt against several agents/models concurrently."""
+
+import asyncio
+import time
+import uuid
+from typing import Any, NamedTuple
+
+from .agents import get_agent
+from .logger import Logger
+from .models import build_model_args
+from .nesting import Nesting
+from .runner import INTERRUPT_SIGNALS, Runner, discard_json, print_json
+from .session import ensure_session_dir, get_log_path, record_session
+
+
+class FanoutTarget(NamedTuple):
+    """One agent/model pair of a fan-out."""
+
+    agent: str
+    model: str | None  # Model alias, None for the agent's default
+
+
+def parse_targets(spec: str) -> list[FanoutTarget]:
+    """Parse 'claude:opus,codex,gemini:flash' into fan-out targets.
+
+    Raises:
+        ValueError: If the spec is empty or names an unknown agent
+    """
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        agent_name, _, model = item.partition(":")
+        get_agent(agent_name)  # Validate early, before anything is started
+        targets.append(FanoutTarget(agent_name, model or None))
+
+    if not targets:
+        raise ValueError("No fan-out targets given")
+    return targets
+
+
+def run_fanout(
+    targets: list[FanoutTarget],
+    prompt: str,
+    cli_extra_args: list[str],
+    nesting: Nesting | None = None,
+    stream: bool = False,
+    debug: bool = False,
+) -> int:
+    """Run all targets concurrently under a shared root session.
+
+    Prints one merged JSON document when every run has finished, or with
+    `stream` one JSON line per run as it finishes.
+
+    Raises:
+        ValueError: If a model alias can't be resolved
+    """
+    # Resolve every model before anything is spawned
+    runs = [
+        (target, build_model_args(target.agent, target.model, cli_extra_args))
+        for target in targets
+    ]
+    return asyncio.run(_run_fanout(runs, prompt, nesting or Nesting(), stream, debug))
+
+
+async def _run_fanout(
+    runs: list[tuple[FanoutTarget, list[str]]],
+    prompt: str,
+    nesting: Nesting,
+    stream: bool,
+    debug: bool,
+) -> int:
+    started_at = time.time()
+    root_id = str(uuid.uuid4())
+    spec = ",".join(f"{t.agent}:{t.model}" if t.model else t.agent for t, _ in runs)
+
+    # Root session: children are nested in its directory
+    first_json = {"type": "aiwr_start", "prompt": prompt, "agent": "fanout", "model": spec}
+    print_json(first_json)
+    print_json({"session_id": root_id, "agent": "fanout"})
+
+    parent_id = nesting.parent_id
+    logger = Logger(streaming=True)
+    logger.append(first_json)
+    if parent_id:
+        logger.append({"type": "aiwr_meta", "parent_id": parent_id})
+    root_path = get_log_path(root_id, parent_id, nesting.parent_dir)
+    logger.set_log_path(root_path)
+    root_dir = ensure_session_dir(root_path)
+    record_session(
+        root_id, logger.log_path, parent_id=parent_id, agent="fanout",
+        model=spec, status="running", started_at=started_at,
+    )
+
+    runners = [
+        Runner(
+            agent=get_agent(target.agent),
+            prompt=prompt,
+            extra_args=extra_args,
+            nesting=nesting.child(root_id, root_dir),
+            debug=debug,
+            emit=discard_json,
+        )
+        for target, extra_args in runs
+    ]
+
+    loop = asyncio.get_running_loop()
+    interrupted: list[int] = []
+
+    def interrupt_all(signum: int) -> None:
+        interrupted.append(signum)
+        for runner in runners:
+            runner.interrupt(signum)
+
+    for sig in INTERRUPT_SIGNALS:
+        loop.add_signal_handler(sig, interrupt_all, sig)
+
+    results: list[dict[str, Any]] = [{} for _ in runners]
+
+    async def run_child(position: int, target: FanoutTarget, runner: Runner) -> None:
+        try:
+            await runner.run_async()
+            result = runner.result.to_dict()
+        except Exception as e:
+            # The agent failed to spawn: its target fails, the others run on
+            result = {
+                "agent": target.agent, "model": target.model, "session_id": None,
+                "status": "failed", "result": None, "exit_code": 1,
+                "duration": round(time.time() - started_at, 3), "error": str(e),
+            }
+        results[position] = result
+        logger.append({"type": "aiwr_child_result", **result})
+        if stream:
+            print_json(result)
+
+    try:
+        await asyncio.gather(*(
+            run_child(position, target, runner)
+            for position, ((target, _), runner) in enumerate(zip(runs, runners))
+        ))
+    finally:
+        for sig in INTERRUPT_SIGNALS:
+            loop.remove_signal_handler(sig)
+
+    failed = any(r["exit_code"] != 0 for r in results)
+    status = "interrupted" if interrupted else "failed" if failed else "completed"
+    duration = round(time.time() - started_at, 3)
+
+    if not stream:
+        print_json({
+            "session_id": root_id,
+            "prompt": prompt,
+            "status": status,
+            "duration": duration,
+            "results": results,
+        })
+
+    logger.append({
+        "type": "aiwr_summary",
+        "agent": "fanout",
+        "model": spec,
+        "prompt": prompt,
+        "status": status,
+        "result": None,
+        "entries": logger.entry_count,
+        "bytes": logger.bytes_written,
+        "duration": duration,
+        "exit_code": 128 + interrupted[0] if interrupted else int(failed),
+    })
+
+    saved_path = logger.save()
+    if saved_path:
+        from .search import index_session
+
+        record_session(root_id, saved_path, status=status, ended_at=time.time())
+        index_session(saved_path)
+
+    if interrupted:
+        return 128 + interrupted[0]
+    return 1 if failed else 0
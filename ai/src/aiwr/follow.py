@@ -0,0 +1,233 @@
+"""Follow - live tail of a session and its descendants (aiwr --follow).
+
+Each log is opened once and read on from where the last read stopped:
+nothing is reread. The open file survives the session's file -> directory
+conversion and in-place compression at close. Children are found in the
+session's directory, listed again only when its mtime changes.
+
+Changes are waited for with inotify (through ctypes, Linux) or, where it
+isn't available, by polling.
+"""
+
+import json
+import os
+import select
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from .logger import SUMMARY_PREFIX
+from .session import find_session_path, session_dir_of
+from .storage import is_plain, open_log
+
+POLL_INTERVAL = 0.2  # Seconds between polls without inotify
+WAKE_INTERVAL = 1.0  # Longest inotify wait - covers events missed while (re)watching
+
+# inotify(7) event masks
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_MOVE_SELF = 0x800
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MOVE_SELF
+
+
+@dataclass
+class _Node:
+    """A followed session log."""
+
+    session_id: str
+    parent_id: str | None
+    depth: int
+    file: BinaryIO
+    session_dir: Path  # Where its children appear
+    pending: bytes = b""  # Incomplete last line
+    done: bool = False  # Its run wrote aiwr_summary
+    closed: bool = False  # The log can't grow any more
+    dir_mtime: int | None = None  # session_dir mtime at the last listing
+
+
+def follow_session(
+    session_id: str,
+    emit: Callable[[str], None],
+    as_json: bool = False,
+) -> int:
+    """Stream the events of a session tree until every followed run has ended.
+
+    Events are passed to `emit` as lines, prefixed with the session's short
+    ID (indented by depth) - or with `as_json` as NDJSON objects
+    {"session_id", "parent_id", "depth", "event"}.
+
+    Raises:
+        ValueError: If the session doesn't exist
+    """
+    path = find_session_path(session_id)
+    if path is None:
+        raise ValueError(f"Session not found: {session_id}")
+
+    watcher = open_watcher()
+    nodes: dict[str, _Node] = {}
+    try:
+        _attach(nodes, session_id, None, 0, path, watcher, emit, as_json)
+        while True:
+            followed = len(nodes)
+            for node in list(nodes.values()):
+                _read(node, emit, as_json)
+                _find_children(nodes, node, watcher, emit, as_json)
+            if all(node.done for node in nodes.values()):
+                return 0
+            if len(nodes) == followed:
+                watcher.wait()  # Children attached in this pass are read first
+    finally:
+        watcher.close()
+        for node in nodes.values():
+            node.file.close()
+
+
+def _attach(
+    nodes: dict[str, _Node],
+    session_id: str,
+    parent_id: str | None,
+    depth: int,
+    path: Path,
+    watcher: "PollWatcher",
+    emit: Callable[[str], None],
+    as_json: bool,
+) -> None:
+    try:
+        file = open_log(path)
+    except FileNotFoundError:
+        # Turned into abc/abc.jsonl since it was listed
+        path = path.parent / path.stem / path.name
+        file = open_log(path)
+
+    node = _Node(session_id, parent_id, depth, file, session_dir_of(path))
+    node.closed = not is_plain(path)  # Compressed or archived - nothing more will come
+    nodes[session_id] = node
+    watcher.add(path)
+    if not as_json:
+        emit(f"{_prefix(node)}session {session_id}" + (f" (parent {parent_id})" if parent_id else ""))
+
+
+def _read(node: _Node, emit: Callable[[str], None], as_json: bool) -> None:
+    """Emit the complete lines appended since the last read."""
+    data = node.file.read()
+    lines = (node.pending + data).split(b"\n") if data else [node.pending]
+    node.pending = lines.pop()
+    for line in lines:
+        if not line.startswith(b"{"):
+            continue  # Blank line or resume separator
+        if line.startswith(SUMMARY_PREFIX):
+            node.done = True
+        elif line.startswith(b'{"type": "aiwr_start"'):
+            node.done = False  # A continued session runs again
+
+        if as_json:
+            # The event is passed through as written, not parsed and re-encoded
+            emit(
+                f'{{"session_id": {json.dumps(node.session_id)}, "parent_id": {json.dumps(node.parent_id)}, '
+                f'"depth": {node.depth}, "event": {line.decode("utf-8", errors="replace")}}}'
+            )
+        else:
+            emit(_prefix(node) + line.decode("utf-8", errors="replace"))
+
+    if node.closed:
+        node.done = True  # Nothing more can come, whatever its last run says
+
+
+def _find_children(
+    nodes: dict[str, _Node],
+    node: _Node,
+    watcher: "PollWatcher",
+    emit: Callable[[str], None],
+    as_json: bool,
+) -> None:
+    """Attach children that appeared in the session's directory."""
+    try:
+        mtime = node.session_dir.stat().st_mtime_ns
+    except OSError:
+        return  # No child yet
+    if mtime == node.dir_mtime:
+        return
+
+    watcher.add(node.session_dir)
+    node.dir_mtime = mtime
+
+    with os.scandir(node.session_dir) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.is_dir():
+                child_id = entry.name
+                child_path = Path(entry.path) / f"{child_id}.jsonl"
+            elif entry.name.endswith(".jsonl"):
+                child_id = entry.name.removesuffix(".jsonl")
+                child_path = Path(entry.path)
+            else:
+                continue
+            if child_id in nodes:
+                continue
+            if entry.is_dir() and not child_path.exists():
+                node.dir_mtime = None  # Its log is still being created - list again
+                continue
+            _attach(nodes, child_id, node.session_id, node.depth + 1, child_path, watcher, emit, as_json)
+
+
+def _prefix(node: _Node) -> str:
+    return f"{'  ' * node.depth}[{node.session_id[:8]}] "
+
+
+class PollWatcher:
+    """Waits a fixed interval: every wait may have brought changes."""
+
+    def add(self, path: Path) -> None:
+        pass
+
+    def wait(self) -> None:
+        time.sleep(POLL_INTERVAL)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(PollWatcher):
+    """Wakes up as soon as a watched file or directory changes."""
+
+    def __init__(self):
+        import ctypes
+
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watched: set[Path] = set()
+
+    def add(self, path: Path) -> None:
+        # A file watch follows the file through renames; a failed one is
+        # covered by the periodic wake-up
+        if path not in self._watched:
+            self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            self._watched.add(path)
+
+    def wait(self) -> None:
+        ready, _, _ = select.select([self._fd], [], [], WAKE_INTERVAL)
+        if ready:
+            try:
+                while os.read(self._fd, 64 * 1024):
+                    pass  # Only the wake-up matters
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher() -> PollWatcher:
+    """inotify where available, polling otherwise."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher()
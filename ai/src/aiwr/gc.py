@@ -0,0 +1,400 @@
+"""Retention - deleting old session trees (aiwr --gc).
+
+The policy (AIWR_RETENTION, or the value of --gc) combines rules:
+
+    30d         - delete trees with no activity for 30 days
+    2G          - keep the logs under 2 GiB, deleting the oldest trees first (K, M, G)
+    codex=7d    - the age rule for trees whose root ran that agent
+
+A tree - a root session with all its descendants, including children
+logged on another day - is kept or deleted as a whole, so no child ever
+loses its parent. Its age is that of its newest log; trees written to in
+the last hour are never deleted.
+
+With a policy set, the end of a top-level run also collects, at most once
+per AIWR_GC_INTERVAL and within AIWR_GC_BUDGET_MS: the oldest days are
+visited first and the pass stops when the budget is spent.
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .catalog import Catalog, open_catalog
+from .compact import prune_archive
+from .context_cache import open_context_cache
+from .logger import Logger
+from .paths import get_logs_dir
+from .search import open_search_index
+from .session import get_today_dir
+from .stats import open_stats_cache
+from .storage import (
+    ACTIVE_WINDOW,
+    archive_date,
+    day_sources,
+    layout_lock,
+    log_exists,
+    log_mtime,
+    log_size,
+    read_archive_index,
+)
+
+GC_STAMP = ".gc.stamp"  # Touched by every opportunistic pass
+DEFAULT_GC_INTERVAL = 3600  # Seconds between opportunistic passes
+DEFAULT_GC_BUDGET_MS = 50  # Time an opportunistic pass may take
+
+_AGE_RULE = re.compile(r"(\d+)d")
+_SIZE_RULE = re.compile(r"(\d+(?:\.\d+)?)([KMG])", re.IGNORECASE)
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+@dataclass
+class RetentionPolicy:
+    """What to keep: maximum age in days (overall and per agent) and total size."""
+
+    max_age_days: int | None = None
+    max_bytes: int | None = None
+    agent_days: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        """True when no rule is set - nothing is ever deleted."""
+        return self.max_age_days is None and self.max_bytes is None and not self.agent_days
+
+    def max_age(self, agent: str | None) -> int | None:
+        """Maximum age in days of a tree whose root ran `agent`."""
+        return self.agent_days.get(agent or "", self.max_age_days)
+
+
+@dataclass
+class SessionTree:
+    """A root session and its descendants, as stored."""
+
+    root_id: str
+    agent: str | None
+    date: str
+    units: list[tuple[Path, str]]  # (date dir or day archive, top-level name: abc.jsonl or abc)
+    logs: list[Path]
+    size: int
+    mtime: float  # Newest log
+
+
+@dataclass
+class GcResult:
+    """Outcome of a collection."""
+
+    deleted: list[SessionTree]
+    complete: bool  # False when the time budget ran out first
+
+    @property
+    def freed(self) -> int:
+        """Bytes taken by the deleted trees."""
+        return sum(tree.size for tree in self.deleted)
+
+
+def parse_retention(spec: str) -> RetentionPolicy:
+    """Parse a retention policy: comma-separated `Nd`, `N[KMG]` and `agent=Nd` rules.
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    policy = RetentionPolicy()
+    for rule in (part.strip() for part in spec.split(",")):
+        if not rule:
+            continue
+        agent, _, value = rule.rpartition("=")
+        age = _AGE_RULE.fullmatch(value)
+        size = _SIZE_RULE.fullmatch(value)
+        if age and int(age.group(1)) < 1:
+            raise ValueError(f"Retention age must be at least 1d: {rule}")
+
+        if agent and age:
+            policy.agent_days[agent.strip()] = int(age.group(1))
+        elif not agent and age:
+            policy.max_age_days = int(age.group(1))
+        elif not agent and size:
+            policy.max_bytes = int(float(size.group(1)) * _SIZE_UNITS[size.group(2).upper()])
+        else:
+            raise ValueError(f"Invalid retention rule: {rule} (expected Nd, N[KMG] or AGENT=Nd)")
+    return policy
+
+
+def get_retention(spec: str | None = None) -> RetentionPolicy:
+    """Resolve the retention policy: `spec`, or AIWR_RETENTION.
+
+    Raises:
+        ValueError: If the policy is malformed
+    """
+    if spec is None:
+        spec = os.environ.get("AIWR_RETENTION", "")
+    return parse_retention(spec)
+
+
+def collect_garbage(
+    policy: RetentionPolicy,
+    dry_run: bool = False,
+    budget: float | None = None,
+) -> GcResult:
+    """Delete the session trees the policy doesn't keep.
+
+    Trees are deleted a day at a time, each day archive rewritten once.
+    With a `budget` (seconds) the pass stops once it is spent; the size
+    rule then applies only if every tree was looked at, and day archives
+    are only deleted whole, never rewritten.
+    """
+    logs_dir = get_logs_dir()
+    if policy.is_empty or not logs_dir.is_dir():
+        return GcResult([], True)
+
+    deadline = None if budget is None else time.monotonic() + budget
+    catalog = open_catalog(logs_dir)
+    trees, complete = _inventory(logs_dir, catalog, deadline)
+
+    selected = _select(trees, policy, complete)
+    if deadline is not None:
+        selected = _whole_archives_only(selected)
+
+    deleted = []
+    for group in _by_day(selected):
+        # Past the deadline the pass still deletes one day, so every pass makes progress
+        if deleted and deadline is not None and time.monotonic() > deadline:
+            complete = False
+            break
+        if not dry_run:
+            try:
+                _delete_trees(logs_dir, group, catalog)
+            except OSError:
+                continue  # Changed under us - the next pass sees it again
+        deleted.extend(group)
+    return GcResult(deleted, complete)
+
+
+def collect_after_run() -> None:
+    """Opportunistic collection at the end of a top-level run.
+
+    Does nothing without a policy or when a pass ran in the last
+    AIWR_GC_INTERVAL seconds; never fails the run.
+    """
+    try:
+        policy = get_retention()
+    except ValueError:
+        return
+    logs_dir = get_logs_dir()
+    if policy.is_empty or not logs_dir.is_dir():
+        return
+
+    interval = _env_number("AIWR_GC_INTERVAL", DEFAULT_GC_INTERVAL)
+    budget_ms = _env_number("AIWR_GC_BUDGET_MS", DEFAULT_GC_BUDGET_MS)
+    stamp = logs_dir / GC_STAMP
+    try:
+        if time.time() - stamp.stat().st_mtime < interval:
+            return
+    except FileNotFoundError:
+        pass
+
+    try:
+        stamp.touch()  # Claimed before collecting, so concurrent runs skip it
+        collect_garbage(policy, budget=budget_ms / 1000)
+    except (OSError, ValueError, sqlite3.Error):
+        pass
+
+
+def _env_number(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def _inventory(
+    logs_dir: Path,
+    catalog: Catalog | None,
+    deadline: float | None,
+) -> tuple[list[SessionTree], bool]:
+    """Every session tree, oldest day first; False if the deadline cut it short."""
+    trees = []
+    owned: set[str] = set()  # Sessions already part of a tree
+    for source in day_sources(logs_dir):
+        for name, logs in _day_units(source):
+            if deadline is not None and time.monotonic() > deadline:
+                return trees, False
+
+            root_id = name.removesuffix(".jsonl")
+            if root_id in owned:
+                continue  # A child logged on another day, collected with its parent
+            root_path = next((path for path in logs if path.stem == root_id), logs[0])
+            try:
+                header = Logger.read_header(root_path)
+            except (OSError, ValueError):
+                header = []
+
+            parent_id = next((e.get("parent_id") for e in header if e.get("type") == "aiwr_meta"), None)
+            if parent_id and _exists(catalog, parent_id):
+                continue  # Goes with the parent's tree, which a later day can't hold
+            agent = next((e.get("agent") for e in header if e.get("type") == "aiwr_start"), None)
+
+            tree = SessionTree(root_id, agent, archive_date(source.name), [(source, name)], logs, 0, 0.0)
+            _add_descendants(logs_dir, tree, catalog)
+            try:
+                tree.size = sum(log_size(path) for path in tree.logs)
+                tree.mtime = max(log_mtime(path) for path in tree.logs)
+            except (OSError, KeyError):
+                continue  # Changed under us - left for the next pass
+            owned.update(path.stem for path in tree.logs)
+            trees.append(tree)
+    return trees, True
+
+
+def _day_units(source: Path) -> list[tuple[str, list[Path]]]:
+    """Top-level entries of a day with their logs: (abc.jsonl, [log]) or (abc, [logs])."""
+    units: dict[str, list[Path]] = {}
+    if source.is_dir():
+        for entry in sorted(os.scandir(source), key=lambda entry: entry.name):
+            if entry.is_dir():
+                logs = sorted(Path(entry.path).rglob("*.jsonl"))
+                if logs:
+                    units[entry.name] = logs
+            elif entry.name.endswith(".jsonl"):
+                units[entry.name] = [Path(entry.path)]
+    else:
+        for member in sorted(read_archive_index(source)):
+            units.setdefault(member.split("/", 1)[0], []).append(source / member)
+    return list(units.items())
+
+
+def _add_descendants(logs_dir: Path, tree: SessionTree, catalog: Catalog | None) -> None:
+    """Add the entries of children logged on other days (found through the catalog)."""
+    if catalog is None:
+        return
+
+    pending = [path.stem for path in tree.logs]
+    seen = set(pending)
+    while pending:
+        for child_id in catalog.children(pending.pop()):
+            if child_id in seen:
+                continue
+            seen.add(child_id)
+            path = catalog.find_path(child_id)
+            if path is None or not log_exists(path) or path in tree.logs:
+                continue
+
+            rel_parts = path.relative_to(logs_dir).parts
+            source, name = logs_dir / rel_parts[0], rel_parts[1]
+            if (source, name) in tree.units:
+                continue
+            logs = dict(_day_units(source)).get(name, [path])  # Rare: read the whole day
+            tree.units.append((source, name))
+            tree.logs.extend(logs)
+            pending.extend(log.stem for log in logs if log.stem not in seen)
+            seen.update(log.stem for log in logs)
+
+
+def _exists(catalog: Catalog | None, session_id: str) -> bool:
+    if catalog is None:
+        return False
+    path = catalog.find_path(catalog.resolve(session_id))
+    return path is not None and log_exists(path)
+
+
+def _select(trees: list[SessionTree], policy: RetentionPolicy, complete: bool) -> list[SessionTree]:
+    """Trees to delete: past their age, then the oldest until the size fits."""
+    now = time.time()
+    idle = [tree for tree in trees if now - tree.mtime > ACTIVE_WINDOW]
+
+    selected = []
+    for tree in idle:
+        max_age = policy.max_age(tree.agent)
+        if max_age is not None and now - tree.mtime > max_age * 86400:
+            selected.append(tree)
+
+    if policy.max_bytes is not None and complete:
+        total = sum(tree.size for tree in trees) - sum(tree.size for tree in selected)
+        for tree in sorted(idle, key=lambda tree: tree.mtime):
+            if total <= policy.max_bytes:
+                break
+            if tree not in selected:
+                selected.append(tree)
+                total -= tree.size
+    return selected
+
+
+def _whole_archives_only(trees: list[SessionTree]) -> list[SessionTree]:
+    """Drop the trees sharing a day archive with a tree that stays."""
+    while True:
+        units = {unit for tree in trees for unit in tree.units}
+        whole = {
+            source: all((source, member.split("/", 1)[0]) in units for member in read_archive_index(source))
+            for source in {source for source, _ in units if not source.is_dir()}
+        }
+        kept = [tree for tree in trees if all(whole.get(source, True) for source, _ in tree.units)]
+        if len(kept) == len(trees):
+            return trees
+        trees = kept
+
+
+def _by_day(trees: list[SessionTree]) -> list[list[SessionTree]]:
+    """Group trees by the day of their root, keeping the order."""
+    groups: dict[Path, list[SessionTree]] = {}
+    for tree in trees:
+        groups.setdefault(tree.units[0][0], []).append(tree)
+    return list(groups.values())
+
+
+def _delete_trees(logs_dir: Path, trees: list[SessionTree], catalog: Catalog | None) -> None:
+    """Remove trees' entries (under the layout lock), their catalog rows and cached data.
+
+    Each day archive involved is rewritten once, or deleted when nothing is left in it.
+    """
+    units = [unit for tree in trees for unit in tree.units]
+    archives: dict[Path, set[str]] = {}
+    with layout_lock(logs_dir):
+        for source, name in units:
+            path = source / name
+            if not source.is_dir():
+                archives.setdefault(source, set()).add(name)
+            elif path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink(missing_ok=True)
+        for archive_path, names in archives.items():
+            prune_archive(archive_path, names)
+
+        # Emptied days go too - except today's, which runs may be about to write to
+        today = get_today_dir().name
+        for source in {source for source, _ in units}:
+            if source.is_dir() and source.name != today and not any(source.iterdir()):
+                source.rmdir()
+
+    if catalog is not None:
+        try:
+            for tree in trees:
+                for path in tree.logs:
+                    catalog.remove(path.stem)
+        except sqlite3.Error:
+            pass  # The next stale check rebuilds it
+
+    _purge_caches(logs_dir, trees)
+
+
+def _purge_caches(logs_dir: Path, trees: list[SessionTree]) -> None:
+    """Drop deleted trees from the search index, the context cache and the stats cache."""
+    paths = [path for tree in trees for path in tree.logs]
+    stores = [open_search_index(logs_dir), open_context_cache(logs_dir)]
+    try:
+        for store in stores:
+            if store is not None:
+                store.remove(paths)
+    except sqlite3.Error:
+        pass  # Left to the next search's catch-up and the cache's size cap
+
+    stats_cache = open_stats_cache(logs_dir)
+    if stats_cache is not None:
+        try:
+            stats_cache.forget({source.name for tree in trees for source, _ in tree.units})
+        except sqlite3.Error:
+            pass
+        stats_cache.close()
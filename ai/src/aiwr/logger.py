@@ -1,60 +1,296 @@
 """JSONL logging for AI sessions."""
 
+import io
 import json
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
+
+from .event import LogEvent
+from .paths import get_logs_dir
+from .storage import (
+    compress_file,
+    decompress_file,
+    follow_conversion,
+    get_compression,
+    is_plain,
+    layout_lock,
+    open_log,
+)
 
 
 RESUME_SEPARATOR = "----------"
+AIWR_ENTRY_PREFIX = '{"type": "aiwr_'
+SUMMARY_PREFIX = b'{"type": "aiwr_summary"'
+TAIL_BLOCK = 64 * 1024  # Bytes read per step when scanning a file backwards
+
+SYNC_POLICIES = ("none", "flush", "fsync")
+DEFAULT_SYNC = "flush"
 
 
 class Logger:
-    """Writes JSONL log files - one JSON object per line."""
+    """Writes JSONL log files - one JSON object per line.
+
+    In buffered mode entries are kept in memory until save().
+    In streaming mode the file is opened as soon as the path is known and
+    every entry is written as it arrives; only entries seen before that
+    are buffered. The sync policy controls durability per line:
 
-    def __init__(self, log_path: Path | None = None, is_resume: bool = False):
-        self._log_path: Path | None = log_path
-        self._entries: list[dict[str, Any]] = []
+    - none: rely on the OS buffer, flush on save()
+    - flush: flush to the kernel after each line (survives SIGKILL/OOM)
+    - fsync: flush and fsync after each line (survives power loss)
+
+    With a compression other than "none" the file is written plain and
+    compressed when it is closed. Appending to a compressed log first
+    rewrites it plain.
+    """
+
+    def __init__(
+        self,
+        log_path: Path | None = None,
+        is_resume: bool = False,
+        streaming: bool = False,
+        sync: str | None = None,
+        compression: str | None = None,
+    ):
+        self._log_path: Path | None = None
+        self._entries: list[dict[str, Any] | LogEvent] = []
         self._is_resume = is_resume  # Whether we're continuing an existing session
+        self._streaming = streaming
+        self._sync = sync or os.environ.get("AIWR_LOG_SYNC", DEFAULT_SYNC)
+        self._compression = get_compression(compression)
+        self._file: BinaryIO | None = None
+        self.entry_count = 0  # Entries written by this logger
+        self.bytes_written = 0  # Bytes written by this logger
+
+        if self._sync not in SYNC_POLICIES:
+            raise ValueError(
+                f"Unknown log sync policy: {self._sync}. Available: {', '.join(SYNC_POLICIES)}"
+            )
+
+        if log_path:
+            self.set_log_path(log_path)
+
+    @property
+    def log_path(self) -> Path | None:
+        """Current log path, following a file -> directory conversion."""
+        if self._log_path is None:
+            return None
+        return follow_conversion(self._log_path)
 
     def set_log_path(self, path: Path) -> None:
-        """Set the path where log will be saved."""
+        """Set the path where log will be saved.
+
+        In streaming mode this opens the file and writes buffered entries.
+        """
         self._log_path = path
+        if self._streaming and self._file is None:
+            self._open()
+
+    def append(self, entry: dict[str, Any] | LogEvent) -> None:
+        """Append a JSON object to the log. LogEvents are written verbatim."""
+        if self._file is None:
+            self._entries.append(entry)
+            return
 
-    def append(self, entry: dict[str, Any]) -> None:
-        """Append a JSON object to the log."""
-        self._entries.append(entry)
+        self._write_entry(self._file, entry)
+        self._sync_file()
 
     def save(self) -> Path | None:
-        """Save log as JSONL file (one JSON object per line)."""
+        """Save log as JSONL file (one JSON object per line).
+
+        In streaming mode this flushes and closes the file.
+        """
+        if self._streaming:
+            if self._file is None and self._log_path and self._entries:
+                self._open()
+            if self._file is None:
+                return None
+            self._file.flush()
+            if self._sync == "fsync":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            return self._close_file()
+
         if not self._log_path or not self._entries:
             return None
 
-        self._log_path.parent.mkdir(parents=True, exist_ok=True)
+        # Resolved and opened under the layout lock: the file can't move in between
+        with layout_lock(_lock_dir(self._log_path)):
+            log_path = self.log_path
+            log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Append to existing file if present
-        file_exists = self._log_path.exists()
-        mode = "a" if file_exists else "w"
+            # Append to existing file if present
+            file_exists = log_path.exists()
+            mode = "ab" if file_exists else "wb"
+            if file_exists:
+                decompress_file(log_path)
+            f = open(log_path, mode)
 
-        with open(self._log_path, mode, encoding="utf-8") as f:
+        with f:
             # Add separator when resuming an existing session
             if self._is_resume and file_exists:
-                f.write(RESUME_SEPARATOR + "\n")
+                f.write(RESUME_SEPARATOR.encode() + b"\n")
 
             for entry in self._entries:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._write_entry(f, entry)
+
+        return self._close_file()
+
+    def _close_file(self) -> Path:
+        """Compress the written log and touch its directory; returns where it is."""
+        if self._compression == "none":
+            log_path = self.log_path
+        else:
+            # Rewritten in place - a move meanwhile would bring back the old path
+            with layout_lock(_lock_dir(self._log_path)):
+                log_path = self.log_path
+                compress_file(log_path, self._compression)
+        _touch_dir(log_path)
+        return log_path
+
+    def _open(self) -> None:
+        """Open the log file for streaming and write buffered entries."""
+        with layout_lock(_lock_dir(self._log_path)):
+            log_path = self.log_path
+            log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        return self._log_path
+            file_exists = log_path.exists() and log_path.stat().st_size > 0
+            if file_exists:
+                decompress_file(log_path)
+            self._file = open(log_path, "ab")
+
+        if self._is_resume and file_exists:
+            self._file.write(RESUME_SEPARATOR.encode() + b"\n")
+
+        for entry in self._entries:
+            self._write_entry(self._file, entry)
+        self._entries = []
+        self._sync_file()
+
+    def _write_entry(self, f: BinaryIO, entry: dict[str, Any] | LogEvent) -> None:
+        if isinstance(entry, LogEvent):
+            # Agent output is written as received - no re-serialization
+            f.write(entry.raw)
+            size = len(entry.raw)
+            if not entry.raw.endswith(b"\n"):
+                f.write(b"\n")
+                size += 1
+        else:
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(data)
+            size = len(data)
+        self.entry_count += 1
+        self.bytes_written += size
+
+    def _sync_file(self) -> None:
+        if self._sync == "none":
+            return
+        self._file.flush()
+        if self._sync == "fsync":
+            os.fsync(self._file.fileno())
 
     @staticmethod
     def load(path: Path) -> list[dict[str, Any]]:
         """Load JSONL log file and return list of JSON objects.
 
-        Skips separator lines (----------) used for session resume.
+        Skips separator lines (----------) used for session resume, and
+        lines that aren't valid JSON (agent output is logged verbatim).
+        Compressed and archived logs are decompressed transparently.
         """
         entries = []
-        with open(path, encoding="utf-8") as f:
+        with io.TextIOWrapper(open_log(path), encoding="utf-8", errors="replace") as f:
             for line in f:
                 line = line.strip()
                 if line and line != RESUME_SEPARATOR:
-                    entries.append(json.loads(line))
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
         return entries
+
+    @staticmethod
+    def read_header(path: Path) -> list[dict[str, Any]]:
+        """Load only the leading aiwr_* entries (aiwr_start, aiwr_meta).
+
+        Stops at the first agent entry, so the rest of the file is never read,
+        and at the first line that isn't valid JSON (agent output is logged
+        verbatim).
+        """
+        header = []
+        with io.TextIOWrapper(open_log(path), encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith(AIWR_ENTRY_PREFIX):
+                    break
+                try:
+                    header.append(json.loads(line))
+                except ValueError:
+                    break
+        return header
+
+    @staticmethod
+    def read_summary(path: Path) -> dict[str, Any] | None:
+        """Read the aiwr_summary trailer from the end of a log.
+
+        Only the last line is read. Returns None for logs without a trailer
+        (older files, or a run that never reached finalize) and for a last
+        line that isn't valid JSON.
+        """
+        last_line = _read_last_line(path)
+        if not last_line.startswith(SUMMARY_PREFIX):
+            return None
+        try:
+            return json.loads(last_line)
+        except ValueError:
+            return None
+
+
+def _read_last_line(path: Path) -> bytes:
+    """Return the last non-empty line of a file, reading backwards in blocks.
+
+    Compressed and archived logs can't seek, so they are read through.
+    """
+    if not is_plain(path):
+        last_line = b""
+        with open_log(path) as f:
+            for line in f:
+                if line.strip():
+                    last_line = line
+        return last_line.strip()
+
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+
+        while pos > 0:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+
+            stripped = tail.rstrip(b"\r\n")
+            newline = stripped.rfind(b"\n")
+            if newline >= 0:
+                return stripped[newline + 1:]
+
+        return tail.strip()
+
+
+def _touch_dir(path: Path) -> None:
+    """Bump the mtime of a log's directory.
+
+    Writing to a log changes no directory, but per-day caches (--stats)
+    are invalidated by directory mtimes.
+    """
+    try:
+        os.utime(path.parent)
+    except OSError:
+        pass
+
+
+def _lock_dir(path: Path) -> Path:
+    """Logs tree a log belongs to, for its layout lock."""
+    logs_dir = get_logs_dir()
+    return logs_dir if path.is_relative_to(logs_dir) else path.parent
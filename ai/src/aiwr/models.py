@@ -28,6 +28,14 @@ MODELS = {
     "opencode": [
         {"alias": "glm", "default": True, "model_id": "cerebras/zai-glm-4.6", "extra_args": []},
     ],
+    # The "model" of a replay is the agent that recorded the log
+    "replay": [
+        {"alias": "auto", "default": True, "model_id": "auto", "extra_args": []},
+        {"alias": "claude", "default": False, "model_id": "claude", "extra_args": []},
+        {"alias": "gemini", "default": False, "model_id": "gemini", "extra_args": []},
+        {"alias": "codex", "default": False, "model_id": "codex", "extra_args": []},
+        {"alias": "opencode", "default": False, "model_id": "opencode", "extra_args": []},
+    ],
 }
 
 
@@ -123,3 +131,26 @@ def merge_extra_args(model_args: list[str], cli_args: list[str]) -> list[str]:
     # Append all CLI args
     result.extend(cli_args)
     return result
+
+
+def build_model_args(agent_name: str, model_alias: str | None, cli_args: list[str]) -> list[str]:
+    """Build agent extra_args for a model: --model, model args, then CLI args.
+
+    Uses the agent's default model when no alias is given. Agents without
+    a model table (plugins) get the CLI args as they are.
+
+    Raises:
+        ValueError: If agent or model not found
+    """
+    if model_alias is None and agent_name not in MODELS:
+        return cli_args
+
+    if model_alias:
+        model_info = resolve_model(agent_name, model_alias)
+    else:
+        model_info = get_default_model(agent_name)
+
+    # Merge extra args: model args + CLI args (CLI overrides)
+    merged_args = merge_extra_args(model_info.extra_args, cli_args)
+
+    return ["--model", model_info.model_id] + merged_args
@@ -0,0 +1,129 @@
+"""Nesting - a run's place in its session tree, passed down through the environment.
+
+Runner exports the running session to its agent, so an `aiwr` call the
+agent makes is nested under it without `--parent` and finds the parent's
+directory without searching the logs tree:
+
+    AIWR_SESSION_ID   - the session (a provisional ID while the agent hasn't
+                        reported its own - resolved through the catalog)
+    AIWR_SESSION_DIR  - directory its children's logs go into (when known)
+    AIWR_ROOT_ID      - root session of the tree
+    AIWR_DEPTH        - its depth, 0 for a top-level session
+
+AIWR_MAX_DEPTH caps the depth, so agents calling aiwr recursively stop.
+"""
+
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+ENV_SESSION_ID = "AIWR_SESSION_ID"
+ENV_SESSION_DIR = "AIWR_SESSION_DIR"
+ENV_ROOT_ID = "AIWR_ROOT_ID"
+ENV_DEPTH = "AIWR_DEPTH"
+NESTING_ENV = (ENV_SESSION_ID, ENV_SESSION_DIR, ENV_ROOT_ID, ENV_DEPTH)
+
+DEFAULT_MAX_DEPTH = 8
+
+
+@dataclass(frozen=True)
+class Nesting:
+    """Parent, root and depth of a run; the default is a top-level run."""
+
+    parent_id: str | None = None
+    parent_dir: Path | None = None  # Where the parent's children go; None means look it up
+    root_id: str | None = None
+    depth: int = 0
+
+    def child(self, session_id: str, session_dir: Path | None) -> "Nesting":
+        """Nesting of the runs started under a session with this nesting."""
+        return Nesting(session_id, session_dir, self.root_id or session_id, self.depth + 1)
+
+    def env(self) -> dict[str, str]:
+        """Environment describing the parent to an agent running as its child."""
+        if self.parent_id is None:
+            return {}
+        env = {
+            ENV_SESSION_ID: self.parent_id,
+            ENV_ROOT_ID: self.root_id or self.parent_id,
+            ENV_DEPTH: str(self.depth - 1),
+        }
+        if self.parent_dir is not None:
+            env[ENV_SESSION_DIR] = str(self.parent_dir)
+        return env
+
+
+def inherited_nesting() -> Nesting:
+    """Nesting of a run started from inside an agent (from its environment)."""
+    parent_id = os.environ.get(ENV_SESSION_ID)
+    if not parent_id:
+        return Nesting()
+
+    try:
+        depth = int(os.environ.get(ENV_DEPTH, "0")) + 1
+    except ValueError:
+        depth = 1
+    parent_dir = os.environ.get(ENV_SESSION_DIR)
+    return Nesting(
+        parent_id=parent_id,
+        parent_dir=Path(parent_dir) if parent_dir else None,
+        root_id=os.environ.get(ENV_ROOT_ID) or parent_id,
+        depth=depth,
+    )
+
+
+def resolve_nesting(parent_id: str | None = None, inherit: bool = True) -> Nesting:
+    """Nesting of a new run.
+
+    Under `parent_id` (--parent) when given - its root and depth come
+    from the catalog; otherwise, with `inherit`, under the session of the
+    agent we run in. Provisional IDs are resolved to the agents' own.
+
+    Raises:
+        ValueError: If the run would be nested deeper than AIWR_MAX_DEPTH
+    """
+    from .session import resolve_session_id, session_lineage
+
+    inherited = inherited_nesting()
+    if parent_id is None and not inherit:
+        nesting = Nesting()
+    elif parent_id is None or parent_id == inherited.parent_id:
+        nesting = inherited
+        if nesting.parent_id and nesting.parent_dir is None:
+            nesting = replace(
+                nesting,
+                parent_id=resolve_session_id(nesting.parent_id),
+                root_id=resolve_session_id(nesting.root_id),
+            )
+    else:
+        lineage = session_lineage(parent_id)
+        nesting = Nesting(parent_id=parent_id, root_id=lineage[-1], depth=len(lineage))
+
+    check_depth(nesting)
+    return nesting
+
+
+def get_max_depth() -> int:
+    """Deepest nesting allowed (AIWR_MAX_DEPTH, 0 - no limit)."""
+    value = os.environ.get("AIWR_MAX_DEPTH")
+    try:
+        max_depth = int(value) if value else DEFAULT_MAX_DEPTH
+    except ValueError:
+        raise ValueError(f"Invalid AIWR_MAX_DEPTH: {value}") from None
+    if max_depth < 0:
+        raise ValueError("AIWR_MAX_DEPTH can't be negative")
+    return max_depth
+
+
+def check_depth(nesting: Nesting) -> None:
+    """Refuse a run nested deeper than AIWR_MAX_DEPTH.
+
+    Raises:
+        ValueError: If the run is too deep
+    """
+    max_depth = get_max_depth()
+    if max_depth and nesting.depth > max_depth:
+        raise ValueError(
+            f"Nesting depth {nesting.depth} exceeds AIWR_MAX_DEPTH={max_depth} "
+            f"(parent session {nesting.parent_id})"
+        )
@@ -0,0 +1,25 @@
+"""Project and logs directory locations - kept import-light for the CLI client."""
+
+import os
+from pathlib import Path
+
+DEFAULT_LOG_DIR = ".aiwr/logs"
+
+
+def get_project_root() -> Path:
+    """Return current working directory as project root."""
+    return Path.cwd()
+
+
+def get_logs_dir() -> Path:
+    """Get the logs directory path."""
+    custom_dir = os.environ.get("AIWR_LOG_DIR")
+    if custom_dir:
+        return Path(custom_dir)
+
+    return get_project_root() / DEFAULT_LOG_DIR
+
+
+def get_daemon_mode() -> str:
+    """Whether commands go through a running daemon (AIWR_DAEMON: auto or off)."""
+    return os.environ.get("AIWR_DAEMON", "auto").lower()
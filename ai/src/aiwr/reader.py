@@ -0,0 +1,154 @@
+"""Random-access reader for JSONL session logs."""
+
+import json
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator
+
+from .logger import RESUME_SEPARATOR
+from .storage import is_plain, read_log_bytes, split_archive_path
+
+INDEX_CACHE_SIZE = 64  # Line-offset indexes kept per process
+
+_SEPARATOR = RESUME_SEPARATOR.encode()
+_index_cache: OrderedDict[tuple, tuple[array, array]] = OrderedDict()
+
+
+class LogReader:
+    """Lazily parsed, random-access view of a JSONL log.
+
+    The file is memory-mapped and a line-offset index is built on first
+    use by scanning for newlines - nothing is parsed. Entries are decoded
+    only when accessed, so head/tail slices and reverse iteration cost the
+    lines you ask for, not the file.
+
+    Separator lines and empty lines are not entries. Lines starting with
+    one of `skip_prefixes` are left out of the index as well.
+
+    Compressed and archived logs can't be mapped; they are decompressed
+    into memory instead.
+    """
+
+    def __init__(self, path: Path, skip_prefixes: tuple[bytes, ...] = (), cache: bool = True):
+        self.path = path
+        self._skip = skip_prefixes
+        self._file = None
+
+        if is_plain(path):
+            self._file = open(path, "rb")
+            stat = os.fstat(self._file.fileno())
+            self._data: mmap.mmap | bytes = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+            )
+        else:
+            archived = split_archive_path(path)
+            stat = os.stat(archived[0] if archived else path)
+            self._data = read_log_bytes(path)
+
+        self._size = len(self._data)
+        self._cache_key = (
+            (str(path), stat.st_ino, stat.st_size, stat.st_mtime_ns, skip_prefixes)
+            if cache else None
+        )
+        self._starts: array | None = None
+        self._ends: array | None = None
+
+    def __enter__(self) -> "LogReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the mapping and the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __len__(self) -> int:
+        self._ensure_index()
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        return json.loads(self.raw(index))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return self._decode(range(len(self)))
+
+    def __reversed__(self) -> Iterator[dict[str, Any]]:
+        return self._decode(range(len(self) - 1, -1, -1))
+
+    def raw(self, index: int) -> bytes:
+        """Return the undecoded bytes of an entry."""
+        self._ensure_index()
+        return self._data[self._starts[index]:self._ends[index]]
+
+    def head(self, count: int) -> list[dict[str, Any]]:
+        """Return the first `count` entries."""
+        return list(self._decode(range(min(count, len(self)))))
+
+    def tail(self, count: int) -> list[dict[str, Any]]:
+        """Return the last `count` entries."""
+        total = len(self)
+        return list(self._decode(range(max(total - count, 0), total)))
+
+    def _decode(self, indices: range) -> Iterator[dict[str, Any]]:
+        """Decode entries, skipping lines that aren't valid JSON.
+
+        Agent output is logged verbatim, so a malformed line can't be
+        ruled out.
+        """
+        for index in indices:
+            try:
+                yield self[index]
+            except ValueError:
+                continue
+
+    def _ensure_index(self) -> None:
+        if self._starts is not None:
+            return
+
+        if self._cache_key in _index_cache:
+            _index_cache.move_to_end(self._cache_key)
+            self._starts, self._ends = _index_cache[self._cache_key]
+            return
+
+        self._starts, self._ends = self._build_index()
+
+        if self._cache_key is not None:
+            _index_cache[self._cache_key] = (self._starts, self._ends)
+            if len(_index_cache) > INDEX_CACHE_SIZE:
+                _index_cache.popitem(last=False)
+
+    def _build_index(self) -> tuple[array, array]:
+        """Find the start/end offset of every entry line."""
+        data = self._data
+        size = self._size
+        starts = array("Q")
+        ends = array("Q")
+        pos = 0
+
+        while pos < size:
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                newline = size
+            start, end = pos, newline
+            pos = newline + 1
+
+            if end > start and data[end - 1] == 0x0D:  # \r
+                end -= 1
+            if end - start <= len(_SEPARATOR):
+                short = data[start:end].strip()
+                if not short or short == _SEPARATOR:
+                    continue
+            if self._skip and data[start:start + 32].startswith(self._skip):
+                continue
+
+            starts.append(start)
+            ends.append(end)
+
+        return starts, ends
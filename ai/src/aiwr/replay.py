@@ -0,0 +1,221 @@
+"""Replay emitter - plays a session log back as agent output.
+
+Spawned by the replay agent as `python -m aiwr.replay LOG [options]`.
+Writes the log's agent events to stdout byte for byte, as the recorded
+agent printed them, with the session ID replaced so the replay gets a
+log of its own. Recorded stderr is written to stderr and the recorded
+exit code is returned.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from .agents import AGENTS
+from .agents.replay import AUTO_MODEL, ReplayAgent
+from .event import parse_log_bytes
+from .logger import AIWR_ENTRY_PREFIX
+from .reader import LogReader
+from .resume import extract_session_info
+from .session import find_session_path
+from .storage import log_exists
+from .timing import strip_offset
+
+TIMINGS = ("fast", "rate", "original")
+DEFAULT_TIMING = "fast"
+DEFAULT_RATE = 100.0  # Events per second with --timing rate
+
+_AIWR_PREFIX = AIWR_ENTRY_PREFIX.encode()
+
+
+class Recording(NamedTuple):
+    """What a session log says the agent did."""
+
+    agent: str
+    events: list[bytes]  # Agent output lines, without newlines
+    offsets: list[float | None]  # Receive offsets, if the log recorded them (AIWR_LOG_TIMING)
+    stderr: list[str]
+    exit_code: int
+    duration: float | None  # Recorded run time, if the run finished
+
+
+def resolve_log(target: str) -> Path:
+    """Return the log to replay: a path, or the log of a session ID.
+
+    Raises:
+        ValueError: If there is no such log
+    """
+    path = Path(target)
+    if path.suffix == ".jsonl" and log_exists(path):
+        return path
+
+    session_path = find_session_path(target)
+    if session_path is None:
+        raise ValueError(f"Session not found: {target}")
+    return session_path
+
+
+def source_agent(path: Path) -> str:
+    """Return the agent that recorded a log - the replayed one for a replay.
+
+    Raises:
+        ValueError: If the log wasn't recorded by a known agent
+    """
+    info = extract_session_info(path)
+    agent_name = info.model if info.agent == "replay" else info.agent
+    agent = AGENTS.get(agent_name) if agent_name else None
+    if agent is None or isinstance(agent, ReplayAgent):
+        raise ValueError(f"Can't replay a log of agent: {agent_name}")
+    return agent_name
+
+
+def load_recording(path: Path) -> Recording:
+    """Split a log into agent events and aiwr's own records.
+
+    Spliced receive offsets are taken out of the events, so they are
+    replayed exactly as the agent printed them.
+    """
+    events: list[bytes] = []
+    offsets: list[float | None] = []
+    stderr: list[str] = []
+    exit_code = 0
+    duration = None
+
+    with LogReader(path) as reader:
+        for index in range(len(reader)):
+            raw = reader.raw(index)
+            if not raw.startswith(_AIWR_PREFIX):
+                raw, offset = strip_offset(raw)
+                events.append(raw)
+                offsets.append(offset)
+                continue
+
+            try:
+                entry = reader[index]
+            except ValueError:
+                continue
+            if entry.get("type") == "aiwr_stderr":
+                stderr.extend(entry.get("lines", []))
+            elif entry.get("type") == "aiwr_summary":
+                exit_code = entry.get("exit_code") or 0
+                if entry.get("duration") is not None:
+                    duration = (duration or 0.0) + entry["duration"]
+
+    return Recording(source_agent(path), events, offsets, stderr, exit_code, duration)
+
+
+def rewrite_session_ids(recording: Recording, session_id: str) -> list[bytes]:
+    """Replace the recorded session IDs with `session_id`, in the raw bytes."""
+    agent = AGENTS[recording.agent]
+    want = frozenset({"session_id"})
+    old_ids = set()
+    for raw in recording.events:
+        event = parse_log_bytes(raw)
+        if event is not None:
+            found = agent.classify(event, want).session_id
+            if found:
+                old_ids.add(found.encode())
+
+    new_id = session_id.encode()
+    events = []
+    for raw in recording.events:
+        for old_id in old_ids:
+            if old_id in raw:
+                raw = raw.replace(old_id, new_id)
+        events.append(raw)
+    return events
+
+
+def schedule(recording: Recording, timing: str, rate: float) -> list[float] | None:
+    """Offsets (seconds from start) to emit each event at; None for as fast as possible.
+
+    Original timing uses the recorded receive offsets. Logs written
+    without them spread the recorded run duration evenly over the events.
+    """
+    count = len(recording.events)
+    if timing == "rate":
+        return [index / rate for index in range(count)]
+    if timing == "original" and count and None not in recording.offsets:
+        # Each run of a resumed log starts again at 0 - play runs back to back
+        offsets: list[float] = []
+        base = last = 0.0
+        for offset in recording.offsets:
+            if offset + base < last:
+                base = last
+            last = offset + base
+            offsets.append(last)
+        return offsets
+    if timing == "original" and recording.duration and count:
+        step = recording.duration / count
+        return [index * step for index in range(count)]
+    return None
+
+
+def emit(events: list[bytes], offsets: list[float] | None, out: BinaryIO) -> None:
+    """Write events as lines, on schedule."""
+    if offsets is None:
+        out.writelines(raw + b"\n" for raw in events)
+        out.flush()
+        return
+
+    started = time.monotonic()
+    for raw, offset in zip(events, offsets):
+        delay = started + offset - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        out.write(raw + b"\n")
+        out.flush()
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m aiwr.replay",
+        description="Play a session log back as the recorded agent's output",
+    )
+    parser.add_argument("log", help="Session log path or session ID")
+    parser.add_argument(
+        "--timing",
+        choices=TIMINGS,
+        default=DEFAULT_TIMING,
+        help=f"Event pacing (default: {DEFAULT_TIMING})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"Events per second with --timing rate (default: {DEFAULT_RATE:g})",
+    )
+    parser.add_argument("--session-id", help="Session ID to report (default: a new one)")
+    parser.add_argument("--model", help="Agent the log must have been recorded by (default: any)")
+    args = parser.parse_args()
+
+    try:
+        if args.rate <= 0:
+            raise ValueError("--rate must be positive")
+        recording = load_recording(resolve_log(args.log))
+        if args.model not in (None, AUTO_MODEL) and args.model != recording.agent:
+            raise ValueError(f"Log was recorded by {recording.agent}, not {args.model}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    events = rewrite_session_ids(recording, args.session_id or str(uuid.uuid4()))
+    try:
+        emit(events, schedule(recording, args.timing, args.rate), sys.stdout.buffer)
+    except BrokenPipeError:
+        # Reader went away (runner interrupted) - don't complain at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+    for line in recording.stderr:
+        print(line, file=sys.stderr)
+    return recording.exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,106 +1,192 @@
 """Resume functionality - building context prompts from previous sessions."""
 
+import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from .agents import get_agent
+from .agents import AGENTS
+from .context import MIN_SESSION_BUDGET, build_context, get_context_budget
+from .context_cache import ContextCache, open_context_cache
 from .logger import Logger
-from .session import find_children, find_session_path, get_parent_id
+from .reader import LogReader
+from .session import (
+    SessionIndex,
+    find_session_path,
+    get_logs_dir,
+    resolve_session_id,
+    scan_sessions,
+    scan_tree,
+)
+
+# aiwr's own records that carry no session content
+BOOKKEEPING_TYPES = ("aiwr_meta", "aiwr_timing", "aiwr_summary")
+BOOKKEEPING_PREFIXES = tuple(f'{{"type": "{t}"'.encode() for t in BOOKKEEPING_TYPES)
+
+SCAN_ROLES = frozenset({"result", "status"})  # Roles read from every entry of a log scan
 
 
 @dataclass
 class SessionInfo:
-    """Extracted session information from JSONL."""
+    """Extracted session information from JSONL.
+
+    Holds metadata only; entries are read on demand with `reader()`.
+    """
 
     session_id: str
     agent: str
     prompt: str | None
     status: str | None
     result: str | None
-    entries: list[dict[str, Any]]
+    path: Path
+    model: str | None = None
+
+    def reader(self) -> LogReader:
+        """Open a lazy reader over the session's content entries."""
+        return LogReader(self.path, skip_prefixes=BOOKKEEPING_PREFIXES)
 
 
 def extract_session_info(session_path: Path) -> SessionInfo:
-    """Extract session metadata from JSONL file."""
-    entries = Logger.load(session_path)
+    """Extract session metadata from JSONL file.
+
+    The aiwr_summary trailer is read from the end of the file and the body
+    is never parsed. Logs without a trailer fall back to a lazy scan.
+    """
     session_id = session_path.stem
 
-    # Detect agent from init entry
-    agent_name = "claude"  # default
-    for entry in entries:
+    summary = Logger.read_summary(session_path)
+    if summary is not None:
+        return SessionInfo(
+            session_id=session_id,
+            agent=summary.get("agent") or "claude",
+            prompt=summary.get("prompt"),
+            status=summary.get("status"),
+            result=summary.get("result"),
+            path=session_path,
+            model=summary.get("model"),
+        )
+
+    with LogReader(session_path) as reader:
+        agent_name, model = _detect_agent(session_path, reader)
+        agent = AGENTS.get(agent_name)
+        if agent is not None:
+            agent = agent.event_agent(model)
+
+        # Extract metadata using the agent's event rules
+        want = SCAN_ROLES | {"prompt"}
+        start_prompt = None
+        prompt = None
+        status = None
+        result = None
+
+        for entry in reader:
+            entry_type = entry.get("type")
+            if entry_type == "aiwr_start":
+                start_prompt = start_prompt or entry.get("prompt")
+                continue
+            if entry_type == "aiwr_summary":
+                # Trailer of a finished run - authoritative for agents we can't parse
+                status = entry.get("status") or status
+                result = entry.get("result") or result
+                continue
+            if agent is None or entry_type in BOOKKEEPING_TYPES:
+                continue
+
+            roles = agent.classify(entry, want)
+            if isinstance(roles.prompt, str):
+                prompt = roles.prompt
+                want = SCAN_ROLES
+            if roles.result:
+                result = roles.result
+            if roles.status:
+                status = roles.status
+
+    return SessionInfo(
+        session_id=session_id,
+        agent=agent_name,
+        prompt=prompt or start_prompt,
+        status=status,
+        result=result,
+        path=session_path,
+        model=model,
+    )
+
+
+def _detect_agent(session_path: Path, reader: LogReader) -> tuple[str, str | None]:
+    """Get the agent name and model recorded in aiwr_start.
+
+    Logs written before aiwr_start existed are recognized by their entries.
+    """
+    for entry in Logger.read_header(session_path):
+        if entry.get("type") == "aiwr_start" and entry.get("agent"):
+            return entry["agent"], entry.get("model")
+
+    for entry in reader:
         if entry.get("type") == "init":
             # Gemini has session_id in init
             if "session_id" in entry:
-                agent_name = "gemini"
-                break
+                return "gemini", None
         if entry.get("type") == "thread.started":
             # Codex has thread_id
-            agent_name = "codex"
-            break
+            return "codex", None
         if "session_id" in entry and entry.get("type") != "aiwr_meta":
             # Claude has session_id
-            agent_name = "claude"
-            break
-
-    agent = get_agent(agent_name)
+            return "claude", None
 
-    # Extract metadata using agent methods
-    prompt = None
-    status = None
-    result = None
+    return "claude", None  # default
 
-    for entry in entries:
-        if entry.get("type") == "aiwr_meta":
-            continue
 
-        if prompt is None:
-            prompt = agent.extract_prompt(entry)
-
-        extracted_result = agent.extract_result(entry)
-        if extracted_result:
-            result = extracted_result
-
-        extracted_status = agent.extract_status(entry)
-        if extracted_status:
-            status = extracted_status
-
-    return SessionInfo(
-        session_id=session_id,
-        agent=agent_name,
-        prompt=prompt,
-        status=status,
-        result=result,
-        entries=entries,
-    )
-
-
-def build_resume_prompt(session_id: str, additional_prompt: str | None = None) -> str:
+def build_resume_prompt(
+    session_id: str,
+    additional_prompt: str | None = None,
+    budget: int | None = None,
+) -> str:
     """
     Build a context prompt for resuming a single session.
 
     Includes the previous session's context and optionally additional instructions.
+    The context is cut to `budget` tokens (default: AIWR_CONTEXT_BUDGET).
     """
+    budget = get_context_budget(budget)
     session_path = find_session_path(session_id)
     if not session_path:
         raise ValueError(f"Session not found: {session_id}")
 
     info = extract_session_info(session_path)
-    return _format_single_session(info, additional_prompt)
+    return _format_single_session(info, additional_prompt, budget)
 
 
-def build_resume_tree_prompt(session_id: str, additional_prompt: str | None = None) -> str:
+def build_resume_tree_prompt(
+    session_id: str,
+    additional_prompt: str | None = None,
+    budget: int | None = None,
+) -> str:
     """
     Build a context prompt for resuming a session tree.
 
     Includes the root session and all its children recursively.
+    The sessions share `budget` tokens evenly (default: AIWR_CONTEXT_BUDGET).
+    Blocks of sessions whose logs haven't changed come from the context cache.
+    The tree is looked up in the catalog, which also resolves a provisional
+    ID; without one every log header is scanned.
     """
-    session_path = find_session_path(session_id)
+    budget = get_context_budget(budget)
+    session_id = resolve_session_id(session_id)
+    index = scan_tree(session_id) or scan_sessions()
+    session_path = index.paths.get(session_id)
     if not session_path:
         raise ValueError(f"Session not found: {session_id}")
 
-    info = extract_session_info(session_path)
-    tree_context = _format_session_tree(info, depth=0)
+    if budget:
+        budget = max(budget // _count_tree(session_id, index, set()), MIN_SESSION_BUDGET)
+
+    cache = open_context_cache(get_logs_dir())
+    tree_context = _format_session_tree(session_path, index, budget, cache, depth=0)
+    if cache is not None:
+        try:
+            cache.trim()
+        except sqlite3.Error:
+            pass
 
     prompt_parts = [
         "[PREVIOUS SESSION TREE]",
@@ -117,9 +203,9 @@ def build_resume_tree_prompt(session_id: str, additional_prompt: str | None = No
     return "\n".join(prompt_parts)
 
 
-def _format_single_session(info: SessionInfo, additional_prompt: str | None = None) -> str:
+def _format_single_session(info: SessionInfo, additional_prompt: str | None, budget: int) -> str:
     """Format a single session for resumption."""
-    output_text = _extract_output_text(info)
+    output_text = _extract_output_text(info, budget)
 
     prompt_parts = [
         "[PREVIOUS SESSION CONTEXT]",
@@ -143,53 +229,81 @@ def _format_single_session(info: SessionInfo, additional_prompt: str | None = No
     return "\n".join(prompt_parts)
 
 
-def _format_session_tree(info: SessionInfo, depth: int = 0) -> str:
+def _format_session_tree(
+    session_path: Path,
+    index: SessionIndex,
+    budget: int,
+    cache: ContextCache | None,
+    depth: int = 0,
+) -> str:
     """Format a session and all its children as a tree."""
     indent = "  " * depth
-    output_text = _extract_output_text(info, max_lines=50)
+    session_id = session_path.stem
+    block = _session_block(session_path, budget, cache)
 
     if depth == 0:
-        header = f"== Root Session: {info.session_id} ({info.agent}) =="
+        header = f"== Root Session: {session_id} ({block['agent']}) =="
     else:
-        header = f"{indent}== Child Session: {info.session_id} ({info.agent}) =="
+        header = f"{indent}== Child Session: {session_id} ({block['agent']}) =="
 
     parts = [
         header,
-        f"{indent}Prompt: {info.prompt or 'unknown'}",
-        f"{indent}Status: {info.status or 'unknown'}",
+        f"{indent}Prompt: {block['prompt'] or 'unknown'}",
+        f"{indent}Status: {block['status'] or 'unknown'}",
         f"{indent}Output:",
-        _indent_text(output_text, indent + "  "),
+        _indent_text(block["output"], indent + "  "),
     ]
 
     # Add children recursively
-    children = find_children(info.session_id)
-    for child_id in children:
-        child_path = find_session_path(child_id)
+    for child_id in index.children.get(session_id, []):
+        child_path = index.paths.get(child_id)
         if child_path:
-            child_info = extract_session_info(child_path)
             parts.append("")
-            parts.append(_format_session_tree(child_info, depth + 1))
+            parts.append(_format_session_tree(child_path, index, budget, cache, depth + 1))
 
     return "\n".join(parts)
 
 
-def _extract_output_text(info: SessionInfo, max_lines: int | None = None) -> str:
-    """Extract text from JSONL entries."""
-    import json
+def _session_block(session_path: Path, budget: int, cache: ContextCache | None) -> dict[str, Any]:
+    """Metadata and context of one session, unindented - cached per log file."""
+    if cache is not None:
+        try:
+            block = cache.get(session_path, budget)
+            if block is not None:
+                return block
+        except (sqlite3.Error, OSError, ValueError):
+            cache = None
 
-    lines = []
-    for entry in info.entries:
-        if entry.get("type") == "aiwr_meta":
-            continue
-        # Include all JSON entries as text
-        lines.append(json.dumps(entry, ensure_ascii=False))
+    info = extract_session_info(session_path)
+    block = {
+        "agent": info.agent,
+        "prompt": info.prompt,
+        "status": info.status,
+        "output": _extract_output_text(info, budget),
+    }
+
+    if cache is not None:
+        try:
+            cache.put(session_path, budget, block)
+        except (sqlite3.Error, OSError, ValueError):
+            pass
+    return block
+
+
+def _count_tree(session_id: str, index: SessionIndex, seen: set[str]) -> int:
+    """Count the sessions of a tree (cycle-safe)."""
+    seen.add(session_id)
+    return 1 + sum(
+        _count_tree(child_id, index, seen)
+        for child_id in index.children.get(session_id, [])
+        if child_id not in seen
+    )
 
-    if max_lines and len(lines) > max_lines:
-        # Keep first and last parts
-        half = max_lines // 2
-        lines = lines[:half] + ["...", f"[{len(lines) - max_lines} lines omitted]", "..."] + lines[-half:]
 
-    return "\n".join(lines)
+def _extract_output_text(info: SessionInfo, budget: int) -> str:
+    """Extract the session's context, cut to `budget` tokens (0 = no limit)."""
+    with info.reader() as reader:
+        return build_context(reader, info.agent, budget, info.model)
 
 
 def _indent_text(text: str, indent: str) -> str:
@@ -198,10 +312,16 @@ def _indent_text(text: str, indent: str) -> str:
 
 
 def get_session_agent(session_id: str) -> str:
-    """Get the agent name used in a session."""
+    """Get the agent name used in a session.
+
+    A replayed session reports the agent it played back.
+    """
     session_path = find_session_path(session_id)
     if not session_path:
         raise ValueError(f"Session not found: {session_id}")
 
     info = extract_session_info(session_path)
+    agent = AGENTS.get(info.agent)
+    if agent is not None:
+        return agent.event_agent(info.model).name
     return info.agent
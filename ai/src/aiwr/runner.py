@@ -1,59 +1,149 @@
 """Runner - executes AI agents and streams output."""
 
+import asyncio
 import json
+import os
 import shlex
 import shutil
 import signal
-import subprocess
 import sys
+import time
 import uuid
-from typing import Any
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
 
-from .agents.base import BaseAgent
+from .agents.base import EVENT_ROLES, BaseAgent
+from .event import LogEvent
 from .logger import Logger
-from .session import get_log_path, register_child
+from .nesting import NESTING_ENV, Nesting
+from .session import get_log_path, record_alias, record_session, register_child, session_dir_of
+from .timing import RunTiming, get_event_timing, splice_offset
+
+INTERRUPT_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+KILL_TIMEOUT = 5  # Seconds between SIGTERM and SIGKILL on interrupt
+STDERR_TAIL_LINES = 200  # Stderr lines kept for the log of a failed run
+STDERR_LINE_LIMIT = 4096  # Characters kept per stderr line
+STREAM_LIMIT = 1024 * 1024  # Pipe buffer: most lines fit, so they arrive as one bytes object
+
+
+@dataclass
+class RunResult:
+    """Outcome of a finished run."""
+
+    agent: str
+    model: str | None
+    session_id: str | None
+    status: str | None
+    result: str | None
+    exit_code: int
+    duration: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the result as a JSON-serializable dict."""
+        return asdict(self)
 
 
 class Runner:
-    """Runs AI agents with logging and interrupt handling."""
+    """Runs AI agents with logging and interrupt handling.
+
+    Status lines (aiwr_start, session_id, result) are printed to stdout as
+    JSON, or passed to `emit` when given - used when several runners share
+    one terminal.
+
+    The agent's environment describes the running session (nesting.py).
+    When its ID is known before the start - a continued session, or an
+    agent that takes a new session's ID (`new_session_flag`) - the log is
+    opened and catalogued before the agent is spawned; otherwise children
+    get a provisional ID, aliased to the real one once the agent reports it.
+    """
 
     def __init__(
         self,
         agent: BaseAgent,
         prompt: str,
         extra_args: list[str] | None = None,
-        parent_id: str | None = None,
+        nesting: Nesting | None = None,
         session_id: str | None = None,
         debug: bool = False,
+        emit: Callable[[dict[str, Any]], None] | None = None,
     ):
         self.agent = agent
         self.prompt = prompt
         self.extra_args = extra_args or []
-        self.parent_id = parent_id
+        self.nesting = nesting or Nesting()
+        self.parent_id = self.nesting.parent_id
         self.session_id = session_id  # Existing session to continue
         self.debug = debug
+        self.result: RunResult | None = None
+        self._emit = emit or print_json
 
-        self.cmd = agent.build_command(prompt, self.extra_args, session_id)
-        self.logger = Logger(is_resume=session_id is not None)
+        # Pick the ID of a new session for agents that accept one
+        preset_id = session_id
+        if preset_id is None and agent.new_session_flag:
+            preset_id = _flag_value(self.extra_args, agent.new_session_flag)
+            if preset_id is None:
+                preset_id = str(uuid.uuid4())
+                self.extra_args = [*self.extra_args, agent.new_session_flag, preset_id]
 
-        self._process: subprocess.Popen[bytes] | None = None
-        self._agent_session_id: str | None = None  # Session ID from agent output
+        self.cmd = agent.build_command(prompt, self.extra_args, session_id)
+        self.logger = Logger(is_resume=session_id is not None, streaming=True)
+
+        self._process: asyncio.subprocess.Process | None = None
+        self._stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        self._interrupt_signal: int | None = None
+        self._kill_task: asyncio.TimerHandle | None = None
+        self._log_session_id: str | None = None  # Session ID the log is stored under
+        self._preset_id = preset_id  # Session ID known before the start
+        self._run_id = preset_id or str(uuid.uuid4())  # Session ID exported to the agent
+        self._session_dir: Path | None = None  # Where children of this session go
         self._accumulated_result: str = ""
+        self._status: str | None = None
+        self._agent_prompt: str | None = None  # First prompt reported by the agent
+        self._want = EVENT_ROLES  # Roles still asked of each event
+        self._started_at = time.time()
+        self._timing = RunTiming()
+        self._event_timing = get_event_timing()  # Splice receive offsets into events
+        self._watch_items = True  # Until the first assistant text and tool call are seen
 
-        print("Start agent...", flush=True)
+        if emit is None:
+            print("Start agent...", flush=True)
 
         # Output first JSON with prompt/agent/model and save to log
-        model = agent.get_model(self.extra_args)
-        first_json = {"type": "aiwr_start", "prompt": prompt, "agent": agent.name, "model": model}
-        print(json.dumps(first_json, ensure_ascii=False), flush=True)
+        self._model = agent.get_model(self.extra_args, prompt)
+        self._events = agent.event_agent(self._model)  # Reads the agent's output
+        first_json = {"type": "aiwr_start", "prompt": prompt, "agent": agent.name, "model": self._model}
+        self._emit(first_json)
         self.logger.append(first_json)
 
         # Add parent meta entry if this is a child session
-        if parent_id:
-            self.logger.append({"type": "aiwr_meta", "parent_id": parent_id})
+        if self.parent_id:
+            self.logger.append({"type": "aiwr_meta", "parent_id": self.parent_id})
 
     def run(self) -> int:
         """Run the agent and return exit code."""
+        return asyncio.run(self._main())
+
+    async def _main(self) -> int:
+        """Run the agent with interrupt handlers installed on the event loop."""
+        loop = asyncio.get_running_loop()
+        for sig in INTERRUPT_SIGNALS:
+            loop.add_signal_handler(sig, self.interrupt, sig)
+
+        try:
+            return await self.run_async()
+        finally:
+            for sig in INTERRUPT_SIGNALS:
+                loop.remove_signal_handler(sig)
+
+    async def run_async(self) -> int:
+        """Execute the agent process and return exit code.
+
+        stdout and stderr are drained concurrently, so a chatty stderr
+        can't fill its pipe and stall the agent. Once stdout closes we
+        simply wait for the process to exit.
+        """
         # Print debug command if requested
         if self.debug:
             print(f"[DEBUG] {shlex.join(self.cmd)}", flush=True)
@@ -61,108 +151,278 @@ class Runner:
         # Check if agent command exists
         if not shutil.which(self.agent.command):
             print(f"Error: {self.agent.command} not found in PATH", file=sys.stderr)
+            self.result = self._make_result(1)
             return 1
 
-        # Setup interrupt handler
-        original_handler = signal.getsignal(signal.SIGINT)
-        signal.signal(signal.SIGINT, self._handle_interrupt)
+        if self._preset_id is not None:
+            self._open_log(self._preset_id)
+
+        env = {name: value for name, value in os.environ.items() if name not in NESTING_ENV}
+        env.update(self.nesting.child(self._run_id, self._session_dir).env())
+        self._process = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+            env=env,
+        )
+        self._timing.mark("spawn")
+        if self._interrupt_signal is not None:
+            self._process.terminate()  # Interrupted while spawning
 
-        try:
-            return self._execute()
-        finally:
-            signal.signal(signal.SIGINT, original_handler)
-
-    def _execute(self) -> int:
-        """Execute the agent process."""
-        self._process = subprocess.Popen(
-            self.cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        await asyncio.gather(
+            self._drain_stdout(self._process.stdout),
+            self._drain_stderr(self._process.stderr),
+        )
+        returncode = await self._process.wait()
+        self._timing.mark("exit")
+
+        if self._kill_task:
+            self._kill_task.cancel()
+
+        self._finalize(returncode)
+
+        if self._interrupt_signal is not None:
+            returncode = 128 + self._interrupt_signal
+
+        self.result = self._make_result(returncode)
+        return returncode
+
+    def _make_result(self, exit_code: int) -> RunResult:
+        return RunResult(
+            agent=self.agent.name,
+            model=self._model,
+            session_id=self._log_session_id,
+            status=self._status,
+            result=self._accumulated_result or None,
+            exit_code=exit_code,
+            duration=round(time.time() - self._started_at, 3),
         )
 
-        # Read output in real-time
+    async def _drain_stdout(self, stream: asyncio.StreamReader) -> None:
+        """Feed stdout lines to the agent hooks as they arrive."""
+        first = await stream.read(1)
+        if not first:
+            return
+        self._timing.mark("first_byte")
+        self._handle_stdout(first if first == b"\n" else first + await _readline(stream))
+
         while True:
-            if self._process.stdout:
-                line = self._process.stdout.readline()
-                if line:
-                    self._handle_stdout(line)
-                elif self._process.poll() is not None:
-                    break
-            else:
+            line = await _readline(stream)
+            if not line:
                 break
+            self._handle_stdout(line)
 
-        # Drain stderr (don't pass through to terminal)
-        if self._process.stderr:
-            self._process.stderr.read()
-
-        self._finalize()
-        return self._process.returncode
+    async def _drain_stderr(self, stream: asyncio.StreamReader) -> None:
+        """Keep the tail of stderr (don't pass through to terminal)."""
+        while True:
+            line = await _readline(stream)
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace").rstrip("\n")
+            self._stderr_tail.append(text[:STDERR_LINE_LIMIT])
 
     def _handle_stdout(self, data: bytes) -> None:
-        """Handle stdout data."""
-        text = data.decode("utf-8", errors="replace")
+        """Handle stdout data.
 
-        # Use agent to parse and validate JSON
-        json_data = self.agent.parse_log_entry(text)
+        The line stays bytes: it is logged verbatim and the extractors
+        decode only what they look at.
+        """
+        json_data = self._events.parse_log_bytes(data)
         if json_data is None:
             # Not valid JSON - ignore (garbage output)
             return
 
         # Log the valid JSON entry
-        self.logger.append(json_data)
+        if self._event_timing:
+            self.logger.append(LogEvent(splice_offset(json_data.raw, self._timing.elapsed())))
+        else:
+            self.logger.append(json_data)
 
-        # Extract session ID from first JSON
-        if self._agent_session_id is None:
-            agent_session_id = self.agent.extract_session_id(json_data)
-            if agent_session_id:
-                self._agent_session_id = agent_session_id
+        roles = self._events.classify(json_data, self._want)
+
+        if self._watch_items:
+            self._mark_items(json_data)
+        if roles.final:
+            self._timing.mark("final")
 
-                # Output session ID to stdout
-                print(json.dumps({"session_id": agent_session_id, "agent": self.agent.name}, ensure_ascii=False), flush=True)
+        # Extract session ID from first JSON
+        if roles.session_id:
+            self._timing.mark("session_id")
+            self._want -= {"session_id"}
 
-                # Use provided session_id for logging, or agent's session_id for new sessions
-                effective_session_id = self.session_id or agent_session_id
-                log_path = get_log_path(effective_session_id, self.parent_id)
-                self.logger.set_log_path(log_path)
+            # Output session ID to stdout
+            self._emit({"session_id": roles.session_id, "agent": self.agent.name})
 
-                # Register with parent if applicable (only for new sessions)
-                if self.parent_id and not self.session_id:
-                    register_child(self.parent_id, effective_session_id)
+            # Use provided session_id for logging, or agent's session_id for new sessions
+            if self._log_session_id is None:
+                # Children started meanwhile know the session by its provisional ID
+                record_alias(self._run_id, roles.session_id)
+                self._open_log(roles.session_id)
 
         # Handle result accumulation
-        if self.agent.should_reset_result(json_data):
+        if roles.reset:
             self._accumulated_result = ""
 
         # Extract and accumulate result
-        result = self.agent.extract_result(json_data)
-        if result:
-            self._accumulated_result += result
+        if roles.result:
+            self._accumulated_result += roles.result
+
+        if roles.status:
+            self._status = roles.status
+
+        if isinstance(roles.prompt, str):
+            self._agent_prompt = roles.prompt
+            self._want -= {"prompt"}
+
+    def _open_log(self, session_id: str) -> None:
+        """Start logging under a session ID and make the running session
+        visible to nested calls."""
+        log_path = get_log_path(session_id, self.parent_id, self.nesting.parent_dir)
+        self.logger.set_log_path(log_path)
+        self._log_session_id = session_id
+        self._session_dir = session_dir_of(log_path)
+
+        record_session(
+            session_id,
+            log_path,
+            parent_id=self.parent_id,
+            agent=self.agent.name,
+            model=self._model,
+            status="running",
+            started_at=self._started_at,
+        )
 
-    def _handle_interrupt(self, signum: int, frame: Any) -> None:
-        """Handle Ctrl+C interrupt."""
-        if self._process:
+        # Register with parent if applicable (only for new sessions)
+        if self.parent_id and not self.session_id:
+            register_child(self.parent_id, session_id)
+
+    def _mark_items(self, json_data: LogEvent) -> None:
+        """Time the first assistant text and the first tool call."""
+        for item in self._events.context_items(json_data):
+            if item.role == "assistant":
+                self._timing.mark("first_text")
+            elif item.role == "tool":
+                self._timing.mark("first_tool")
+
+        marks = self._timing.marks
+        if "final" in marks or ("first_text" in marks and "first_tool" in marks):
+            self._watch_items = False
+
+    def interrupt(self, signum: int = signal.SIGINT) -> None:
+        """Stop the agent (Ctrl+C / SIGTERM).
+
+        Sends SIGTERM and escalates to SIGKILL after a grace period. The
+        session is finalized by run_async once the process has exited.
+        """
+        if self._interrupt_signal is not None:
+            return
+
+        self._interrupt_signal = signum
+        if self._status is None:
+            self._status = "interrupted"
+
+        if self._process and self._process.returncode is None:
             self._process.terminate()
-            try:
-                self._process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
+            self._kill_task = asyncio.get_running_loop().call_later(
+                KILL_TIMEOUT, self._kill
+            )
 
-        self._finalize()
-        sys.exit(130)
+    def _kill(self) -> None:
+        if self._process and self._process.returncode is None:
+            self._process.kill()
 
-    def _finalize(self) -> None:
+    def _finalize(self, returncode: int | None = None) -> None:
         """Finalize the session - ensure log is saved."""
-        # If no session ID was found, generate one or use provided
-        if self._agent_session_id is None:
-            effective_session_id = self.session_id or str(uuid.uuid4())[:8]
-            log_path = get_log_path(effective_session_id, self.parent_id)
+        from .search import index_session  # sqlite3 only once a run ends
+
+        # Keep stderr of failed runs for diagnosis
+        if returncode and self._stderr_tail:
+            self.logger.append({
+                "type": "aiwr_stderr",
+                "exit_code": returncode,
+                "lines": list(self._stderr_tail),
+            })
+
+        # If no session ID was found, generate one
+        if self._log_session_id is None:
+            effective_session_id = str(uuid.uuid4())[:8]
+            log_path = get_log_path(effective_session_id, self.parent_id, self.nesting.parent_dir)
             self.logger.set_log_path(log_path)
+            self._log_session_id = effective_session_id
 
-            if self.parent_id and not self.session_id:
+            if self.parent_id:
                 register_child(self.parent_id, effective_session_id)
 
         # Output result to stdout
         if self._accumulated_result:
-            print(json.dumps({"result": self._accumulated_result, "agent": self.agent.name}, ensure_ascii=False), flush=True)
-
-        self.logger.save()
+            self._emit({"result": self._accumulated_result, "agent": self.agent.name})
+
+        self.logger.append(self._timing.entry())
+
+        # Trailer with everything --list needs, readable from the file's tail
+        self.logger.append({
+            "type": "aiwr_summary",
+            "agent": self.agent.name,
+            "model": self._model,
+            "prompt": self._agent_prompt or self.prompt,
+            "status": self._status,
+            "result": self._accumulated_result or None,
+            "entries": self.logger.entry_count,
+            "bytes": self.logger.bytes_written,
+            "duration": round(time.time() - self._started_at, 3),
+            "exit_code": returncode,
+        })
+
+        saved_path = self.logger.save()
+        if saved_path and self._log_session_id:
+            record_session(
+                self._log_session_id,
+                saved_path,
+                parent_id=self.parent_id,
+                agent=self.agent.name,
+                model=self._model,
+                status=self._status or "unknown",
+                started_at=self._started_at,
+                ended_at=time.time(),
+            )
+            index_session(saved_path)
+
+
+def _flag_value(args: list[str], flag: str) -> str | None:
+    """Value of `flag` in an argument list (`--flag value` or `--flag=value`)."""
+    for i, arg in enumerate(args):
+        if arg == flag and i + 1 < len(args):
+            return args[i + 1]
+        if arg.startswith(flag + "="):
+            return arg[len(flag) + 1:]
+    return None
+
+
+def print_json(data: dict[str, Any]) -> None:
+    """Print a status line as JSON to stdout."""
+    print(json.dumps(data, ensure_ascii=False), flush=True)
+
+
+def discard_json(data: dict[str, Any]) -> None:
+    """Drop a status line - for runners whose results are reported together (fan-out, batch)."""
+
+
+async def _readline(stream: asyncio.StreamReader) -> bytes:
+    """Read one line of any length.
+
+    StreamReader.readline() fails on lines longer than its buffer limit;
+    agents emit multi-MB tool results on a single line.
+    Returns b"" at EOF.
+    """
+    chunks = []
+    while True:
+        try:
+            chunks.append(await stream.readuntil(b"\n"))
+            break
+        except asyncio.IncompleteReadError as e:
+            chunks.append(e.partial)
+            break
+        except asyncio.LimitOverrunError as e:
+            chunks.append(await stream.readexactly(e.consumed))
+    return b"".join(chunks)
@@ -0,0 +1,343 @@
+"""Search - full-text index over prompts, assistant text and results (aiwr --search).
+
+An SQLite FTS5 index next to the logs. Each log is one document, keyed
+by its path; the text comes from the agent's context extraction
+(`context_items()` - prompts, assistant messages and results), so tool
+traffic isn't indexed. Runner indexes a session when it finalizes it;
+a search first catches up with the days whose signature changed since
+the last one (logs written without the index, compacted or removed), and
+within a day reindexes only the logs whose identity changed.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+from .agents import AGENTS
+from .paths import get_logs_dir
+from .reader import LogReader
+from .storage import archive_date, day_signature, day_sources, log_identity, read_archive_index
+
+INDEX_FILE = "search.sqlite3"
+INDEX_VERSION = "1"  # Bump when the indexed text changes
+DEFAULT_SEARCH_LIMIT = 20
+MAX_FIELD_CHARS = 200_000  # Text kept per field of a session
+SNIPPET_TOKENS = 16
+
+# Column weights for bm25(): a match in the prompt ranks above one in the result,
+# which ranks above one in the assistant's messages
+_RANKING = "bm25(docs, 0, 0, 4.0, 1.0, 2.0)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    day TEXT NOT NULL,
+    identity TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_day ON files(day);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    session_id UNINDEXED,
+    agent UNINDEXED,
+    prompt,
+    assistant,
+    result,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS days (
+    day TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class SearchHit:
+    """A session matching a query, best first."""
+
+    session_id: str
+    agent: str | None
+    date: str
+    path: Path
+    snippet: str
+    score: float
+
+    def to_dict(self) -> dict:
+        """Return the hit as a JSON-serializable dict."""
+        return {
+            "session_id": self.session_id,
+            "agent": self.agent,
+            "date": self.date,
+            "path": str(self.path),
+            "snippet": self.snippet,
+            "score": round(self.score, 4),
+        }
+
+
+class SearchIndex:
+    """Full-text index of the session logs under a logs directory.
+
+    Paths are stored relative to the logs directory, like the catalog's.
+    """
+
+    def __init__(self, logs_dir: Path):
+        self.logs_dir = logs_dir
+        self._conn = sqlite3.connect(logs_dir / INDEX_FILE, timeout=30, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._conn.close()
+
+    def add(self, path: Path) -> None:
+        """Index (or reindex) one session log."""
+        identity = _identity(path)
+        session_id, agent, fields = session_text(path)
+        rel_path = self._relative(path)
+
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(rel_path)
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, day, identity) VALUES (?, ?, ?)",
+                (rel_path, rel_path.split("/", 1)[0], identity),
+            )
+            self._conn.execute(
+                "INSERT INTO docs (rowid, session_id, agent, prompt, assistant, result) VALUES (?, ?, ?, ?, ?, ?)",
+                (cursor.lastrowid, session_id, agent, *fields),
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def remove(self, paths: list[Path]) -> None:
+        """Drop deleted session logs from the index."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for path in paths:
+                self._delete(self._relative(path))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def update(self) -> int:
+        """Catch up with the logs tree; returns the number of logs (re)indexed.
+
+        Days whose signature is unchanged since the last update are
+        skipped without being listed.
+        """
+        sources = day_sources(self.logs_dir)
+        known = dict(self._conn.execute("SELECT day, signature FROM days").fetchall())
+
+        indexed = 0
+        for source in sources:
+            signature = f"{INDEX_VERSION}:{day_signature(source)}"
+            if known.get(source.name) == signature:
+                continue
+            indexed += self._update_day(source)
+            self._conn.execute("INSERT OR REPLACE INTO days VALUES (?, ?)", (source.name, signature))
+
+        names = {source.name for source in sources}
+        for day in known.keys() - names:
+            self._drop_day(day)
+        return indexed
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[SearchHit]:
+        """Sessions matching a query, best first, with a snippet of the best field.
+
+        Raises:
+            ValueError: If the query has no terms
+        """
+        match = match_expression(query)
+        rows = self._conn.execute(
+            f"""
+            SELECT docs.session_id, docs.agent, files.path,
+                   snippet(docs, -1, '[', ']', '...', {SNIPPET_TOKENS}), {_RANKING}
+            FROM docs JOIN files ON files.id = docs.rowid
+            WHERE docs MATCH ?
+            ORDER BY {_RANKING}
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [
+            SearchHit(
+                session_id=session_id,
+                agent=agent,
+                date=archive_date(rel_path.split("/", 1)[0]),
+                path=self.logs_dir / rel_path,
+                snippet=" ".join(snippet.split()),
+                score=-score,
+            )
+            for session_id, agent, rel_path, snippet, score in rows
+        ]
+
+    def _update_day(self, source: Path) -> int:
+        if source.is_dir():
+            paths = sorted(source.rglob("*.jsonl"))
+        else:
+            paths = [source / member for member in sorted(read_archive_index(source))]
+
+        known = dict(self._conn.execute(
+            "SELECT path, identity FROM files WHERE day = ?", (source.name,)
+        ).fetchall())
+
+        indexed = 0
+        for path in paths:
+            rel_path = self._relative(path)
+            try:
+                if known.pop(rel_path, None) == _identity(path):
+                    continue
+                self.add(path)
+            except (OSError, ValueError):
+                continue  # Unreadable or corrupt log - leave it out
+            indexed += 1
+
+        for rel_path in known:
+            self._delete(rel_path)
+        return indexed
+
+    def _drop_day(self, day: str) -> None:
+        for (rel_path,) in self._conn.execute("SELECT path FROM files WHERE day = ?", (day,)).fetchall():
+            self._delete(rel_path)
+        self._conn.execute("DELETE FROM days WHERE day = ?", (day,))
+
+    def _delete(self, rel_path: str) -> None:
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel_path,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM docs WHERE rowid = ?", row)
+            self._conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.logs_dir).as_posix()
+
+
+def _identity(path: Path) -> str:
+    return f"{INDEX_VERSION}:{log_identity(path)}"
+
+
+def session_text(path: Path) -> tuple[str, str | None, tuple[str, str, str]]:
+    """Session ID, agent and the (prompt, assistant, result) text of a log."""
+    agent_name = None
+    agent = None
+    fields: dict[str, list[str]] = {"prompt": [], "assistant": [], "result": []}
+    summary_result = None
+    after_assistant = False  # Last item was assistant text - a delta continues it
+
+    def add(field: str, text: str, joined: bool = False) -> None:
+        texts = fields[field]
+        if joined and texts:
+            texts[-1] += text
+        elif field == "assistant" or text not in texts:
+            texts.append(text)  # Prompts and results repeat (aiwr_start, agent echo)
+
+    with LogReader(path) as reader:
+        for entry in reader:
+            entry_type = entry.get("type")
+            if entry_type == "aiwr_start":
+                if agent_name is None:
+                    agent_name = entry.get("agent")
+                    agent = AGENTS.get(agent_name) if agent_name else None
+                    if agent is not None:
+                        agent = agent.event_agent(entry.get("model"))
+                if entry.get("prompt"):
+                    add("prompt", entry["prompt"])
+            elif entry_type == "aiwr_summary":
+                summary_result = entry.get("result") or summary_result
+            elif entry_type == "aiwr_child_result":
+                if entry.get("result"):
+                    add("result", entry["result"])
+            elif agent is not None and not (isinstance(entry_type, str) and entry_type.startswith("aiwr_")):
+                for item in agent.context_items(entry):
+                    if item.role == "user":
+                        add("prompt", item.text)
+                    elif item.role == "assistant":
+                        add("assistant", item.text, joined=item.delta and after_assistant)
+                    elif item.role == "result":
+                        add("result", item.text)
+                    after_assistant = item.role == "assistant"
+
+    if summary_result and not fields["result"]:
+        fields["result"].append(summary_result)
+
+    session_id = path.name.split(".", 1)[0]
+    prompt, assistant, result = (
+        "\n".join(texts)[:MAX_FIELD_CHARS] for texts in fields.values()
+    )
+    return session_id, agent_name, (prompt, assistant, result)
+
+
+def match_expression(query: str) -> str:
+    """Turn a user query into an FTS5 MATCH expression.
+
+    Every word must match (in any field); a word ending in `*` matches
+    as a prefix. Quotes and operators are taken literally, so any input
+    is a valid query.
+
+    Raises:
+        ValueError: If the query has no terms
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+
+_indexes: dict[Path, SearchIndex] = {}
+
+
+def open_search_index(logs_dir: Path) -> SearchIndex | None:
+    """Open the search index of a logs directory, once per process.
+
+    Returns None if it can't be used (no FTS5 in this SQLite, a read-only
+    logs dir); sessions then go unindexed and --search reports the error.
+    """
+    if logs_dir in _indexes:
+        return _indexes[logs_dir]
+
+    if not logs_dir.is_dir():
+        return None
+
+    try:
+        index = SearchIndex(logs_dir)
+    except sqlite3.Error:
+        return None
+
+    _indexes[logs_dir] = index
+    return index
+
+
+def index_session(path: Path) -> None:
+    """Index a finished session; failures leave it to the next search's catch-up."""
+    index = open_search_index(get_logs_dir())
+    if index is None:
+        return
+    try:
+        index.add(path)
+    except (OSError, ValueError, sqlite3.Error):
+        pass
+
+
+def search_sessions(query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[SearchHit]:
+    """Search the sessions of the current logs directory.
+
+    Raises:
+        ValueError: If the query is empty or the index can't be used
+    """
+    logs_dir = get_logs_dir()
+    if not logs_dir.is_dir():
+        return []
+
+    index = open_search_index(logs_dir)
+    if index is None:
+        raise ValueError(f"Search index unavailable in {logs_dir} (SQLite without FTS5?)")
+
+    index.update()
+    return index.search(query, limit)
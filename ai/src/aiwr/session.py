@@ -1,27 +1,30 @@
 """Session management - finding and organizing log files."""
 
 import os
-import shutil
+import sqlite3
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .catalog import open_catalog
 from .logger import Logger
-
-DEFAULT_LOG_DIR = ".aiwr/logs"
-
-
-def get_project_root() -> Path:
-    """Return current working directory as project root."""
-    return Path.cwd()
-
-
-def get_logs_dir() -> Path:
-    """Get the logs directory path."""
-    custom_dir = os.environ.get("AIWR_LOG_DIR")
-    if custom_dir:
-        return Path(custom_dir)
-
-    return get_project_root() / DEFAULT_LOG_DIR
+from .paths import DEFAULT_LOG_DIR, get_logs_dir, get_project_root  # noqa: F401 - re-exported
+from .storage import (
+    ARCHIVE_SUFFIX,
+    archive_date,
+    day_signature,
+    day_sources,
+    layout_lock,
+    list_archives,
+    log_exists,
+    read_archive_index,
+    split_archive_path,
+)
+
+# logs dir -> (tree signature, index); None unless enabled by a long-lived process
+_index_cache: dict[Path, tuple[tuple, "SessionIndex"]] | None = None
+# date dir or day archive -> (day signature, index); enabled along with _index_cache
+_day_cache: dict[Path, tuple[str, "SessionIndex"]] | None = None
 
 
 def get_today_dir() -> Path:
@@ -30,23 +33,60 @@ def get_today_dir() -> Path:
     return get_logs_dir() / today
 
 
-def get_log_path(session_id: str, parent_id: str | None = None) -> Path:
+def get_log_path(
+    session_id: str,
+    parent_id: str | None = None,
+    parent_dir: Path | None = None,
+) -> Path:
     """
     Get the path for a session log file.
 
-    If parent_id is provided, the log goes into the parent's directory.
+    If parent_id is provided, the log goes into the parent's directory:
+    `parent_dir` when the caller knows it (AIWR_SESSION_DIR), otherwise
+    the parent is looked up. A session whose directory already exists
+    (a child got there first) is logged inside it.
     """
     today_dir = get_today_dir()
 
+    if parent_id and parent_dir is not None:
+        return _session_file(adopt_session_dir(parent_dir), session_id)
+
     if parent_id:
         parent_path = find_session_path(parent_id)
-        if parent_path:
+        if parent_path and split_archive_path(parent_path) is None:
             parent_dir = ensure_session_dir(parent_path)
-            return parent_dir / f"{session_id}.jsonl"
-        # Parent not found, fall back to today's dir
-        return today_dir / f"{session_id}.jsonl"
+            return _session_file(parent_dir, session_id)
+        # Parent not found or archived (read-only), fall back to today's dir
+
+    return _session_file(today_dir, session_id)
+
 
-    return today_dir / f"{session_id}.jsonl"
+def _session_file(directory: Path, session_id: str) -> Path:
+    session_dir = directory / session_id
+    if session_dir.is_dir():
+        return session_dir / f"{session_id}.jsonl"
+    return directory / f"{session_id}.jsonl"
+
+
+def session_dir_of(log_path: Path) -> Path:
+    """Directory a session's children go into, given its log path.
+
+    abc.jsonl -> abc/ (created by the first child), abc/abc.jsonl -> abc/
+    """
+    session_id = log_path.name.split(".", 1)[0]
+    if log_path.parent.name == session_id:
+        return log_path.parent
+    return log_path.parent / session_id
+
+
+def adopt_session_dir(session_dir: Path) -> Path:
+    """Make sure a session directory exists, moving the session's log into it.
+
+    The session is named by the directory - no lookup. Returns the directory.
+    """
+    if session_dir.is_dir():
+        return session_dir
+    return ensure_session_dir(session_dir.parent / f"{session_dir.name}.jsonl")
 
 
 def ensure_session_dir(session_path: Path) -> Path:
@@ -56,20 +96,36 @@ def ensure_session_dir(session_path: Path) -> Path:
     If the session is just a file, convert it to a directory:
     abc123.jsonl -> abc123/abc123.jsonl
 
+    Safe against concurrent sessions: the conversion is a single rename
+    under the layout lock, and a session converted meanwhile (or whose
+    log doesn't exist yet) just gets its directory.
+
     Returns the directory path.
     """
     if session_path.is_dir():
         return session_path
 
-    if session_path.is_file() and session_path.suffix == ".jsonl":
+    # Already converted: abc123/abc123.jsonl
+    if session_path.parent.name == session_path.stem:
+        return session_path.parent
+
+    if session_path.suffix == ".jsonl":
         session_id = session_path.stem
-        parent_dir = session_path.parent
-        new_dir = parent_dir / session_id
+        new_dir = session_path.parent / session_id
         new_file = new_dir / f"{session_id}.jsonl"
 
-        # Create directory and move file
-        new_dir.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(session_path), str(new_file))
+        with layout_lock(get_logs_dir()):
+            moved = session_path.is_file()
+            new_dir.mkdir(parents=True, exist_ok=True)
+            if moved:
+                os.rename(session_path, new_file)
+
+        catalog = open_catalog(get_logs_dir()) if moved else None
+        if catalog is not None:
+            try:
+                catalog.move(session_id, new_file)
+            except (sqlite3.Error, ValueError):
+                pass
 
         return new_dir
 
@@ -80,7 +136,10 @@ def ensure_session_dir(session_path: Path) -> Path:
 
 def find_session_path(session_id: str) -> Path | None:
     """
-    Find a session by ID, searching all date directories.
+    Find a session by ID.
+
+    Uses the catalog when available. Falls back to searching all date
+    directories, and records what it finds so the next lookup is indexed.
 
     Returns the path to the session file or directory.
     """
@@ -89,10 +148,34 @@ def find_session_path(session_id: str) -> Path | None:
     if not logs_dir.exists():
         return None
 
+    catalog = open_catalog(logs_dir)
+    if catalog is not None:
+        path = catalog.find_path(session_id)
+        if path is not None and log_exists(path):
+            return path
+
+    path = _scan_for_session(logs_dir, session_id)
+    if path is not None and catalog is not None:
+        try:
+            catalog.upsert(session_id, path, parent_id=get_parent_id(path))
+        except (sqlite3.Error, ValueError):
+            pass
+
+    return path
+
+
+def _scan_for_session(logs_dir: Path, session_id: str) -> Path | None:
+    """Search all date directories and day archives for a session (no catalog)."""
     # Search all date directories (newest first)
     date_dirs = sorted(logs_dir.iterdir(), reverse=True)
 
     for date_dir in date_dirs:
+        if date_dir.suffix == ARCHIVE_SUFFIX and date_dir.is_file():
+            for member, info in read_archive_index(date_dir).items():
+                if info["session_id"] == session_id:
+                    return date_dir / member
+            continue
+
         if not date_dir.is_dir():
             continue
 
@@ -141,6 +224,7 @@ def list_sessions() -> list[tuple[str, Path]]:
     List all sessions grouped by date.
 
     Returns list of (date_string, session_path) tuples, newest first.
+    Only top-level sessions of each date directory are included.
     """
     logs_dir = get_logs_dir()
     sessions: list[tuple[str, Path]] = []
@@ -148,9 +232,27 @@ def list_sessions() -> list[tuple[str, Path]]:
     if not logs_dir.exists():
         return sessions
 
+    catalog = open_catalog(logs_dir)
+    if catalog is not None:
+        for entry in catalog.entries():
+            rel_parts = entry.path.relative_to(logs_dir).parts
+            is_top_level = len(rel_parts) == 2 or (
+                len(rel_parts) == 3 and rel_parts[1] == entry.session_id
+            )
+            if is_top_level:
+                sessions.append((entry.date, entry.path))
+        return sessions
+
     date_dirs = sorted(logs_dir.iterdir(), reverse=True)
 
     for date_dir in date_dirs:
+        if date_dir.suffix == ARCHIVE_SUFFIX and date_dir.is_file():
+            for member in read_archive_index(date_dir):
+                parts = member.split("/")
+                if len(parts) == 1 or (len(parts) == 2 and parts[0] == Path(member).stem):
+                    sessions.append((archive_date(date_dir.name), date_dir / member))
+            continue
+
         if not date_dir.is_dir():
             continue
 
@@ -182,7 +284,8 @@ def find_children(parent_id: str) -> list[str]:
     """
     Find all child session IDs for a given parent.
 
-    Scans JSONL files for aiwr_meta entries with matching parent_id.
+    Uses the catalog's parent index when available, otherwise reads the
+    header of every JSONL file for an aiwr_meta with matching parent_id.
     """
     children = []
     logs_dir = get_logs_dir()
@@ -190,23 +293,249 @@ def find_children(parent_id: str) -> list[str]:
     if not logs_dir.exists():
         return children
 
-    # Scan all JSONL files
+    catalog = open_catalog(logs_dir)
+    if catalog is not None:
+        return catalog.children(parent_id)
+
+    for archive_path in list_archives(logs_dir):
+        for info in read_archive_index(archive_path).values():
+            if info["parent_id"] == parent_id:
+                children.append(info["session_id"])
+
+    # Scan the headers of all JSONL files
     for jsonl_path in logs_dir.rglob("*.jsonl"):
-        entries = Logger.load(jsonl_path)
-        for entry in entries:
-            if entry.get("type") == "aiwr_meta" and entry.get("parent_id") == parent_id:
-                # Extract session_id from filename
-                session_id = jsonl_path.stem
-                children.append(session_id)
-                break
+        if get_parent_id(jsonl_path) == parent_id:
+            children.append(jsonl_path.stem)
 
     return children
 
 
+def record_session(
+    session_id: str,
+    session_path: Path,
+    parent_id: str | None = None,
+    agent: str | None = None,
+    model: str | None = None,
+    status: str | None = None,
+    started_at: float | None = None,
+    ended_at: float | None = None,
+) -> None:
+    """Record a session in the catalog.
+
+    The catalog is an index, not the source of truth - failures are
+    ignored and the next stale check rebuilds it from the JSONL files.
+    """
+    catalog = open_catalog(get_logs_dir())
+    if catalog is None:
+        return
+
+    try:
+        catalog.upsert(
+            session_id,
+            session_path,
+            parent_id=parent_id,
+            agent=agent,
+            model=model,
+            status=status,
+            started_at=started_at,
+            ended_at=ended_at,
+        )
+    except (sqlite3.Error, ValueError):
+        pass
+
+
+def record_alias(alias: str, session_id: str) -> None:
+    """Record a provisional session ID in the catalog (see nesting.py)."""
+    catalog = open_catalog(get_logs_dir())
+    if catalog is None:
+        return
+
+    try:
+        catalog.add_alias(alias, session_id)
+    except sqlite3.Error:
+        pass
+
+
+def resolve_session_id(session_id: str) -> str:
+    """Return the session a provisional ID names, or the ID itself."""
+    catalog = open_catalog(get_logs_dir())
+    if catalog is None:
+        return session_id
+
+    try:
+        return catalog.resolve(session_id)
+    except sqlite3.Error:
+        return session_id
+
+
+def session_lineage(session_id: str) -> list[str]:
+    """IDs from a session up to its root, following catalogued parents."""
+    lineage = [session_id]
+    catalog = open_catalog(get_logs_dir())
+    if catalog is None:
+        return lineage
+
+    try:
+        while True:
+            entry = catalog.get(lineage[-1])
+            if entry is None or not entry.parent_id or entry.parent_id in lineage:
+                return lineage
+            lineage.append(entry.parent_id)
+    except sqlite3.Error:
+        return lineage
+
+
 def get_parent_id(session_path: Path) -> str | None:
-    """Get parent_id from a session's JSONL file."""
-    entries = Logger.load(session_path)
-    for entry in entries:
+    """Get parent_id from a session's JSONL header."""
+    for entry in Logger.read_header(session_path):
         if entry.get("type") == "aiwr_meta":
             return entry.get("parent_id")
     return None
+
+
+@dataclass
+class SessionIndex:
+    """Parent/child map of every session under the logs dir."""
+
+    paths: dict[str, Path] = field(default_factory=dict)
+    children: dict[str, list[str]] = field(default_factory=dict)
+    roots: dict[str, list[Path]] = field(default_factory=dict)  # date -> root sessions
+
+
+def enable_index_cache() -> None:
+    """Reuse scan_sessions() and scan_day() results while a day of the logs tree is unchanged.
+
+    For long-lived processes (the daemon): checking the day signatures
+    costs a walk over directories, which a one-shot command, scanning
+    once anyway, would pay for nothing. A change rescans only its day.
+    """
+    global _index_cache, _day_cache
+    if _index_cache is None:
+        _index_cache = {}
+        _day_cache = {}
+
+
+def scan_tree(session_id: str) -> SessionIndex | None:
+    """Index of one session and its descendants, from the catalog's lookups.
+
+    Reads no logs, whatever the size of the history. Returns None without
+    a catalog; callers then fall back to scan_sessions(). A session that
+    isn't found is missing from `paths`.
+    """
+    catalog = open_catalog(get_logs_dir())
+    if catalog is None:
+        return None
+
+    index = SessionIndex()
+    pending = [session_id]
+    try:
+        while pending:
+            current = pending.pop()
+            path = catalog.find_path(current)
+            if path is None or not log_exists(path):
+                path = find_session_path(current)  # Moved behind the catalog's back
+            if path is None:
+                continue
+            index.paths[current] = path
+            children = catalog.children(current)
+            if children:
+                index.children[current] = children
+            pending.extend(child for child in children if child not in index.paths)
+    except sqlite3.Error:
+        return None
+    return index
+
+
+def scan_sessions() -> SessionIndex:
+    """
+    Build a SessionIndex with a single scan of the logs tree.
+
+    Only the header of each file is read; day archives are read from their
+    member index. Date directories are visited newest first, so a
+    duplicated session ID resolves the same way as find_session_path.
+
+    The result must not be modified: with the index cache enabled it is
+    shared between calls.
+    """
+    logs_dir = get_logs_dir()
+    if _index_cache is None:
+        return _merge_days(scan_day(source) for source in reversed(day_sources(logs_dir)))
+
+    # Signed before scanning - a change during the scan is picked up next time
+    signatures = [(source, day_signature(source)) for source in reversed(day_sources(logs_dir))]
+    signature = tuple((source.name, day) for source, day in signatures)
+    cached = _index_cache.get(logs_dir)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    index = _merge_days(scan_day(source, day) for source, day in signatures)
+    _index_cache[logs_dir] = (signature, index)
+    return index
+
+
+def scan_day(source: Path, signature: str | None = None) -> SessionIndex:
+    """
+    Build the SessionIndex of one date directory or day archive.
+
+    Children whose parent is on another day are in `children` but not
+    `roots`. With the index cache enabled the result is shared - it must
+    not be modified.
+    """
+    if _day_cache is None:
+        return _scan_day(source)
+
+    signature = signature or day_signature(source)
+    cached = _day_cache.get(source)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    index = _scan_day(source)
+    _day_cache[source] = (signature, index)
+    return index
+
+
+def _scan_day(source: Path) -> SessionIndex:
+    index = SessionIndex()
+
+    if source.is_dir():
+        members = [
+            (jsonl_path, get_parent_id(jsonl_path))
+            for jsonl_path in sorted(source.rglob("*.jsonl"))
+        ]
+    else:
+        members = [
+            (source / member, info["parent_id"])
+            for member, info in sorted(read_archive_index(source).items())
+        ]
+
+    session_ids = {jsonl_path.stem for jsonl_path, _ in members}
+    for jsonl_path, parent_id in members:
+        session_id = jsonl_path.stem
+        index.paths.setdefault(session_id, jsonl_path)
+
+        if parent_id is not None:
+            if parent_id not in session_ids:
+                # A child started before its parent reported its ID names a provisional one
+                parent_id = resolve_session_id(parent_id)
+            index.children.setdefault(parent_id, []).append(session_id)
+            continue
+
+        # Root sessions are top-level: date/abc.jsonl or date/abc/abc.jsonl
+        rel_parts = jsonl_path.relative_to(source).parts
+        if len(rel_parts) == 1 or (len(rel_parts) == 2 and rel_parts[0] == session_id):
+            index.roots.setdefault(archive_date(source.name), []).append(jsonl_path)
+
+    return index
+
+
+def _merge_days(days) -> SessionIndex:
+    """Combine day indexes, newest day first."""
+    index = SessionIndex()
+    for day in days:
+        for session_id, path in day.paths.items():
+            index.paths.setdefault(session_id, path)
+        for parent_id, children in day.children.items():
+            index.children.setdefault(parent_id, []).extend(children)
+        for date, roots in day.roots.items():
+            index.roots.setdefault(date, []).extend(roots)
+    return index
@@ -0,0 +1,387 @@
+"""Run statistics - latency, failures and output size across all sessions.
+
+Every log is read once per change: per-day partial aggregates are cached
+(SQLite) under a signature of the day's directory mtimes, so a query over
+months of history only rescans the days that changed.
+"""
+
+import json
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .agents import AGENTS
+from .event import LogEvent
+from .logger import AIWR_ENTRY_PREFIX
+from .reader import LogReader
+from .session import get_logs_dir
+from .storage import archive_date, day_signature, day_sources, read_archive_index
+
+STATS_KEYS = ("agent", "model", "day", "depth")
+DEFAULT_STATS_KEYS = ("agent",)
+PERCENTILES = (50, 90, 99)
+SUCCESS_STATUSES = frozenset({"completed", "success"})
+
+CACHE_FILE = "stats_cache.sqlite3"
+CACHE_VERSION = "1"  # Bump when the partial aggregate format changes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    source TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    groups TEXT NOT NULL
+);
+"""
+
+_AIWR_PREFIX = AIWR_ENTRY_PREFIX.encode()
+_STATUS_ROLES = frozenset({"status"})
+
+
+class RunRecord(NamedTuple):
+    """One run of an agent, as its log recorded it."""
+
+    agent: str
+    model: str | None
+    failed: bool
+    duration: float | None  # None for runs that never finished (or predate aiwr_summary)
+    first_byte: float | None  # Time to the agent's first output, from aiwr_timing
+    events: int  # Agent events logged
+    bytes: int  # Bytes of agent output logged
+
+
+@dataclass
+class RunStats:
+    """Partial aggregate of a group of runs; merging two is exact."""
+
+    runs: int = 0
+    sessions: int = 0
+    failures: int = 0
+    events: int = 0
+    bytes: int = 0
+    durations: list[float] = field(default_factory=list)
+    first_bytes: list[float] = field(default_factory=list)
+
+    def add(self, run: RunRecord) -> None:
+        """Count one run."""
+        self.runs += 1
+        self.failures += run.failed
+        self.events += run.events
+        self.bytes += run.bytes
+        if run.duration is not None:
+            self.durations.append(run.duration)
+        if run.first_byte is not None:
+            self.first_bytes.append(run.first_byte)
+
+    def merge(self, other: "RunStats") -> None:
+        """Fold another partial aggregate into this one."""
+        self.runs += other.runs
+        self.sessions += other.sessions
+        self.failures += other.failures
+        self.events += other.events
+        self.bytes += other.bytes
+        self.durations.extend(other.durations)
+        self.first_bytes.extend(other.first_bytes)
+
+    def summary(self) -> dict[str, Any]:
+        """Reported figures: counts, failure rate, duration percentiles, averages."""
+        durations = sorted(self.durations)
+        data: dict[str, Any] = {
+            "runs": self.runs,
+            "sessions": self.sessions,
+            "failures": self.failures,
+            "failure_rate": round(self.failures / self.runs, 4) if self.runs else None,
+        }
+        for p in PERCENTILES:
+            data[f"p{p}"] = percentile(durations, p)
+        data["first_byte_p50"] = percentile(sorted(self.first_bytes), 50)
+        data["events_per_session"] = round(self.events / self.sessions, 1) if self.sessions else None
+        data["bytes_per_session"] = round(self.bytes / self.sessions) if self.sessions else None
+        return data
+
+
+def percentile(sorted_values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile of already sorted values; None when empty."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def scan_log(path: Path) -> tuple[list[RunRecord], str | None]:
+    """Read the runs of one session log, and its parent ID.
+
+    A run starts at its aiwr_start record; aiwr_summary and aiwr_timing
+    give its status, duration and time to first byte. Agent events are
+    only counted, not decoded - except for runs without a summary (older
+    logs, killed runs), whose status comes from the agent's status rules.
+    """
+    runs: list[dict[str, Any]] = []
+    parent_id = None
+
+    with LogReader(path, cache=False) as reader:
+        run: dict[str, Any] | None = None
+        for index in range(len(reader)):
+            raw = reader.raw(index)
+            if not raw.startswith(_AIWR_PREFIX):
+                if run is None:
+                    run = _new_run(runs, None)
+                run["events"].append(index)
+                run["bytes"] += len(raw) + 1
+                continue
+
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            entry_type = entry.get("type")
+            if entry_type == "aiwr_start":
+                run = _new_run(runs, entry)
+            elif entry_type == "aiwr_meta":
+                parent_id = parent_id or entry.get("parent_id")
+            elif run is not None and entry_type == "aiwr_timing":
+                run["timing"] = entry
+            elif run is not None and entry_type == "aiwr_summary":
+                run["summary"] = entry
+
+        records = [_run_record(path, reader, run) for run in runs]
+
+    return records, parent_id
+
+
+def _new_run(runs: list[dict[str, Any]], start: dict[str, Any] | None) -> dict[str, Any]:
+    run = {"start": start or {}, "summary": None, "timing": None, "events": [], "bytes": 0}
+    runs.append(run)
+    return run
+
+
+def _run_record(path: Path, reader: LogReader, run: dict[str, Any]) -> RunRecord:
+    start = run["start"]
+    summary = run["summary"] or {}
+    agent_name = start.get("agent") or summary.get("agent")
+    model = start.get("model") or summary.get("model")
+
+    if not agent_name:
+        from .resume import extract_session_info
+
+        agent_name = extract_session_info(path).agent
+
+    status = summary.get("status")
+    if run["summary"] is None:
+        status = _scan_status(reader, run["events"], agent_name, model)
+
+    exit_code = summary.get("exit_code")
+    timing = run["timing"] or {}
+    return RunRecord(
+        agent=agent_name,
+        model=model,
+        failed=bool(exit_code) or status not in SUCCESS_STATUSES,
+        duration=summary.get("duration"),
+        first_byte=timing.get("first_byte"),
+        events=len(run["events"]),
+        bytes=run["bytes"],
+    )
+
+
+def _scan_status(reader: LogReader, indices: list[int], agent_name: str, model: str | None) -> str | None:
+    """Status of a run without a summary, by the agent's status rules."""
+    agent = AGENTS.get(agent_name)
+    if agent is None:
+        return None
+    agent = agent.event_agent(model)
+
+    status = None
+    for index in indices:
+        found = agent.classify(LogEvent(reader.raw(index)), _STATUS_ROLES).status
+        if found:
+            status = found
+    return status
+
+
+def day_stats(source: Path) -> dict[tuple[str, str | None, int], RunStats]:
+    """Partial aggregates of one day, by (agent, model, nesting depth)."""
+    if source.is_dir():
+        logs = [(path, path.relative_to(source).parts) for path in sorted(source.rglob("*.jsonl"))]
+    else:
+        logs = [(source / member, tuple(member.split("/"))) for member in sorted(read_archive_index(source))]
+
+    groups: dict[tuple[str, str | None, int], RunStats] = {}
+    for path, rel_parts in logs:
+        try:
+            records, parent_id = scan_log(path)
+        except (OSError, ValueError):
+            continue  # Unreadable or corrupt log - leave it out
+
+        depth = _depth(rel_parts, parent_id)
+        counted = set()
+        for record in records:
+            key = (record.agent, record.model, depth)
+            group = groups.setdefault(key, RunStats())
+            group.add(record)
+            if key not in counted:
+                group.sessions += 1
+                counted.add(key)
+    return groups
+
+
+def _depth(rel_parts: tuple[str, ...], parent_id: str | None) -> int:
+    """Nesting depth of a log from its place in the day: a/a.jsonl is 0, a/b.jsonl is 1.
+
+    A child that fell back to a date directory of its own (parent archived
+    or on another day) counts as depth 1.
+    """
+    depth = len(rel_parts) - 1
+    if depth and rel_parts[-2] == Path(rel_parts[-1]).stem:
+        depth -= 1
+    if parent_id and not depth:
+        depth = 1
+    return depth
+
+
+class StatsCache:
+    """Per-day partial aggregates, reused while the day's signature holds."""
+
+    def __init__(self, logs_dir: Path):
+        self._conn = sqlite3.connect(logs_dir / CACHE_FILE, timeout=30, isolation_level=None)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._conn.close()
+
+    def load(self) -> dict[str, tuple[str, str]]:
+        """Return every cached day: {source: (signature, groups JSON)}."""
+        rows = self._conn.execute("SELECT source, signature, groups FROM days").fetchall()
+        return {source: (signature, groups) for source, signature, groups in rows}
+
+    def forget(self, sources: set[str]) -> None:
+        """Drop the cached aggregates of days whose logs were deleted."""
+        self._conn.executemany("DELETE FROM days WHERE source = ?", [(source,) for source in sources])
+
+    def store(self, days: dict[str, tuple[str, str]], keep: set[str]) -> None:
+        """Write recomputed days and drop days that no longer exist."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for source, (signature, groups) in days.items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO days VALUES (?, ?, ?)", (source, signature, groups)
+                )
+            for (source,) in self._conn.execute("SELECT source FROM days").fetchall():
+                if source not in keep:
+                    self._conn.execute("DELETE FROM days WHERE source = ?", (source,))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+
+def open_stats_cache(logs_dir: Path) -> StatsCache | None:
+    """Open the stats cache of a logs directory.
+
+    Returns None if it can't be used (e.g. a read-only logs dir); every
+    day is then scanned.
+    """
+    try:
+        return StatsCache(logs_dir)
+    except sqlite3.Error:
+        return None
+
+
+def collect_stats(by: tuple[str, ...] = DEFAULT_STATS_KEYS) -> dict[tuple, RunStats]:
+    """Aggregate all runs under the logs dir, grouped by the `by` keys.
+
+    Raises:
+        ValueError: If a key is not one of STATS_KEYS
+    """
+    unknown = [key for key in by if key not in STATS_KEYS]
+    if unknown or not by:
+        raise ValueError(
+            f"Unknown stats key: {', '.join(unknown) or '(none)'}. Available: {', '.join(STATS_KEYS)}"
+        )
+
+    logs_dir = get_logs_dir()
+    sources = day_sources(logs_dir)
+    cache = open_stats_cache(logs_dir) if sources else None
+    cached = cache.load() if cache is not None else {}
+    updated: dict[str, tuple[str, str]] = {}
+
+    result: dict[tuple, RunStats] = {}
+    for source in sources:
+        signature = f"{CACHE_VERSION}:{day_signature(source)}"
+        hit = cached.get(source.name)
+        if hit is not None and hit[0] == signature:
+            groups = _decode_groups(hit[1])
+        else:
+            groups = day_stats(source)
+            updated[source.name] = (signature, _encode_groups(groups))
+
+        day = archive_date(source.name)
+        for (agent, model, depth), stats in groups.items():
+            values = {"agent": agent, "model": model, "day": day, "depth": depth}
+            key = tuple(values[name] for name in by)
+            result.setdefault(key, RunStats()).merge(stats)
+
+    if cache is not None:
+        try:
+            cache.store(updated, {source.name for source in sources})
+        except sqlite3.Error:
+            pass
+        cache.close()
+
+    return dict(sorted(result.items(), key=lambda item: tuple(_sort_key(v) for v in item[0])))
+
+
+def _encode_groups(groups: dict[tuple[str, str | None, int], RunStats]) -> str:
+    return json.dumps([
+        [agent, model, depth, s.runs, s.sessions, s.failures, s.events, s.bytes, s.durations, s.first_bytes]
+        for (agent, model, depth), s in groups.items()
+    ])
+
+
+def _decode_groups(data: str) -> dict[tuple[str, str | None, int], RunStats]:
+    groups = {}
+    for agent, model, depth, *counts in json.loads(data):
+        groups[(agent, model, depth)] = RunStats(*counts)
+    return groups
+
+
+def _sort_key(value: Any) -> tuple:
+    # None (unknown model) sorts last; numbers and strings never meet in one column
+    return (value is None, value if value is not None else 0)
+
+
+def format_stats(stats: dict[tuple, RunStats], by: tuple[str, ...]) -> str:
+    """Format grouped stats as a table."""
+    header = [*by, "runs", "sess", "fail%", "p50", "p90", "p99", "ttfb50", "ev/sess", "KB/sess"]
+    rows = [header]
+    for key, group in stats.items():
+        s = group.summary()
+        rows.append([
+            *("-" if value is None else str(value) for value in key),
+            str(s["runs"]),
+            str(s["sessions"]),
+            _format_rate(s["failure_rate"]),
+            *(_format_seconds(s[f"p{p}"]) for p in PERCENTILES),
+            _format_seconds(s["first_byte_p50"]),
+            "-" if s["events_per_session"] is None else f"{s['events_per_session']:g}",
+            "-" if s["bytes_per_session"] is None else f"{s['bytes_per_session'] / 1024:.1f}",
+        ])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = []
+    for row in rows:
+        cells = [
+            cell.ljust(width) if i < len(by) else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))
+        ]
+        lines.append("  ".join(cells).rstrip())
+    return "\n".join(lines)
+
+
+def _format_seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def _format_rate(value: float | None) -> str:
+    return "-" if value is None else f"{value * 100:.1f}"
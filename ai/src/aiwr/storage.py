@@ -0,0 +1,325 @@
+"""Log storage - compressed files and per-day archives.
+
+Session logs keep their `.jsonl` name whatever their encoding; the format
+is detected from the first bytes, so paths, lookups and file -> directory
+conversion don't care whether a log is compressed.
+
+Compacted days live in `DATE.zip` next to the date directories. A log
+inside an archive is addressed by a virtual path through the archive:
+`logs/2025-01-14.zip/abc/abc.jsonl`.
+
+Sessions running in parallel share the tree: a session's log moves into
+its own directory when its first child starts. Those moves, and anything
+that resolves a log path and then opens or replaces the file, hold the
+layout lock (`logs/.layout.lock`).
+"""
+
+import gzip
+import json
+import lzma
+import os
+import shutil
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows - the lock is a no-op there
+    fcntl = None
+
+COMPRESSIONS = ("none", "gzip", "lzma")
+DEFAULT_COMPRESSION = "none"
+ARCHIVE_SUFFIX = ".zip"
+ARCHIVE_INDEX_SUFFIX = ".idx.json"
+LAYOUT_LOCK = ".layout.lock"
+COPY_CHUNK = 1024 * 1024
+ACTIVE_WINDOW = 3600  # Seconds since the last write before a log (or a day) counts as closed
+GZIP_LEVEL = 6  # zlib's default - level 9 is much slower for little gain on JSONL
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_XZ_MAGIC = b"\xfd7zXZ\x00"
+_MEMBER_CACHE_SIZE = 16
+
+_members_cache: OrderedDict[tuple, dict[str, zipfile.ZipInfo]] = OrderedDict()
+
+
+def get_compression(compression: str | None = None) -> str:
+    """Resolve the compression for new logs (AIWR_LOG_COMPRESSION).
+
+    Raises:
+        ValueError: If the compression is unknown
+    """
+    compression = compression or os.environ.get("AIWR_LOG_COMPRESSION", DEFAULT_COMPRESSION)
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown log compression: {compression}. Available: {', '.join(COMPRESSIONS)}"
+        )
+    return compression
+
+
+def detect_compression(path: Path) -> str:
+    """Return the compression of a log file on disk, from its magic bytes."""
+    with open(path, "rb") as f:
+        magic = f.read(len(_XZ_MAGIC))
+    if magic.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(_XZ_MAGIC):
+        return "lzma"
+    return "none"
+
+
+def is_plain(path: Path) -> bool:
+    """Check whether a log is an uncompressed file on disk (seekable, mmap-able)."""
+    return split_archive_path(path) is None and detect_compression(path) == "none"
+
+
+def open_log(path: Path) -> BinaryIO:
+    """Open a log for reading, decompressing transparently.
+
+    Works for plain, gzip and lzma files and for members of day archives.
+    """
+    archived = split_archive_path(path)
+    if archived is not None:
+        archive_path, member = archived
+        with zipfile.ZipFile(archive_path) as zf:
+            # The member keeps the archive file open after the ZipFile closes
+            return zf.open(member)
+
+    compression = detect_compression(path)
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "lzma":
+        return lzma.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_log_bytes(path: Path) -> bytes:
+    """Return the decompressed content of a log."""
+    with open_log(path) as f:
+        return f.read()
+
+
+def log_exists(path: Path) -> bool:
+    """Check whether a log exists, on disk or in a day archive."""
+    archived = split_archive_path(path)
+    if archived is None:
+        return path.exists()
+    archive_path, member = archived
+    return member in _archive_members(archive_path)
+
+
+def log_mtime(path: Path) -> float:
+    """Return the modification time of a log, on disk or in a day archive."""
+    archived = split_archive_path(path)
+    if archived is None:
+        return path.stat().st_mtime
+    archive_path, member = archived
+    return datetime(*_archive_members(archive_path)[member].date_time).timestamp()
+
+
+def log_size(path: Path) -> int:
+    """Return the bytes a log takes on disk (compressed size for archived logs)."""
+    archived = split_archive_path(path)
+    if archived is None:
+        return path.stat().st_size
+    archive_path, member = archived
+    return _archive_members(archive_path)[member].compress_size
+
+
+def log_identity(path: Path) -> str:
+    """Return a string that changes whenever a log's content may have changed.
+
+    Inode, size and mtime of the file - or of the archive plus the
+    member's CRC for archived logs.
+    """
+    archived = split_archive_path(path)
+    if archived is None:
+        stat = path.stat()
+        return f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+    archive_path, member = archived
+    info = _archive_members(archive_path)[member]
+    return f"zip:{info.CRC}:{info.file_size}"
+
+
+def compress_file(path: Path, compression: str) -> None:
+    """Rewrite a plain log with the given compression, atomically."""
+    if compression == "none" or detect_compression(path) != "none":
+        return
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(path, "rb") as src, open(tmp_path, "wb") as raw:
+        if compression == "gzip":
+            dst = gzip.GzipFile(path.name, "wb", GZIP_LEVEL, raw)
+        else:
+            dst = lzma.LZMAFile(raw, "wb")
+        with dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+    os.replace(tmp_path, path)
+
+
+def decompress_file(path: Path) -> None:
+    """Rewrite a compressed log as plain JSONL, atomically.
+
+    Needed before appending: a resumed session is streamed line by line.
+    """
+    if detect_compression(path) == "none":
+        return
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open_log(path) as src, open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def layout_lock(logs_dir: Path) -> Iterator[None]:
+    """Hold the exclusive layout lock of a logs tree (flock, released on exit)."""
+    if fcntl is None:
+        yield
+        return
+
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(logs_dir / LAYOUT_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def follow_conversion(path: Path) -> Path:
+    """Return where a session log lives now.
+
+    A child session turns abc.jsonl into abc/abc.jsonl; an open file
+    handle follows the rename, but a stored path does not.
+    """
+    if path.exists():
+        return path
+
+    converted = path.parent / path.stem / path.name
+    if converted.exists():
+        return converted
+
+    return path
+
+
+def split_archive_path(path: Path) -> tuple[Path, str] | None:
+    """Split a virtual path into (archive, member name), or None if on disk."""
+    if not any(part.endswith(ARCHIVE_SUFFIX) for part in path.parts[:-1]):
+        return None
+
+    for parent in path.parents:
+        if parent.suffix == ARCHIVE_SUFFIX and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def archive_date(name: str) -> str:
+    """Strip the archive suffix from a top-level logs entry: '2025-01-14.zip' -> '2025-01-14'."""
+    return name.removesuffix(ARCHIVE_SUFFIX)
+
+
+def list_archives(logs_dir: Path) -> list[Path]:
+    """Return all day archives of a logs directory, newest first."""
+    return sorted(
+        (p for p in logs_dir.glob(f"*{ARCHIVE_SUFFIX}") if p.is_file()),
+        reverse=True,
+    )
+
+
+def read_archive_index(archive_path: Path) -> dict[str, dict]:
+    """Read the member index of a day archive: {member: {session_id, parent_id}}.
+
+    Falls back to the archive's own directory when the index is missing;
+    parent links are then read from the member headers.
+    """
+    index_path = archive_path.with_suffix(ARCHIVE_INDEX_SUFFIX)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            return json.load(f)["members"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    members = {}
+    for member in _archive_members(archive_path):
+        if member.endswith(".jsonl"):
+            members[member] = {
+                "session_id": Path(member).stem,
+                "parent_id": _member_parent_id(archive_path / member),
+            }
+    return members
+
+
+def write_archive_index(archive_path: Path, members: dict[str, dict]) -> None:
+    """Write the member index of a day archive, atomically."""
+    index_path = archive_path.with_suffix(ARCHIVE_INDEX_SUFFIX)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"members": members}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, index_path)
+
+
+def day_sources(logs_dir: Path) -> list[Path]:
+    """Date directories and day archives of a logs directory, oldest first."""
+    if not logs_dir.is_dir():
+        return []
+    return sorted(
+        p for p in logs_dir.iterdir()
+        if p.is_dir() or (p.suffix == ARCHIVE_SUFFIX and p.is_file())
+    )
+
+
+def day_signature(source: Path) -> str:
+    """A string that changes whenever a day's logs may have changed.
+
+    For a date directory: the number of directories in it and their
+    latest mtime. Adding, removing or converting a log changes a
+    directory, and the logger touches a log's directory when it closes
+    it, so appends count too. For a day archive: its size and mtime.
+    Per-day caches (--stats, the daemon's session index) key on it.
+    """
+    stat = source.stat()
+    if not source.is_dir():
+        return f"zip:{stat.st_size}:{stat.st_mtime_ns}"
+
+    dirs = 0
+    latest = stat.st_mtime_ns
+    pending = [source]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs += 1
+                    latest = max(latest, entry.stat(follow_symlinks=False).st_mtime_ns)
+                    pending.append(Path(entry.path))
+    return f"dir:{dirs}:{latest}"
+
+
+def _archive_members(archive_path: Path) -> dict[str, zipfile.ZipInfo]:
+    """Return the central directory of an archive, cached by file identity."""
+    stat = archive_path.stat()
+    key = (str(archive_path), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if key in _members_cache:
+        _members_cache.move_to_end(key)
+        return _members_cache[key]
+
+    with zipfile.ZipFile(archive_path) as zf:
+        members = {info.filename: info for info in zf.infolist()}
+
+    _members_cache[key] = members
+    if len(_members_cache) > _MEMBER_CACHE_SIZE:
+        _members_cache.popitem(last=False)
+    return members
+
+
+def _member_parent_id(path: Path) -> str | None:
+    from .logger import Logger
+
+    for entry in Logger.read_header(path):
+        if entry.get("type") == "aiwr_meta":
+            return entry.get("parent_id")
+    return None
@@ -0,0 +1,78 @@
+"""Run timing - monotonic milestones of a run and per-event receive offsets."""
+
+import os
+import re
+import time
+from typing import Any
+
+# Milestones of a run, in the order they normally happen
+TIMING_MARKS = ("spawn", "first_byte", "session_id", "first_text", "first_tool", "final", "exit")
+
+OFFSET_KEY = "aiwr_t"  # Receive offset spliced into logged events
+OFFSET_PEEK = 64  # Bytes at the end of a line searched for the offset
+
+_OFFSET_SUFFIX = re.compile(rb'(,\s*)?"aiwr_t":\s*(-?[0-9.eE+-]+)\s*\}\s*$')
+_WHITESPACE = b" \t\r\n"
+
+
+class RunTiming:
+    """Milestones of one run, in seconds since the run started.
+
+    Times come from the monotonic clock, so they are immune to wall
+    clock changes; only the first occurrence of a milestone counts.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.monotonic()
+        self.marks: dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return time.monotonic() - self._start
+
+    def mark(self, name: str) -> None:
+        """Record a milestone, unless it was already reached."""
+        if name not in self.marks:
+            self.marks[name] = round(self.elapsed(), 6)
+
+    def entry(self) -> dict[str, Any]:
+        """The aiwr_timing log entry; milestones never reached are null."""
+        return {"type": "aiwr_timing", **{name: self.marks.get(name) for name in TIMING_MARKS}}
+
+
+def get_event_timing() -> bool:
+    """Whether logged events carry their receive offset (AIWR_LOG_TIMING)."""
+    return os.environ.get("AIWR_LOG_TIMING", "").lower() in ("1", "true", "yes", "on")
+
+
+def splice_offset(raw: bytes, offset: float) -> bytes:
+    """Add `"aiwr_t": offset` as the last key of a raw JSON object line.
+
+    The line is not decoded: the key goes in front of the closing brace,
+    so the leading "type" stays where the fast type peek expects it.
+    """
+    end = raw.rfind(b"}")
+    if end < 0:
+        return raw
+
+    before = end - 1
+    while before >= 0 and raw[before] in _WHITESPACE:
+        before -= 1
+    separator = b"" if before >= 0 and raw[before] == ord("{") else b", "
+
+    field = separator + f'"{OFFSET_KEY}": {offset:.6f}'.encode()
+    view = memoryview(raw)
+    return b"".join((view[:end], field, view[end:]))
+
+
+def strip_offset(raw: bytes) -> tuple[bytes, float | None]:
+    """Remove a spliced receive offset; returns the original line and the offset."""
+    tail_start = max(len(raw) - OFFSET_PEEK, 0)
+    match = _OFFSET_SUFFIX.search(raw, tail_start)
+    if match is None:
+        return raw, None
+    try:
+        offset = float(match.group(2))
+    except ValueError:
+        return raw, None
+    return raw[:match.start()] + raw[match.end(2):].lstrip(), offset
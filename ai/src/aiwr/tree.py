@@ -1,10 +1,19 @@
 """Tree building for session listing and visualization."""
 
+import json
+import re
+from collections.abc import Iterator
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Any
 
+from .catalog import Catalog, open_catalog
 from .resume import SessionInfo, extract_session_info
-from .session import find_children, find_session_path, get_logs_dir, get_parent_id
+from .session import SessionIndex, get_logs_dir, scan_day, scan_sessions
+from .storage import ARCHIVE_SUFFIX, archive_date, log_exists, log_mtime
+
+_DAYS_AGO = re.compile(r"(\d+)d")
 
 
 @dataclass
@@ -16,21 +25,58 @@ class SessionNode:
     children: list["SessionNode"]
 
 
-def build_session_tree(session_id: str) -> SessionNode | None:
+def build_session_tree(session_id: str, index: SessionIndex | None = None) -> SessionNode | None:
     """Build a tree structure from a session and its children."""
-    session_path = find_session_path(session_id)
+    if index is None:
+        index = scan_sessions()
+
+    session_path = index.paths.get(session_id)
     if not session_path:
         return None
 
-    info = extract_session_info(session_path)
-    children = []
+    return _build_node_with_children(session_path, index)
+
+
+@dataclass
+class ListFilter:
+    """Which sessions --list shows.
+
+    Dates are inclusive YYYY-MM-DD bounds. Agent and status select root
+    sessions; a selected root is listed with its whole tree unless
+    `roots_only`. `limit` caps the number of roots.
+    """
 
-    for child_id in find_children(session_id):
-        child_node = build_session_tree(child_id)
-        if child_node:
-            children.append(child_node)
+    since: str | None = None
+    until: str | None = None
+    agent: str | None = None
+    status: str | None = None
+    limit: int | None = None
+    roots_only: bool = False
 
-    return SessionNode(info=info, path=session_path, children=children)
+    def has_date(self, date: str) -> bool:
+        """Check whether a day is in the date range."""
+        return (self.since is None or date >= self.since) and (self.until is None or date <= self.until)
+
+    def matches(self, info: SessionInfo) -> bool:
+        """Check whether a root session is selected."""
+        return (self.agent is None or info.agent == self.agent) and (
+            self.status is None or (info.status or "unknown") == self.status
+        )
+
+
+def parse_list_date(value: str) -> str:
+    """Turn a --since/--until value into a date: YYYY-MM-DD, or Nd for N days ago (UTC).
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    match = _DAYS_AGO.fullmatch(value)
+    if match:
+        return (datetime.now(timezone.utc).date() - timedelta(days=int(match.group(1)))).isoformat()
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD or Nd)") from None
 
 
 def list_all_sessions() -> dict[str, list[SessionNode]]:
@@ -40,79 +86,170 @@ def list_all_sessions() -> dict[str, list[SessionNode]]:
     Returns a dict: {date_string: [SessionNode, ...]}
     Only includes root sessions (no parent_id).
     """
+    return dict(iter_session_days())
+
+
+def iter_session_days(filters: ListFilter | None = None) -> Iterator[tuple[str, list[SessionNode]]]:
+    """
+    Yield (date, root sessions) one day at a time, newest first.
+
+    Within a day roots are ordered by their log's mtime, newest first, so
+    `limit` keeps the most recent ones. Only the days in the filter's
+    date range are read, and reading stops once `limit` roots were
+    yielded - the cost follows what is listed, not the size of the
+    history. Children logged on another day than their parent (the
+    parent's day was archived) are found through the catalog.
+    """
+    filters = filters or ListFilter()
     logs_dir = get_logs_dir()
-    result: dict[str, list[SessionNode]] = {}
+    if not logs_dir.is_dir():
+        return
 
-    if not logs_dir.exists():
-        return result
+    catalog = None if filters.roots_only else open_catalog(logs_dir)
+    remaining = filters.limit
+    for source in _day_sources_between(logs_dir, filters):
+        if remaining is not None and remaining <= 0:
+            return
 
-    # Sort date directories newest first
-    date_dirs = sorted(
-        [d for d in logs_dir.iterdir() if d.is_dir()],
-        reverse=True,
-    )
+        index = scan_day(source)
+        nodes = []
+        for path in _newest_first(index.roots.get(archive_date(source.name), [])):
+            if remaining is not None and len(nodes) >= remaining:
+                break
+            info = extract_session_info(path)
+            if filters.matches(info):
+                nodes.append(_build_day_node(info, path, index, catalog, filters.roots_only))
+
+        if remaining is not None:
+            remaining -= len(nodes)
+        if nodes:
+            yield archive_date(source.name), nodes
 
-    for date_dir in date_dirs:
-        date_str = date_dir.name
-        sessions = _collect_root_sessions(date_dir)
 
-        if sessions:
-            result[date_str] = sessions
+def _newest_first(paths: list[Path]) -> list[Path]:
+    """Sort a day's root logs by mtime, newest first (a vanished log goes last)."""
 
-    return result
+    def mtime(path: Path) -> float:
+        try:
+            return log_mtime(path)
+        except (OSError, KeyError):
+            return 0.0
 
+    return sorted(paths, key=mtime, reverse=True)
 
-def _collect_root_sessions(date_dir: Path) -> list[SessionNode]:
-    """Collect all root sessions (without parent) from a date directory."""
-    sessions = []
 
-    for item in date_dir.iterdir():
-        if item.is_file() and item.suffix == ".jsonl":
-            # Direct JSONL file
-            parent_id = get_parent_id(item)
-            if parent_id is None:  # Root session
-                node = _build_node_with_children(item)
-                sessions.append(node)
+def _day_sources_between(logs_dir: Path, filters: ListFilter) -> list[Path]:
+    """Date directories and day archives in the date range, newest first.
 
-        elif item.is_dir():
-            # Directory-based session
-            jsonl_path = item / f"{item.name}.jsonl"
-            if jsonl_path.exists():
-                parent_id = get_parent_id(jsonl_path)
-                if parent_id is None:  # Root session
-                    node = _build_node_with_children(jsonl_path)
-                    sessions.append(node)
+    Out-of-range days are told apart by name, without a stat.
+    """
+    sources = []
+    for name in sorted(entry.name for entry in logs_dir.iterdir()):
+        if not filters.has_date(archive_date(name)):
+            continue
+        source = logs_dir / name
+        if source.is_dir() or (name.endswith(ARCHIVE_SUFFIX) and source.is_file()):
+            sources.append(source)
+    sources.reverse()
+    return sources
+
+
+def _build_day_node(
+    info: SessionInfo,
+    path: Path,
+    index: SessionIndex,
+    catalog: Catalog | None,
+    roots_only: bool = False,
+    seen: frozenset[str] = frozenset(),
+) -> SessionNode:
+    """Build a session node with its children from a day's index and the catalog."""
+    if roots_only:
+        return SessionNode(info=info, path=path, children=[])
+
+    seen = seen | {info.session_id}
+    child_ids = list(index.children.get(info.session_id, []))
+    if catalog is not None:
+        child_ids += [c for c in catalog.children(info.session_id) if c not in child_ids]
+
+    children = []
+    for child_id in child_ids:
+        if child_id in seen:
+            continue
+        child_path = index.paths.get(child_id)
+        if child_path is None and catalog is not None:
+            child_path = catalog.find_path(child_id)
+            if child_path is not None and not log_exists(child_path):
+                child_path = None
+        if child_path is not None:
+            child = extract_session_info(child_path)
+            children.append(_build_day_node(child, child_path, index, catalog, seen=seen))
 
-    return sessions
+    return SessionNode(info=info, path=path, children=children)
 
 
-def _build_node_with_children(path: Path) -> SessionNode:
-    """Build a session node with all its children."""
+def _build_node_with_children(
+    path: Path,
+    index: SessionIndex,
+    seen: frozenset[str] = frozenset(),
+) -> SessionNode:
+    """Build a session node with all its children from the index."""
     info = extract_session_info(path)
+    seen = seen | {info.session_id}
     children = []
 
-    for child_id in find_children(info.session_id):
-        child_path = find_session_path(child_id)
-        if child_path:
-            child_node = _build_node_with_children(child_path)
-            children.append(child_node)
+    for child_id in index.children.get(info.session_id, []):
+        child_path = index.paths.get(child_id)
+        if child_path and child_id not in seen:
+            children.append(_build_node_with_children(child_path, index, seen))
 
     return SessionNode(info=info, path=path, children=children)
 
 
 def format_session_list(sessions_by_date: dict[str, list[SessionNode]]) -> str:
     """Format sessions for display."""
-    lines = []
+    return "\n".join(
+        format_session_day(date_str, sessions) for date_str, sessions in sessions_by_date.items()
+    )
 
-    for date_str, sessions in sessions_by_date.items():
-        lines.append(f"Sessions ({date_str}):")
 
-        for session in sessions:
-            lines.extend(_format_node(session, depth=0))
+def format_session_day(date_str: str, sessions: list[SessionNode]) -> str:
+    """Format the sessions of one day, as in format_session_list."""
+    lines = [f"Sessions ({date_str}):"]
+    for session in sessions:
+        lines.extend(_format_node(session, depth=0))
+    lines.append("")
+    return "\n".join(lines)
 
-        lines.append("")  # Empty line between dates
 
-    return "\n".join(lines)
+def session_records(
+    date_str: str,
+    node: SessionNode,
+    parent_id: str | None = None,
+    depth: int = 0,
+) -> Iterator[dict[str, Any]]:
+    """Flatten a session tree into one record per session (--list --json)."""
+    yield {
+        "session_id": node.info.session_id,
+        "date": date_str,
+        "parent_id": parent_id,
+        "depth": depth,
+        "agent": node.info.agent,
+        "model": node.info.model,
+        "status": node.info.status,
+        "prompt": node.info.prompt,
+        "path": str(node.path),
+    }
+    for child in node.children:
+        yield from session_records(date_str, child, node.info.session_id, depth + 1)
+
+
+def format_session_records(date_str: str, sessions: list[SessionNode]) -> str:
+    """NDJSON lines of one day's sessions."""
+    return "\n".join(
+        json.dumps(record, ensure_ascii=False)
+        for session in sessions
+        for record in session_records(date_str, session)
+    )
 
 
 def _format_node(node: SessionNode, depth: int) -> list[str]:
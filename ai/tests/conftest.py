@@ -0,0 +1,113 @@
+"""Shared fixtures: an empty logs tree, a writer of session logs and fake agents."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from aiwr import catalog, context_cache, search
+
+
+@pytest.fixture
+def logs_dir(tmp_path, monkeypatch) -> Path:
+    """An empty logs directory, used through AIWR_LOG_DIR."""
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    monkeypatch.setenv("AIWR_LOG_DIR", str(logs))
+    monkeypatch.setenv("AIWR_DAEMON", "off")
+    monkeypatch.delenv("AIWR_RETENTION", raising=False)
+    monkeypatch.setattr(catalog, "_catalogs", {})
+    monkeypatch.setattr(context_cache, "_caches", {})
+    monkeypatch.setattr(search, "_indexes", {})
+    return logs
+
+
+@pytest.fixture
+def write_log():
+    """Write a finished session log: aiwr_start, optional aiwr_meta, agent events, aiwr_summary."""
+
+    def write(
+        path: Path,
+        prompt: str = "prompt",
+        parent_id: str | None = None,
+        agent: str = "claude",
+        events: list[dict] | None = None,
+        status: str | None = "completed",
+        mtime: float | None = None,
+    ) -> Path:
+        entries = [{"type": "aiwr_start", "prompt": prompt, "agent": agent, "model": None}]
+        if parent_id is not None:
+            entries.append({"type": "aiwr_meta", "parent_id": parent_id})
+        entries.extend(events or [])
+        if status is not None:
+            entries.append({"type": "aiwr_summary", "agent": agent, "prompt": prompt, "status": status})
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    return write
+
+
+# Speaks just enough of each agent's output format. FAKE_DELAY delays the
+# answer, FAKE_TRACE collects "agent prompt" lines as runs start, and
+# FAKE_FAIL makes a run exit 1 without a result.
+FAKE_AGENT = """#!{python}
+import json, os, sys, time, uuid
+
+name = os.path.basename(sys.argv[0])
+args = sys.argv[1:]
+if name == "codex" and len(args) > 2 and args[-2] == "resume":
+    args = args[:-2]
+prompt = args[-1]
+sid = args[args.index("--session-id") + 1] if "--session-id" in args else str(uuid.uuid4())
+if os.environ.get("FAKE_TRACE"):
+    with open(os.environ["FAKE_TRACE"], "a") as f:
+        f.write(name + " " + prompt + "\\n")
+
+
+def out(event):
+    print(json.dumps(event), flush=True)
+
+
+print("not json")
+if name == "claude":
+    out({{"type": "system", "subtype": "init", "session_id": sid}})
+elif name == "codex":
+    out({{"type": "thread.started", "thread_id": sid}})
+else:
+    out({{"type": "init", "session_id": sid, "model": "fake"}})
+time.sleep(float(os.environ.get("FAKE_DELAY", "0")))
+if os.environ.get("FAKE_FAIL"):
+    sys.exit(1)
+
+answer = name + " says " + prompt
+if name == "claude":
+    out({{"type": "assistant", "message": {{"content": [{{"type": "text", "text": answer}}]}}, "session_id": sid}})
+    out({{"type": "result", "subtype": "success", "result": answer, "session_id": sid}})
+elif name == "codex":
+    out({{"type": "item.completed", "item": {{"type": "agent_message", "text": answer}}}})
+    out({{"type": "turn.completed", "usage": {{}}}})
+else:
+    out({{"type": "message", "role": "assistant", "content": answer}})
+    out({{"type": "result", "status": "success"}})
+"""
+
+
+@pytest.fixture
+def fake_agents(tmp_path, monkeypatch) -> Path:
+    """Fake claude, codex and gemini commands, first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("claude", "codex", "gemini"):
+        script = bin_dir / name
+        script.write_text(FAKE_AGENT.format(python=sys.executable))
+        script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    monkeypatch.delenv("FAKE_DELAY", raising=False)
+    monkeypatch.delenv("FAKE_FAIL", raising=False)
+    return bin_dir
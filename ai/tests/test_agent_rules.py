@@ -0,0 +1,119 @@
+"""Agent rule tables read events exactly like the per-agent parsing they replaced.
+
+The reference functions below are the extract_* methods as they were
+before agents declared EventRule tables; each fixture under
+fixtures/events is a recorded-style stream of one agent's output.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from aiwr.agents import get_agent
+from aiwr.agents.base import EVENT_ROLES
+
+FIXTURES = Path(__file__).parent / "fixtures" / "events"
+
+
+def _claude(event: dict[str, Any]) -> dict[str, Any]:
+    prompt = None
+    if event.get("type") == "user" or (event.get("type") == "message" and event.get("role") == "user"):
+        prompt = event.get("content") or event.get("message")
+    is_result = event.get("type") == "result"
+    return {
+        "session_id": event.get("session_id"),
+        "prompt": prompt,
+        "result": event.get("result") if is_result else None,
+        "final": is_result,
+        "status": "completed" if is_result else None,
+    }
+
+
+def _codex(event: dict[str, Any]) -> dict[str, Any]:
+    result = None
+    if event.get("type") == "item.completed":
+        item = event.get("item", {})
+        if isinstance(item, dict):
+            result = item.get("text")
+    done = event.get("type") == "turn.completed"
+    return {
+        "session_id": event.get("thread_id"),
+        "prompt": event.get("text") if event.get("type") == "user.input" else None,
+        "result": result,
+        "final": done,
+        "status": "completed" if done else None,
+    }
+
+
+def _gemini(event: dict[str, Any]) -> dict[str, Any]:
+    is_message = event.get("type") == "message"
+    is_result = event.get("type") == "result"
+    return {
+        "session_id": event.get("session_id"),
+        "prompt": event.get("content") if is_message and event.get("role") == "user" else None,
+        "result": event.get("content") if is_message and event.get("role") == "assistant" else None,
+        "final": is_result,
+        "status": event.get("status") if is_result else None,
+        "reset": event.get("type") in ("tool_use", "tool_result"),
+    }
+
+
+def _opencode(event: dict[str, Any]) -> dict[str, Any]:
+    result = None
+    if event.get("type") == "text":
+        result = event.get("part", {}).get("text")
+    status = None
+    if event.get("type") == "step_finish":
+        reason = event.get("part", {}).get("reason")
+        status = "completed" if reason == "stop" else reason
+    return {
+        "session_id": event.get("sessionID"),
+        "prompt": None,
+        "result": result,
+        "final": event.get("type") == "step_finish",
+        "status": status,
+    }
+
+
+BASELINES = {"claude": _claude, "codex": _codex, "gemini": _gemini, "opencode": _opencode}
+
+
+def _events(agent_name: str) -> list[dict[str, Any]]:
+    with open(FIXTURES / f"{agent_name}.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("agent_name", sorted(BASELINES))
+def test_rules_match_baseline(agent_name):
+    agent = get_agent(agent_name)
+    for event in _events(agent_name):
+        expected = BASELINES[agent_name](event)
+        # Without a reset rule, every new result replaces the last
+        expected.setdefault("reset", expected["result"] is not None)
+
+        views = {
+            "session_id": agent.extract_session_id(event),
+            "prompt": agent.extract_prompt(event),
+            "result": agent.extract_result(event),
+            "final": agent.is_final(event),
+            "status": agent.extract_status(event),
+            "reset": agent.should_reset_result(event),
+        }
+        assert views == expected, event
+        assert agent.classify(event, EVENT_ROLES)._asdict() == expected, event
+
+
+@pytest.mark.parametrize("agent_name", sorted(BASELINES))
+def test_fixture_covers_every_role(agent_name):
+    agent = get_agent(agent_name)
+    found = set()
+    for event in _events(agent_name):
+        found.update(role for role, value in agent.classify(event)._asdict().items() if value)
+    expected = {"session_id", "result", "final", "status"}
+    if agent_name != "opencode":
+        expected.add("prompt")  # OpenCode's output doesn't carry the prompt
+    if agent_name == "gemini":
+        expected.add("reset")
+    assert expected <= found
@@ -0,0 +1,48 @@
+"""--batch: per-item records and failure isolation."""
+
+import json
+
+from aiwr.batch import run_batch
+
+
+def test_spawn_failure_fails_only_its_item(logs_dir, tmp_path, monkeypatch, capsys):
+    # On PATH, but exec fails: the interpreter doesn't exist
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    broken = bin_dir / "claude"
+    broken.write_text("#!/nonexistent/interpreter\n")
+    broken.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+    batch = tmp_path / "prompts.jsonl"
+    batch.write_text(
+        json.dumps({"prompt": "first", "id": "a"}) + "\n"
+        + "not json\n"
+        + json.dumps({"prompt": "second", "id": "b"}) + "\n"
+    )
+
+    assert run_batch(batch, "claude", [], jobs=2) == 1
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["index"] for record in records] == [0, 1, 2]
+    assert [record.get("id") for record in records] == ["a", None, "b"]
+    assert all(record["error"] and record["exit_code"] == 1 for record in records)
+
+
+def test_capped_agent_doesnt_hold_up_others(logs_dir, fake_agents, tmp_path, monkeypatch, capsys):
+    trace = tmp_path / "trace"
+    monkeypatch.setenv("FAKE_TRACE", str(trace))
+    monkeypatch.setenv("FAKE_DELAY", "0.3")
+    batch = tmp_path / "prompts.jsonl"
+    batch.write_text("".join(
+        json.dumps({"prompt": f"{agent}{n}", "agent": agent}) + "\n"
+        for agent, n in [*(("claude", n) for n in range(6)), ("codex", 0), ("codex", 1)]
+    ))
+
+    assert run_batch(batch, "claude", [], jobs=4, agent_jobs={"claude": 1}) == 0
+    starts = trace.read_text().splitlines()
+    claude_starts = [i for i, line in enumerate(starts) if line.startswith("claude")]
+    codex_starts = [i for i, line in enumerate(starts) if line.startswith("codex")]
+    # Both codex items start while the first claude item is still running
+    assert max(codex_starts) < claude_starts[1]
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [record["exit_code"] for record in records] == [0] * 8
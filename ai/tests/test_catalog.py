@@ -0,0 +1,91 @@
+"""Session catalog: per-day catch-up with the logs tree, and lookups without it."""
+
+import os
+import shutil
+import time
+
+from aiwr import catalog as catalog_module
+from aiwr import session
+from aiwr.catalog import Catalog, open_catalog
+from aiwr.logger import Logger
+
+
+def _reopen(logs_dir, monkeypatch) -> Catalog:
+    """Open the catalog as a new process would."""
+    monkeypatch.setattr(catalog_module, "_catalogs", {})
+    return open_catalog(logs_dir)
+
+
+def test_changed_day_is_rescanned_alone(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl")
+    write_log(logs_dir / "2026-01-02" / "b1.jsonl")
+    open_catalog(logs_dir)
+
+    # Written behind the catalog's back
+    write_log(logs_dir / "2026-01-02" / "b2.jsonl")
+    later = time.time() + 10  # Whatever the file system's mtime granularity
+    os.utime(logs_dir / "2026-01-02", (later, later))
+    scanned = []
+    scan_session = catalog_module._scan_session
+    monkeypatch.setattr(
+        catalog_module, "_scan_session", lambda path, extract: scanned.append(path.name) or scan_session(path, extract)
+    )
+
+    catalog = _reopen(logs_dir, monkeypatch)
+    assert sorted(scanned) == ["b1.jsonl", "b2.jsonl"]
+    assert catalog.find_path("b2") == logs_dir / "2026-01-02" / "b2.jsonl"
+    assert catalog.find_path("a1") == logs_dir / "2026-01-01" / "a1.jsonl"
+
+
+def test_own_writes_dont_cause_rescans(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl")
+    catalog = open_catalog(logs_dir)
+    catalog.upsert("a2", write_log(logs_dir / "2026-01-01" / "a2.jsonl"))
+
+    monkeypatch.setattr(catalog_module, "_scan_session", None)  # Any rescan fails
+    assert _reopen(logs_dir, monkeypatch).find_path("a2") is not None
+
+
+def test_removed_day_drops_its_rows(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl")
+    write_log(logs_dir / "2026-01-02" / "b1.jsonl")
+    open_catalog(logs_dir)
+
+    shutil.rmtree(logs_dir / "2026-01-01")
+    catalog = _reopen(logs_dir, monkeypatch)
+    assert catalog.find_path("a1") is None
+    assert catalog.find_path("b1") is not None
+
+
+def test_killed_run_reads_as_interrupted(logs_dir, write_log):
+    path = write_log(logs_dir / "2026-01-01" / "k1.jsonl", status=None)  # No trailer
+    catalog = open_catalog(logs_dir)
+    catalog.upsert("k1", path, status="running")
+    assert catalog.get("k1").status == "running"
+
+    idle = time.time() - 2 * 3600
+    os.utime(path, (idle, idle))
+    assert catalog.get("k1").status == "interrupted"
+
+
+def test_rescan_settles_killed_run(logs_dir, write_log, monkeypatch):
+    path = write_log(logs_dir / "2026-01-01" / "k1.jsonl", status=None)
+    open_catalog(logs_dir).upsert("k1", path, status="running")
+    idle = time.time() - 2 * 3600
+    os.utime(path, (idle, idle))
+
+    catalog = _reopen(logs_dir, monkeypatch)
+    catalog.rebuild()
+    row = catalog._conn.execute("SELECT status FROM sessions WHERE session_id = 'k1'").fetchone()
+    assert row == ("interrupted",)
+
+
+def test_find_children_without_catalog_reads_headers(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "r1" / "r1.jsonl")
+    write_log(logs_dir / "2026-01-01" / "r1" / "c1.jsonl", parent_id="r1")
+    write_log(logs_dir / "2026-01-02" / "c2.jsonl", parent_id="r1")
+    write_log(logs_dir / "2026-01-02" / "x1.jsonl", parent_id="other")
+    monkeypatch.setattr(session, "open_catalog", lambda logs_dir: None)
+    monkeypatch.setattr(Logger, "load", None)  # Whole logs are never read
+
+    assert sorted(session.find_children("r1")) == ["c1", "c2"]
@@ -0,0 +1,75 @@
+"""Compaction: closed date directories become day archives that still read like logs."""
+
+import time
+
+from aiwr.catalog import open_catalog
+from aiwr.cli import main
+from aiwr.compact import compact_logs, prune_archive
+from aiwr.logger import Logger
+from aiwr.reader import LogReader
+from aiwr.session import find_children, find_session_path
+from aiwr.storage import read_archive_index
+
+OLD = time.time() - 90 * 86400
+
+
+def _old_tree(logs_dir, write_log):
+    day = logs_dir / "2026-01-01"
+    write_log(day / "r1" / "r1.jsonl", prompt="root", mtime=OLD)
+    write_log(day / "r1" / "c1.jsonl", prompt="child", parent_id="r1", mtime=OLD)
+    write_log(day / "x1.jsonl", prompt="other", mtime=OLD)
+    return day
+
+
+def test_compacted_day_reads_like_logs(logs_dir, write_log, capsys):
+    day = _old_tree(logs_dir, write_log)
+    open_catalog(logs_dir)
+
+    assert compact_logs(30) == [logs_dir / "2026-01-01.zip"]
+    assert not day.exists()
+    assert read_archive_index(logs_dir / "2026-01-01.zip") == {
+        "r1/c1.jsonl": {"session_id": "c1", "parent_id": "r1"},
+        "r1/r1.jsonl": {"session_id": "r1", "parent_id": None},
+        "x1.jsonl": {"session_id": "x1", "parent_id": None},
+    }
+
+    path = find_session_path("c1")
+    assert path == logs_dir / "2026-01-01.zip" / "r1" / "c1.jsonl"
+    assert Logger.load(path)[0]["prompt"] == "child"
+    with LogReader(path) as reader:
+        assert reader[-1]["type"] == "aiwr_summary"
+    assert find_children("r1") == ["c1"]
+
+    assert main(["--list"], forward=False) == 0
+    out = capsys.readouterr().out
+    assert "root" in out and "└─ c1" in out
+
+
+def test_recent_days_are_left_alone(logs_dir, write_log):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl", mtime=OLD)
+    write_log(logs_dir / "2026-01-02" / "b1.jsonl")  # Written just now: may still be running
+    assert compact_logs(30) == [logs_dir / "2026-01-01.zip"]
+    assert (logs_dir / "2026-01-02" / "b1.jsonl").exists()
+
+
+def test_late_log_extends_archive(logs_dir, write_log):
+    _old_tree(logs_dir, write_log)
+    compact_logs(30)
+    write_log(logs_dir / "2026-01-01" / "y1.jsonl", mtime=OLD)
+
+    compact_logs(30)
+    assert set(read_archive_index(logs_dir / "2026-01-01.zip")) == {
+        "r1/c1.jsonl", "r1/r1.jsonl", "x1.jsonl", "y1.jsonl",
+    }
+    assert Logger.load(find_session_path("r1"))[0]["prompt"] == "root"
+
+
+def test_prune_archive(logs_dir, write_log):
+    _old_tree(logs_dir, write_log)
+    archive = compact_logs(30)[0]
+
+    prune_archive(archive, {"r1"})
+    assert set(read_archive_index(archive)) == {"x1.jsonl"}
+    prune_archive(archive, {"x1.jsonl"})
+    assert not archive.exists()
+    assert not archive.with_suffix(".idx.json").exists()
@@ -0,0 +1,81 @@
+"""Resume context: agent extraction rules, read newest first within a token budget."""
+
+import pytest
+
+from aiwr.context import CHARS_PER_TOKEN, build_context, get_context_budget
+from aiwr.reader import LogReader
+
+
+def _say(role, text):
+    return {"type": role, "message": {"content": [{"type": "text", "text": text}]}}
+
+
+TOOL = {"type": "assistant", "message": {"content": [
+    {"type": "tool_use", "name": "Bash", "input": {"command": "x" * 1000}},
+]}}
+EVENTS = [
+    {"type": "system", "subtype": "init", "session_id": "s1"},
+    _say("user", "first question"),
+    _say("assistant", "first answer"),
+    TOOL,
+    {"type": "user", "message": {"content": [{"type": "tool_result", "content": "ok"}]}},
+    {"type": "result", "result": "all done"},
+]
+
+
+def _context(logs_dir, write_log, budget, events=EVENTS):
+    path = write_log(logs_dir / "2026-01-01" / "s1.jsonl", events=events)
+    with LogReader(path) as reader:
+        return build_context(reader, "claude", budget)
+
+
+def test_unlimited_keeps_every_item(logs_dir, write_log):
+    lines = _context(logs_dir, write_log, 0).splitlines()
+    assert lines[:2] == ["User: first question", "Assistant: first answer"]
+    assert lines[2] == 'Tool call: Bash({"command": "' + "x" * 187 + "... [815 chars truncated])"
+    assert lines[3:] == ["Tool result: ok", "Result: all done"]
+
+
+def test_budget_keeps_the_newest_items(logs_dir, write_log):
+    budget = len("Tool result: ok\nResult: all done\n") // CHARS_PER_TOKEN + 1
+    assert _context(logs_dir, write_log, budget).splitlines() == [
+        "[4 earlier events omitted]",
+        "Tool result: ok",
+        "Result: all done",
+    ]
+
+
+def test_newest_item_kept_even_over_budget(logs_dir, write_log):
+    events = [_say("user", "question"), {"type": "result", "result": "y" * 100}]
+    context = _context(logs_dir, write_log, 5, events)
+    assert context.splitlines() == [
+        "[1 earlier events omitted]",
+        "Result: " + "y" * 12 + "... [88 chars truncated]",
+    ]
+
+
+def test_long_session_reads_only_its_tail(logs_dir, write_log, monkeypatch):
+    events = [_say("assistant", f"step {n}") for n in range(1000)]
+    read = []
+    raw = LogReader.raw
+    monkeypatch.setattr(LogReader, "raw", lambda self, index: read.append(index) or raw(self, index))
+
+    context = _context(logs_dir, write_log, 10, events)
+    assert context.splitlines()[-1] == "Assistant: step 999"
+    assert len(read) < 10
+
+
+def test_failed_run_stderr(logs_dir, write_log):
+    events = [_say("user", "question"), {"type": "aiwr_stderr", "exit_code": 1, "lines": ["boom"]}]
+    assert _context(logs_dir, write_log, 0, events).splitlines()[-1] == "Stderr: boom"
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("AIWR_CONTEXT_BUDGET", "0")
+    assert get_context_budget() == 0
+    assert get_context_budget(100) == 100
+    monkeypatch.setenv("AIWR_CONTEXT_BUDGET", "lots")
+    with pytest.raises(ValueError, match="Invalid AIWR_CONTEXT_BUDGET: lots"):
+        get_context_budget()
+    with pytest.raises(ValueError, match="can't be negative"):
+        get_context_budget(-1)
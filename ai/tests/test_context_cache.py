@@ -0,0 +1,82 @@
+"""Context cache: resume-tree blocks reused while their logs are unchanged."""
+
+import sqlite3
+
+from aiwr import resume
+from aiwr.catalog import open_catalog
+from aiwr.context_cache import CACHE_FILE, ContextCache, open_context_cache
+from aiwr.resume import build_resume_tree_prompt
+
+
+def _tree(logs_dir, write_log):
+    day = logs_dir / "2026-01-01"
+    write_log(day / "r1" / "r1.jsonl", prompt="root task")
+    write_log(day / "r1" / "c1.jsonl", prompt="child task", parent_id="r1")
+    open_catalog(logs_dir)  # Built up front: it reads each log once too
+    return day
+
+
+def _formatted(monkeypatch) -> list[str]:
+    """Record the sessions formatted from their logs."""
+    formatted = []
+    extract = resume.extract_session_info
+    monkeypatch.setattr(resume, "extract_session_info", lambda path: formatted.append(path.stem) or extract(path))
+    return formatted
+
+
+def test_unchanged_logs_come_from_cache(logs_dir, write_log, monkeypatch):
+    day = _tree(logs_dir, write_log)
+    formatted = _formatted(monkeypatch)
+    first = build_resume_tree_prompt("r1")
+    assert sorted(formatted) == ["c1", "r1"]
+
+    assert build_resume_tree_prompt("r1") == first
+    assert sorted(formatted) == ["c1", "r1"]
+
+    write_log(day / "r1" / "c1.jsonl", prompt="child task, retried", parent_id="r1")
+    assert "child task, retried" in build_resume_tree_prompt("r1")
+    assert sorted(formatted) == ["c1", "c1", "r1"]  # Only the changed log
+
+
+def test_blocks_are_per_budget(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    formatted = _formatted(monkeypatch)
+    build_resume_tree_prompt("r1", budget=10_000)
+    build_resume_tree_prompt("r1", budget=0)
+    assert len(formatted) == 4
+
+
+def test_least_recently_used_blocks_evicted(logs_dir, write_log):
+    day = _tree(logs_dir, write_log)
+    cache = ContextCache(logs_dir, max_bytes=100)
+    block = {"output": "x" * 40}
+    cache.put(day / "r1" / "r1.jsonl", 0, block)
+    cache.put(day / "r1" / "c1.jsonl", 0, block)
+    cache.get(day / "r1" / "r1.jsonl", 0)
+
+    cache.trim()
+    assert cache.get(day / "r1" / "r1.jsonl", 0) == block
+    assert cache.get(day / "r1" / "c1.jsonl", 0) is None
+    cache.close()
+
+
+def test_disabled_cache(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    monkeypatch.setenv("AIWR_CONTEXT_CACHE_MB", "0")
+    assert open_context_cache(logs_dir) is None
+    assert "child task" in build_resume_tree_prompt("r1")
+    assert not (logs_dir / CACHE_FILE).exists()
+
+
+def test_broken_cache_is_skipped(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+
+    class BrokenCache:
+        def get(self, path, budget):
+            raise sqlite3.DatabaseError("database disk image is malformed")
+
+        def trim(self):
+            raise sqlite3.DatabaseError("database disk image is malformed")
+
+    monkeypatch.setattr(resume, "open_context_cache", lambda logs_dir: BrokenCache())
+    assert "child task" in build_resume_tree_prompt("r1")
@@ -0,0 +1,84 @@
+"""Daemon: the socket directory check and the client watcher."""
+
+import io
+import os
+import signal
+import threading
+
+from aiwr import daemon
+
+
+class _Client:
+    """The worker's channel to a client that may have gone away."""
+
+    def __init__(self, gone: bool):
+        self.gone = gone
+        self.sent: list[dict] = []
+
+    def send(self, message: dict) -> None:
+        if self.gone:
+            raise BrokenPipeError()
+        self.sent.append(message)
+
+
+def _kills(monkeypatch) -> list[int]:
+    sent: list[int] = []
+    monkeypatch.setattr(daemon.os, "kill", lambda pid, signum: sent.append(signum))
+    monkeypatch.setattr(daemon, "PROBE_INTERVAL", 0.01)
+    return sent
+
+
+def test_client_gone_interrupts_running_command(monkeypatch):
+    sent = _kills(monkeypatch)
+    daemon._watch_client(io.BytesIO(b""), _Client(gone=True), threading.Event())
+    assert sent == [signal.SIGTERM]
+
+
+def test_half_closed_client_keeps_command_running(monkeypatch):
+    sent = _kills(monkeypatch)
+    client = _Client(gone=False)
+    done = threading.Event()
+    threading.Timer(0.1, done.set).start()  # The command returns
+    daemon._watch_client(io.BytesIO(b""), client, done)
+    assert sent == []
+    assert client.sent and all(message == {} for message in client.sent)
+
+
+def test_signals_after_command_are_ignored(monkeypatch):
+    sent = _kills(monkeypatch)
+    done = threading.Event()
+    done.set()
+    daemon._watch_client(io.BytesIO(b'{"signal": 2}\n'), _Client(gone=True), done)
+    assert sent == []
+
+
+def test_refuses_open_socket_dir(logs_dir, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    socket_dir = daemon.socket_path(logs_dir).parent
+    socket_dir.mkdir(parents=True, mode=0o755)
+    os.chmod(socket_dir, 0o755)
+
+    assert daemon.serve() == 1
+    assert "unsafe socket directory" in capsys.readouterr().err
+    assert daemon.connect(logs_dir) is None
+
+
+def test_refuses_symlinked_socket_dir(logs_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    target = tmp_path / "elsewhere"
+    target.mkdir(mode=0o700)
+    socket_dir = daemon.socket_path(logs_dir).parent
+    socket_dir.parent.mkdir()
+    socket_dir.symlink_to(target)
+
+    assert daemon.serve() == 1
+
+
+def test_creates_private_socket_dir(tmp_path):
+    (tmp_path / "run").mkdir()
+    old = os.umask(0o177)  # Would leave the directory unenterable
+    try:
+        daemon._make_private_dir(tmp_path / "run" / "aiwr")
+    finally:
+        os.umask(old)
+    assert (tmp_path / "run" / "aiwr").stat().st_mode & 0o777 == 0o700
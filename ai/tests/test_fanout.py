@@ -0,0 +1,51 @@
+"""--fanout: one root session, a child per target, failure isolation."""
+
+import json
+
+from aiwr.fanout import parse_targets, run_fanout
+from aiwr.logger import Logger
+from aiwr.session import find_session_path
+
+
+def _output(capsys) -> list[dict]:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_children_nest_under_root(logs_dir, fake_agents, capsys):
+    assert run_fanout(parse_targets("claude,codex"), "hi", []) == 0
+    start, root, merged = _output(capsys)
+    assert start["agent"] == "fanout" and start["model"] == "claude,codex"
+    assert merged["status"] == "completed"
+    assert [r["result"] for r in merged["results"]] == ["claude says hi", "codex says hi"]
+
+    root_path = find_session_path(root["session_id"])
+    assert root_path.parent.name == root["session_id"]
+    for result in merged["results"]:
+        assert find_session_path(result["session_id"]).parent == root_path.parent
+
+    entries = Logger.load(root_path)
+    assert [e["agent"] for e in entries if e["type"] == "aiwr_child_result"] == ["claude", "codex"]
+    assert entries[-1]["type"] == "aiwr_summary"
+
+
+def test_spawn_failure_fails_only_its_target(logs_dir, fake_agents, capsys):
+    # On PATH, but exec fails: the interpreter doesn't exist
+    (fake_agents / "codex").write_text("#!/nonexistent/interpreter\n")
+
+    assert run_fanout(parse_targets("claude,codex"), "hi", []) == 1
+    _, root, merged = _output(capsys)
+    claude, codex = merged["results"]
+    assert claude["exit_code"] == 0 and claude["result"] == "claude says hi"
+    assert codex["exit_code"] == 1 and codex["error"]
+    assert merged["status"] == "failed"
+
+    summary = Logger.read_summary(find_session_path(root["session_id"]))
+    assert summary["status"] == "failed" and summary["exit_code"] == 1
+
+
+def test_stream_prints_each_result(logs_dir, fake_agents, capsys):
+    (fake_agents / "codex").write_text("#!/nonexistent/interpreter\n")
+
+    assert run_fanout(parse_targets("claude,codex"), "hi", [], stream=True) == 1
+    _, _, *results = _output(capsys)
+    assert sorted(r["agent"] for r in results) == ["claude", "codex"]
@@ -0,0 +1,107 @@
+"""--follow: a live tail of a session and the children it starts."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from aiwr import follow
+from aiwr.follow import PollWatcher, follow_session
+from aiwr.storage import compress_file
+
+START = {"type": "aiwr_start", "prompt": "go", "agent": "claude", "model": None}
+SUMMARY = {"type": "aiwr_summary", "agent": "claude", "status": "completed"}
+
+
+def _line(entry: dict) -> bytes:
+    return json.dumps(entry).encode() + b"\n"
+
+
+class _NoWait(PollWatcher):
+    """A finished tree must be read to the end without waiting."""
+
+    def wait(self) -> None:
+        raise AssertionError("waited on a finished tree")
+
+
+def _follow(session_id: str, as_json: bool = False) -> tuple[list[str], threading.Thread]:
+    lines: list[str] = []
+    thread = threading.Thread(target=follow_session, args=(session_id, lines.append, as_json), daemon=True)
+    thread.start()
+    return lines, thread
+
+
+def _finished(thread: threading.Thread) -> bool:
+    thread.join(timeout=5)
+    return not thread.is_alive()
+
+
+def test_finished_tree(logs_dir, write_log, monkeypatch):
+    monkeypatch.setattr(follow, "open_watcher", _NoWait)
+    day = logs_dir / "2026-01-01"
+    write_log(day / "r1" / "r1.jsonl", prompt="root")
+    write_log(day / "r1" / "c1" / "c1.jsonl", prompt="child", parent_id="r1")
+    write_log(day / "r1" / "c1" / "g1.jsonl", prompt="grandchild", parent_id="c1")
+
+    lines = []
+    assert follow_session("r1", lines.append) == 0
+    assert lines[0] == "[r1] session r1"
+    assert "  [c1] session c1 (parent r1)" in lines
+    assert "    [g1] session g1 (parent c1)" in lines
+    assert sum(line.startswith("  [c1] {") for line in lines) == 3
+
+
+def test_json_lines_carry_the_event(logs_dir, write_log):
+    write_log(logs_dir / "2026-01-01" / "r1" / "r1.jsonl", events=[{"type": "result", "result": "ok"}])
+    lines, thread = _follow("r1", as_json=True)
+    assert _finished(thread)
+    records = [json.loads(line) for line in lines]
+    assert [record["event"]["type"] for record in records] == ["aiwr_start", "result", "aiwr_summary"]
+    assert records[1] == {"session_id": "r1", "parent_id": None, "depth": 0, "event": {"type": "result", "result": "ok"}}
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_live_run(logs_dir, monkeypatch, inotify):
+    if not inotify:
+        monkeypatch.setattr(follow, "open_watcher", PollWatcher)
+    session_dir = logs_dir / "2026-01-01" / "r1"
+    session_dir.mkdir(parents=True)
+    root = session_dir / "r1.jsonl"
+    root.write_bytes(_line(START))
+
+    lines, thread = _follow("r1")
+    with root.open("ab") as f:
+        f.write(b'{"type": "assistant", "n": ')  # Half a line: held back
+        f.flush()
+        time.sleep(0.3)
+        assert not any('"n"' in line for line in lines)
+        f.write(b"1}\n")
+    (session_dir / "c1.jsonl").write_bytes(_line(START))
+    time.sleep(0.3)
+    assert thread.is_alive()
+
+    with root.open("ab") as f:
+        f.write(_line(SUMMARY))
+    time.sleep(0.3)
+    assert thread.is_alive()  # The child still runs
+    with (session_dir / "c1.jsonl").open("ab") as f:
+        f.write(_line(SUMMARY))
+
+    assert _finished(thread)
+    assert '[r1] {"type": "assistant", "n": 1}' in lines
+    assert "  [c1] session c1 (parent r1)" in lines
+
+
+def test_compressed_log_is_not_waited_on(logs_dir, write_log, monkeypatch):
+    monkeypatch.setattr(follow, "open_watcher", _NoWait)
+    path = write_log(logs_dir / "2026-01-01" / "r1.jsonl", status=None)  # Killed: no summary
+    compress_file(path, "gzip")
+    lines = []
+    assert follow_session("r1", lines.append) == 0
+    assert len(lines) == 2
+
+
+def test_unknown_session(logs_dir):
+    with pytest.raises(ValueError, match="Session not found: nope"):
+        follow_session("nope", print)
@@ -0,0 +1,39 @@
+"""Retention: collected trees leave nothing behind in the caches."""
+
+import sqlite3
+import time
+
+from aiwr.context_cache import CACHE_FILE as CONTEXT_CACHE_FILE
+from aiwr.gc import collect_garbage, parse_retention
+from aiwr.resume import build_resume_tree_prompt
+from aiwr.search import open_search_index, search_sessions
+from aiwr.stats import CACHE_FILE as STATS_CACHE_FILE
+from aiwr.stats import collect_stats
+
+OLD = time.time() - 90 * 86400
+
+
+def _rows(path, table):
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute(f"SELECT * FROM {table}")]
+
+
+def test_collected_tree_is_purged_from_caches(logs_dir, write_log):
+    old_day = logs_dir / "2026-01-01"
+    write_log(old_day / "a1" / "a1.jsonl", prompt="needle root", mtime=OLD)
+    write_log(old_day / "a1" / "a2.jsonl", prompt="needle child", parent_id="a1", mtime=OLD)
+    write_log(logs_dir / "2026-01-02" / "b1.jsonl", prompt="needle kept")
+
+    assert {hit.session_id for hit in search_sessions("needle")} == {"a1", "a2", "b1"}
+    build_resume_tree_prompt("a1", budget=10_000)
+    collect_stats()
+    assert _rows(logs_dir / CONTEXT_CACHE_FILE, "blocks")
+    assert "2026-01-01" in _rows(logs_dir / STATS_CACHE_FILE, "days")
+
+    result = collect_garbage(parse_retention("30d"))
+    assert [tree.root_id for tree in result.deleted] == ["a1"]
+
+    # Purged in the same pass, before any catch-up
+    assert [hit.session_id for hit in open_search_index(logs_dir).search("needle")] == ["b1"]
+    assert _rows(logs_dir / CONTEXT_CACHE_FILE, "blocks") == []
+    assert _rows(logs_dir / STATS_CACHE_FILE, "days") == ["2026-01-02"]
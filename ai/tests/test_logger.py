@@ -0,0 +1,38 @@
+"""Reading logs that hold framed lines which aren't valid JSON."""
+
+from aiwr.event import parse_log_bytes
+from aiwr.logger import Logger
+from aiwr.reader import LogReader
+
+START = b'{"type": "aiwr_start", "prompt": "p", "agent": "claude", "model": null}\n'
+
+
+def test_framed_garbage_is_kept_but_skipped(tmp_path):
+    event = parse_log_bytes(b"{garbage}")
+    assert event is not None
+    assert dict(event) == {}
+
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(START + b'{garbage}\n{"type": "result"}\n')
+    assert [e["type"] for e in Logger.load(path)] == ["aiwr_start", "result"]
+    with LogReader(path, cache=False) as reader:
+        assert [e["type"] for e in reader] == ["aiwr_start", "result"]
+
+
+def test_read_header_stops_at_invalid_line(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(START + b'{"type": "aiwr_meta", broken}\n{"type": "aiwr_meta", "parent_id": "x"}\n')
+    assert [e["type"] for e in Logger.read_header(path)] == ["aiwr_start"]
+
+
+def test_read_header_tolerates_invalid_utf8(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(START + b'{"type": "aiwr_meta", "parent_id": "\xff"}\n')
+    header = Logger.read_header(path)
+    assert [e["type"] for e in header] == ["aiwr_start", "aiwr_meta"]
+
+
+def test_read_summary_ignores_invalid_trailer(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_bytes(START + b'{"type": "aiwr_summary", "status": \n')
+    assert Logger.read_summary(path) is None
@@ -0,0 +1,46 @@
+"""Children started under a provisional session ID end up under the real one."""
+
+from aiwr import catalog as catalog_module
+from aiwr.catalog import open_catalog
+from aiwr.cli import main
+from aiwr.session import record_alias, scan_day
+
+
+def _tree(logs_dir, write_log):
+    """Parent r1 and child c1, started while r1 was still known as p-tmp."""
+    day = logs_dir / "2026-01-01"
+    write_log(day / "r1.jsonl", prompt="parent", agent="codex")
+    write_log(day / "c1.jsonl", prompt="child", parent_id="p-tmp")
+    return day
+
+
+def test_alias_repoints_catalogued_children(logs_dir, write_log):
+    _tree(logs_dir, write_log)
+    catalog = open_catalog(logs_dir)
+    assert catalog.children("p-tmp") == ["c1"]
+
+    record_alias("p-tmp", "r1")
+    assert catalog.children("r1") == ["c1"]
+    assert catalog.get("c1").parent_id == "r1"
+
+
+def test_rescan_resolves_provisional_parent(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    record_alias("p-tmp", "r1")
+
+    monkeypatch.setattr(catalog_module, "_catalogs", {})
+    catalog = open_catalog(logs_dir)
+    catalog.rebuild()  # Aliases survive, the child's log still names p-tmp
+    assert catalog.children("r1") == ["c1"]
+    catalog.upsert("c2", logs_dir / "2026-01-01" / "c2.jsonl", parent_id="p-tmp")
+    assert catalog.children("r1") == ["c1", "c2"]
+
+
+def test_day_scan_resolves_provisional_parent(logs_dir, write_log, capsys):
+    day = _tree(logs_dir, write_log)
+    record_alias("p-tmp", "r1")
+
+    assert scan_day(day).children == {"r1": ["c1"]}
+    assert main(["--list"], forward=False) == 0
+    out = capsys.readouterr().out
+    assert "└─ c1" in out
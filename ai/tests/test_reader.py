@@ -0,0 +1,78 @@
+"""LogReader: line index, lazy decoding and the index cache."""
+
+import json
+
+import pytest
+
+from aiwr import reader as reader_module
+from aiwr.reader import LogReader
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    monkeypatch.setattr(reader_module, "_index_cache", reader_module.OrderedDict())
+    path = tmp_path / "s1.jsonl"
+    path.write_bytes(
+        b'{"n": 0}\n'
+        b"\n"
+        b"----------\n"
+        b'{"n": 1}\r\n'
+        b"not json\n"
+        b'{"type": "aiwr_timing", "n": 2}\n'
+        b'{"n": 3}'  # No final newline: still being written
+    )
+    return path
+
+
+def test_index_skips_blank_and_separator_lines(log):
+    with LogReader(log) as reader:
+        assert len(reader) == 5
+        assert reader.raw(1) == b'{"n": 1}'  # \r dropped
+        assert reader.raw(2) == b"not json"
+        assert reader[4] == {"n": 3}
+        with pytest.raises(ValueError):
+            reader[2]
+
+
+def test_iteration_skips_malformed_lines(log):
+    with LogReader(log) as reader:
+        assert [entry["n"] for entry in reader] == [0, 1, 2, 3]
+        assert [entry["n"] for entry in reversed(reader)] == [3, 2, 1, 0]
+        assert [entry["n"] for entry in reader.head(2)] == [0, 1]
+        assert [entry["n"] for entry in reader.tail(2)] == [2, 3]
+        assert reader.tail(100) == list(reader)
+
+
+def test_skip_prefixes(log):
+    with LogReader(log, skip_prefixes=(b'{"type": "aiwr_',)) as reader:
+        assert [entry["n"] for entry in reader] == [0, 1, 3]
+
+
+def test_empty_log(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.touch()
+    with LogReader(path) as reader:
+        assert len(reader) == 0
+        assert reader.tail(3) == []
+
+
+def test_index_cache_follows_the_file(log, monkeypatch):
+    with LogReader(log) as reader:
+        assert len(reader) == 5
+
+    built = []
+    build_index = LogReader._build_index
+    monkeypatch.setattr(LogReader, "_build_index", lambda self: built.append(1) or build_index(self))
+    with LogReader(log) as reader:
+        assert len(reader) == 5
+    assert built == []  # Unchanged file: index reused
+
+    with log.open("ab") as f:
+        f.write(b"\n" + json.dumps({"n": 4}).encode() + b"\n")
+    with LogReader(log) as reader:
+        assert reader[-1] == {"n": 4}
+    assert built == [1]
+
+    with LogReader(log, cache=False) as reader:
+        assert len(reader) == 6
+    assert built == [1, 1]
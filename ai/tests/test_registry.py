@@ -0,0 +1,85 @@
+"""Lazy startup: agents, the daemon client and the search index load on first use."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import aiwr
+from aiwr.agents import AgentRegistry, BaseAgent, ClaudeAgent, get_agent
+from aiwr.bench.startup import STARTUP_FORBIDDEN
+
+SRC = Path(aiwr.__file__).parent.parent
+
+
+def _imported(argv: list[str]) -> set[str]:
+    """Modules imported by a fresh `aiwr` process running argv."""
+    code = (
+        "import sys\n"
+        "from aiwr.cli import main\n"
+        f"main({argv!r}, forward=True)\n"
+        "print(*sorted(sys.modules))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    return set(out.split("\n")[-2].split())
+
+
+class _EntryPoint:
+    """An `aiwr.agents` entry point that loads `target`."""
+
+    def __init__(self, target):
+        self.target = target
+        self.value = "plugin:Agent"
+
+    def load(self):
+        return self.target
+
+
+def test_list_without_daemon_stays_light(logs_dir, write_log):
+    write_log(logs_dir / "2026-01-01" / "s1.jsonl")
+    modules = _imported(["--list"])
+    assert "aiwr.tree" in modules
+    assert not modules & {*STARTUP_FORBIDDEN, "aiwr.daemon"}
+
+
+def test_builtin_imported_on_lookup():
+    registry = AgentRegistry({"claude": ("claude", "ClaudeAgent")})
+    registry._plugins = {}
+    assert isinstance(registry["claude"], ClaudeAgent)
+    assert registry["claude"] is registry["claude"]
+    assert list(registry) == ["claude"]
+
+
+def test_plugin_loaded_only_when_used():
+    loaded = []
+
+    class PluginAgent(ClaudeAgent):
+        def __init__(self):
+            loaded.append(self)
+            super().__init__()
+
+    registry = AgentRegistry({})
+    registry._plugins = {"mine": _EntryPoint(PluginAgent)}
+    assert "mine" in registry and list(registry) == ["mine"]
+    assert loaded == []
+    assert isinstance(registry["mine"], BaseAgent)
+    assert len(loaded) == 1
+
+
+def test_bad_plugins():
+    registry = AgentRegistry({})
+    registry._plugins = {"dict": _EntryPoint(dict), "broken": _EntryPoint(None)}
+    with pytest.raises(ValueError, match="is not a BaseAgent"):
+        registry["dict"]
+    with pytest.raises(ValueError, match="Can't load agent plugin broken"):
+        registry["broken"]
+    with pytest.raises(KeyError):
+        registry["nope"]
+
+
+def test_unknown_agent_lists_available():
+    with pytest.raises(ValueError, match="Unknown agent: nope. Available: claude, gemini"):
+        get_agent("nope")
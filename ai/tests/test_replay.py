@@ -0,0 +1,86 @@
+"""Replay agent: a recorded session played back through the runner."""
+
+import json
+
+import pytest
+
+from aiwr.agents import get_agent
+from aiwr.logger import Logger
+from aiwr.replay import Recording, load_recording, rewrite_session_ids, schedule, source_agent
+from aiwr.runner import Runner, discard_json
+from aiwr.session import find_session_path
+
+
+def _run(agent: str, prompt: str, extra_args: list[str] | None = None) -> Runner:
+    runner = Runner(agent=get_agent(agent), prompt=prompt, extra_args=extra_args, emit=discard_json)
+    runner.run()
+    return runner
+
+
+def _events(session_id: str) -> list[bytes]:
+    return load_recording(find_session_path(session_id)).events
+
+
+@pytest.mark.parametrize("agent", ["claude", "codex", "gemini"])
+def test_replay_runs_like_the_recorded_agent(logs_dir, fake_agents, agent):
+    recorded = _run(agent, "hi").result
+    replayed = _run("replay", recorded.session_id).result
+
+    assert replayed.exit_code == 0
+    assert (replayed.agent, replayed.model) == ("replay", agent)
+    assert replayed.result == recorded.result == f"{agent} says hi"
+    assert replayed.session_id != recorded.session_id
+
+    old, new = _events(recorded.session_id), _events(replayed.session_id)
+    assert [raw.replace(recorded.session_id.encode(), b"SID") for raw in old] == [
+        raw.replace(replayed.session_id.encode(), b"SID") for raw in new
+    ]
+
+
+def test_replay_keeps_stderr_and_exit_code(logs_dir, write_log, fake_agents):
+    log = write_log(logs_dir / "2026-01-01" / "s1.jsonl", agent="codex", status=None, events=[
+        {"type": "thread.started", "thread_id": "s1"},
+        {"type": "aiwr_stderr", "exit_code": 2, "lines": ["quota exceeded"]},
+        {"type": "aiwr_summary", "agent": "codex", "status": None, "exit_code": 2},
+    ])
+    runner = _run("replay", str(log))
+    assert runner.result.exit_code == 2
+    stderr = [e for e in Logger.load(find_session_path(runner.result.session_id)) if e["type"] == "aiwr_stderr"]
+    assert stderr[0]["lines"] == ["quota exceeded"]
+
+
+def test_wrong_recorded_agent(logs_dir, fake_agents):
+    recorded = _run("claude", "hi").result
+    assert _run("replay", recorded.session_id, ["--model", "codex"]).result.exit_code == 1
+
+
+def test_replay_of_a_replay_plays_the_source(logs_dir, write_log):
+    log = write_log(logs_dir / "2026-01-01" / "s1.jsonl", agent="replay", events=[])
+    with open(log, "a") as f:
+        f.write(json.dumps({"type": "aiwr_summary", "agent": "replay", "model": "gemini"}) + "\n")
+    assert source_agent(log) == "gemini"
+
+    unknown = write_log(logs_dir / "2026-01-01" / "s2.jsonl", agent="nope")
+    with pytest.raises(ValueError, match="Can't replay a log of agent: nope"):
+        source_agent(unknown)
+
+
+def test_session_ids_rewritten_in_raw_bytes():
+    recording = Recording("codex", [b'{"type":"thread.started","thread_id":"old"}', b'{"x":"old"}'], [], [], 0, None)
+    assert rewrite_session_ids(recording, "new") == [
+        b'{"type":"thread.started","thread_id":"new"}',
+        b'{"x":"new"}',
+    ]
+
+
+def _recording(offsets, duration=None) -> Recording:
+    return Recording("claude", [b"{}"] * len(offsets), offsets, [], 0, duration)
+
+
+def test_schedule():
+    assert schedule(_recording([0.1, 0.2]), "fast", 100) is None
+    assert schedule(_recording([None, None]), "rate", 4) == [0, 0.25]
+    # A resumed log starts again at 0: its runs play back to back
+    assert schedule(_recording([0.5, 1.0, 0.25]), "original", 100) == [0.5, 1.0, 1.25]
+    assert schedule(_recording([None, None], duration=2.0), "original", 100) == [0, 1.0]
+    assert schedule(_recording([None, None]), "original", 100) is None
@@ -0,0 +1,52 @@
+"""--resume-tree: the tree comes from the catalog, not a scan of every log."""
+
+import pytest
+
+from aiwr import resume, session
+from aiwr.catalog import open_catalog
+from aiwr.resume import build_resume_tree_prompt
+
+
+def _tree(logs_dir, write_log):
+    """r1 with children c1 and c2 (c2 logged on the next day), c1 with g1; an unrelated x1."""
+    write_log(logs_dir / "2026-01-01" / "r1" / "r1.jsonl", prompt="root task")
+    write_log(logs_dir / "2026-01-01" / "r1" / "c1" / "c1.jsonl", prompt="first child", parent_id="r1")
+    write_log(logs_dir / "2026-01-01" / "r1" / "c1" / "g1.jsonl", prompt="grandchild", parent_id="c1")
+    write_log(logs_dir / "2026-01-02" / "c2.jsonl", prompt="late child", parent_id="r1")
+    write_log(logs_dir / "2026-01-02" / "x1.jsonl", prompt="unrelated")
+
+
+def test_tree_built_from_catalog(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    open_catalog(logs_dir)
+    monkeypatch.setattr(resume, "scan_sessions", None)  # Any full scan fails
+
+    prompt = build_resume_tree_prompt("r1", budget=0)
+    assert "== Root Session: r1" in prompt
+    assert "  == Child Session: c1" in prompt
+    assert "    == Child Session: g1" in prompt
+    assert "  == Child Session: c2" in prompt
+    assert "unrelated" not in prompt
+
+
+def test_provisional_id_resolves(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    session.record_alias("p-tmp", "r1")
+    monkeypatch.setattr(resume, "scan_sessions", None)
+
+    assert "== Root Session: r1" in build_resume_tree_prompt("p-tmp", budget=0)
+
+
+def test_without_catalog_scans(logs_dir, write_log, monkeypatch):
+    _tree(logs_dir, write_log)
+    monkeypatch.setattr(session, "open_catalog", lambda logs_dir: None)
+
+    prompt = build_resume_tree_prompt("r1", budget=0)
+    assert "    == Child Session: g1" in prompt
+    assert "  == Child Session: c2" in prompt
+
+
+def test_unknown_session(logs_dir, write_log):
+    _tree(logs_dir, write_log)
+    with pytest.raises(ValueError, match="Session not found"):
+        build_resume_tree_prompt("nope")
@@ -0,0 +1,107 @@
+"""--search: the FTS5 index, its ranking and catching up with the logs tree."""
+
+import json
+import os
+import time
+
+import pytest
+
+from aiwr import cli, search
+from aiwr.agents import get_agent
+from aiwr.compact import compact_logs
+from aiwr.logger import Logger
+from aiwr.runner import Runner, discard_json
+from aiwr.search import match_expression, open_search_index, search_sessions
+
+OLD = time.time() - 90 * 86400
+
+
+def _say(text):
+    return {"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}}
+
+
+def _ids(query: str) -> list[str]:
+    return [hit.session_id for hit in search_sessions(query)]
+
+
+def test_prompt_ranks_above_result_above_assistant(logs_dir, write_log):
+    day = logs_dir / "2026-01-01"
+    write_log(day / "a1.jsonl", prompt="unrelated", events=[_say("the parser is fixed")])
+    write_log(day / "r1.jsonl", prompt="unrelated", events=[{"type": "result", "result": "parser fixed"}])
+    write_log(day / "p1.jsonl", prompt="fix the parser")
+    write_log(day / "x1.jsonl", prompt="unrelated", events=[_say("nothing to see")])
+
+    assert _ids("parser") == ["p1", "r1", "a1"]
+    hit = search_sessions("parser")[0]
+    assert (hit.agent, hit.date, hit.snippet) == ("claude", "2026-01-01", "fix the [parser]")
+
+
+def test_query_terms(logs_dir, write_log):
+    write_log(logs_dir / "2026-01-01" / "s1.jsonl", prompt='Running the "tokenizer" tests')
+    assert _ids("run tests") == ["s1"]  # Every word, stemmed
+    assert _ids("run deploy") == []
+    assert _ids("token*") == ["s1"]
+    assert _ids('"tokenizer"') == ["s1"]
+    assert _ids("NOT") == []  # Operators are plain words, not a syntax error
+    assert match_expression('a"b c*') == '"a""b" "c"*'
+    with pytest.raises(ValueError, match="Empty search query"):
+        match_expression(" * ")
+
+
+def test_catch_up_with_changed_days(logs_dir, write_log, monkeypatch):
+    old_day = logs_dir / "2026-01-01"
+    write_log(old_day / "s1.jsonl", prompt="alpha")
+    write_log(logs_dir / "2026-01-02" / "s2.jsonl", prompt="beta")
+    assert _ids("alpha") == ["s1"]
+
+    indexed = []
+    session_text = search.session_text
+    monkeypatch.setattr(search, "session_text", lambda path: indexed.append(path.name) or session_text(path))
+    write_log(logs_dir / "2026-01-02" / "s3.jsonl", prompt="gamma")
+    assert _ids("gamma") == ["s3"]
+    assert indexed == ["s3.jsonl"]  # Unchanged days and logs aren't read again
+
+    resumed = Logger(old_day / "s1.jsonl", is_resume=True)
+    resumed.append({"type": "aiwr_start", "prompt": "delta", "agent": "claude"})
+    resumed.save()
+    assert _ids("alpha") == _ids("delta") == ["s1"]
+
+    for path in logs_dir.rglob("*.jsonl"):
+        os.utime(path, (OLD, OLD))
+    assert len(compact_logs(0)) == 2
+    assert _ids("delta") == ["s1"]
+    assert search_sessions("gamma")[0].path == logs_dir / "2026-01-02.zip" / "s3.jsonl"
+
+    (logs_dir / "2026-01-02.zip").unlink()
+    assert _ids("gamma") == []
+
+
+def test_run_indexed_when_it_ends(logs_dir, fake_agents):
+    runner = Runner(agent=get_agent("codex"), prompt="refactor storage", emit=discard_json)
+    assert runner.run() == 0
+    hits = open_search_index(logs_dir).search("storage")  # No catch-up
+    assert [hit.session_id for hit in hits] == [runner.result.session_id]
+    assert hits[0].snippet == "refactor [storage]"
+
+
+def test_cli_json(logs_dir, write_log, capsys):
+    write_log(logs_dir / "2026-01-01" / "s1.jsonl", prompt="alpha")
+    assert cli.main(["--search", "alpha", "--json"], forward=False) == 0
+    assert [hit["session_id"] for hit in json.loads(capsys.readouterr().out)] == ["s1"]
+
+    assert cli.main(["--search", "alpha", "--limit", "0"], forward=False) == 1
+    assert "--limit must be at least 1" in capsys.readouterr().err
+
+
+def test_cli_closed_pipe(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "s1.jsonl", prompt="alpha")
+    dropped = []
+    monkeypatch.setattr(cli, "_drop_stdout", lambda: dropped.append(True))
+
+    class ClosedPipe:
+        def write(self, text):
+            raise BrokenPipeError()
+
+    monkeypatch.setattr("sys.stdout", ClosedPipe())
+    assert cli.handle_search("alpha") == 0
+    assert dropped == [True]
@@ -0,0 +1,81 @@
+"""--stats: per-day aggregates, their cache, nesting depth and runs without a summary."""
+
+import pytest
+
+from aiwr import cli, stats
+from aiwr.stats import _depth, collect_stats
+
+RESULT = {"type": "result", "result": "done"}
+ASSISTANT = {"type": "assistant", "message": {"content": [{"type": "text", "text": "working"}]}}
+
+
+def _runs(result) -> dict:
+    return {key: group.summary()["runs"] for key, group in result.items()}
+
+
+def test_unchanged_days_come_from_cache(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl", events=[RESULT])
+    write_log(logs_dir / "2026-01-02" / "b1.jsonl", agent="codex")
+    first = collect_stats(("day", "agent"))
+
+    scanned = []
+    scan_log = stats.scan_log
+    monkeypatch.setattr(stats, "scan_log", lambda path: scanned.append(path.name) or scan_log(path))
+    assert _runs(collect_stats(("day", "agent"))) == _runs(first)
+    assert scanned == []
+
+    write_log(logs_dir / "2026-01-02" / "b2" / "b2.jsonl", agent="codex")
+    assert _runs(collect_stats(("day", "agent"))) == {
+        ("2026-01-01", "claude"): 1,
+        ("2026-01-02", "codex"): 2,
+    }
+    assert sorted(scanned) == ["b1.jsonl", "b2.jsonl"]  # Only the day that changed
+
+
+@pytest.mark.parametrize(("rel_parts", "parent_id", "depth"), [
+    (("a.jsonl",), None, 0),
+    (("a", "a.jsonl"), None, 0),
+    (("a", "b.jsonl"), "a", 1),
+    (("a", "b", "b.jsonl"), "a", 1),
+    (("a", "b", "c.jsonl"), "b", 2),
+    (("c.jsonl",), "b", 1),  # Fell back to a date directory of its own
+])
+def test_depth(rel_parts, parent_id, depth):
+    assert _depth(rel_parts, parent_id) == depth
+
+
+def test_depth_groups(logs_dir, write_log):
+    day = logs_dir / "2026-01-01"
+    write_log(day / "a" / "a.jsonl")
+    write_log(day / "a" / "b" / "b.jsonl", parent_id="a")
+    write_log(day / "a" / "b" / "c.jsonl", parent_id="b")
+    write_log(logs_dir / "2026-01-02" / "d.jsonl", parent_id="a")
+    assert _runs(collect_stats(("depth",))) == {(0,): 1, (1,): 2, (2,): 1}
+
+
+def test_runs_without_summary_use_status_rules(logs_dir, write_log):
+    day = logs_dir / "2026-01-01"
+    write_log(day / "done.jsonl", events=[ASSISTANT, RESULT], status=None)
+    write_log(day / "killed.jsonl", events=[ASSISTANT], status=None)
+
+    summary = collect_stats()[("claude",)].summary()
+    assert summary["runs"] == 2
+    assert summary["failures"] == 1  # No result event: never finished
+    assert summary["p50"] is None
+
+
+class _ClosedPipe:
+    def write(self, text):
+        raise BrokenPipeError()
+
+    def flush(self):
+        raise BrokenPipeError()
+
+
+def test_closed_pipe_is_not_an_error(logs_dir, write_log, monkeypatch):
+    write_log(logs_dir / "2026-01-01" / "a1.jsonl")
+    dropped = []
+    monkeypatch.setattr(cli, "_drop_stdout", lambda: dropped.append(True))
+    monkeypatch.setattr("sys.stdout", _ClosedPipe())
+    assert cli.handle_stats("agent", as_json=True) == 0
+    assert dropped == [True]
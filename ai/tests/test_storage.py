@@ -0,0 +1,57 @@
+"""Compressed logs: written plain, compressed on close, read transparently."""
+
+import pytest
+
+from aiwr.logger import Logger
+from aiwr.reader import LogReader
+from aiwr.storage import compress_file, decompress_file, detect_compression, get_compression, is_plain
+
+ENTRIES = [{"type": "assistant", "n": n} for n in range(3)]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "lzma"])
+def test_logger_compresses_on_close(tmp_path, compression):
+    path = tmp_path / "s1.jsonl"
+    logger = Logger(path, streaming=True, compression=compression)
+    for entry in ENTRIES:
+        logger.append(entry)
+    assert logger.save() == path
+
+    assert detect_compression(path) == compression
+    assert not is_plain(path)
+    assert Logger.load(path) == ENTRIES
+    with LogReader(path) as reader:
+        assert reader.tail(1) == ENTRIES[-1:]
+
+
+def test_resume_appends_to_compressed_log(tmp_path):
+    path = tmp_path / "s1.jsonl"
+    first = Logger(path, compression="gzip")
+    first.append(ENTRIES[0])
+    first.save()
+
+    resumed = Logger(path, is_resume=True, streaming=True, compression="gzip")
+    resumed.append(ENTRIES[1])
+    resumed.save()
+    assert detect_compression(path) == "gzip"
+    assert Logger.load(path) == ENTRIES[:2]
+
+
+def test_compress_round_trip(tmp_path):
+    path = tmp_path / "s1.jsonl"
+    path.write_bytes(b'{"n": 0}\n')
+    compress_file(path, "lzma")
+    compress_file(path, "gzip")  # Already compressed: left alone
+    assert detect_compression(path) == "lzma"
+    decompress_file(path)
+    assert path.read_bytes() == b'{"n": 0}\n'
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_compression_from_env(monkeypatch):
+    monkeypatch.setenv("AIWR_LOG_COMPRESSION", "gzip")
+    assert get_compression() == "gzip"
+    assert get_compression("none") == "none"
+    monkeypatch.setenv("AIWR_LOG_COMPRESSION", "zstd")
+    with pytest.raises(ValueError, match="Unknown log compression: zstd"):
+        get_compression()
@@ -0,0 +1,55 @@
+"""Run timing: aiwr_timing milestones and per-event receive offsets."""
+
+import json
+
+from aiwr.agents import get_agent
+from aiwr.logger import Logger
+from aiwr.runner import Runner, discard_json
+from aiwr.session import find_session_path
+from aiwr.timing import TIMING_MARKS, RunTiming, splice_offset, strip_offset
+
+
+def _run(prompt: str) -> list[dict]:
+    runner = Runner(agent=get_agent("claude"), prompt=prompt, emit=discard_json)
+    assert runner.run() == 0
+    return Logger.load(find_session_path(runner.result.session_id))
+
+
+def test_first_mark_wins():
+    timing = RunTiming()
+    timing.mark("spawn")
+    first = timing.marks["spawn"]
+    timing.mark("spawn")
+    assert timing.marks["spawn"] == first
+    entry = timing.entry()
+    assert list(entry) == ["type", *TIMING_MARKS]
+    assert entry["exit"] is None
+
+
+def test_run_logs_milestones_in_order(logs_dir, fake_agents):
+    entries = _run("hi")
+    timing = next(e for e in entries if e["type"] == "aiwr_timing")
+    assert timing["first_tool"] is None  # The fake agent calls no tools
+    reached = [timing[name] for name in TIMING_MARKS if timing[name] is not None]
+    assert len(reached) == len(TIMING_MARKS) - 1
+    assert reached == sorted(reached)
+    assert all("aiwr_t" not in e for e in entries)
+
+
+def test_event_offsets(logs_dir, fake_agents, monkeypatch):
+    monkeypatch.setenv("AIWR_LOG_TIMING", "1")
+    entries = _run("hi")
+    events = [e for e in entries if not e["type"].startswith("aiwr_")]
+    offsets = [e["aiwr_t"] for e in events]
+    assert offsets and offsets == sorted(offsets)
+    assert list(events[0])[0] == "type"
+
+
+def test_splice_round_trip():
+    for raw in (b'{"type": "x", "n": 1}', b'{"type":"x"}  ', b"{}", b"{ }"):
+        spliced = splice_offset(raw, 0.25)
+        assert json.loads(spliced)["aiwr_t"] == 0.25
+        assert strip_offset(spliced) == (raw, 0.25)  # The exact original bytes
+
+    assert splice_offset(b"not json", 0.25) == b"not json"
+    assert strip_offset(b'{"type": "x"}') == (b'{"type": "x"}', None)
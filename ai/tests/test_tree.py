@@ -0,0 +1,31 @@
+"""--list: day order, filters and the root limit."""
+
+import time
+
+from aiwr.cli import main
+
+
+def test_limit_keeps_newest_root(logs_dir, write_log, capsys):
+    day = logs_dir / "2026-01-05"
+    now = time.time()
+    # IDs sort in the opposite order of the runs
+    write_log(day / "a1.jsonl", prompt="oldest", mtime=now - 120)
+    write_log(day / "b2.jsonl", prompt="older", mtime=now - 60)
+    write_log(day / "c3.jsonl", prompt="newest", mtime=now)
+
+    assert main(["--list", "--limit", "1"], forward=False) == 0
+    out = capsys.readouterr().out
+    assert "c3" in out
+    assert "a1" not in out and "b2" not in out
+
+
+def test_roots_listed_newest_first(logs_dir, write_log, capsys):
+    day = logs_dir / "2026-01-05"
+    now = time.time()
+    write_log(day / "a1.jsonl", mtime=now - 120)
+    write_log(day / "b2.jsonl", mtime=now)
+    write_log(day / "c3.jsonl", mtime=now - 60)
+
+    assert main(["--list", "--roots-only"], forward=False) == 0
+    out = capsys.readouterr().out
+    assert out.index("b2") < out.index("c3") < out.index("a1")